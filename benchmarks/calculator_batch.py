@@ -0,0 +1,104 @@
+"""
+CalculatorTool batch benchmark for Solta framework
+
+Compares calling execute() once per item with execute_batch() on the same
+random operations, and checks that both give identical results. Exits with
+a non-zero status on any mismatch.
+
+Usage:
+    python benchmarks/calculator_batch.py [--items 100000] [--seed 7]
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from solta.examples.multi_agent_demo.calculator_agent.tools import CalculatorTool  # noqa: E402
+
+OPERATIONS = ["add", "subtract", "multiply", "divide", "power"]
+
+
+def make_items(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    items = []
+    for _ in range(count):
+        operation = rng.choice(OPERATIONS)
+        if rng.random() < 0.5:
+            a, b = rng.randint(-1000, 1000), rng.randint(-1000, 1000)
+        else:
+            a, b = rng.uniform(-1e3, 1e3), rng.uniform(-1e3, 1e3)
+        if operation == "power":
+            a, b = abs(a), rng.choice([rng.randint(0, 5), rng.uniform(-3, 3)])
+        if rng.random() < 0.01:
+            b = 0
+        items.append({"operation": operation, "a": a, "b": b})
+    # A few operands that need the exact Python path
+    items.append({"operation": "multiply", "a": 2 ** 40, "b": 2 ** 40})
+    items.append({"operation": "power", "a": 10.0, "b": 400.0})
+    items.append({"operation": "power", "a": -8.0, "b": 1 / 3})
+    return items
+
+
+def same(expected, actual) -> bool:
+    if isinstance(expected, BaseException) or isinstance(actual, BaseException):
+        return type(expected) is type(actual) and str(expected) == str(actual)
+    left, right = expected["result"], actual["result"]
+    if type(left) is not type(right):
+        return False
+    if isinstance(left, float) and math.isnan(left):
+        return isinstance(right, float) and math.isnan(right)
+    return left == right and expected == actual
+
+
+async def per_item(tool: CalculatorTool, items: list) -> list:
+    results = []
+    for item in items:
+        try:
+            results.append(await tool.execute(**item))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+async def run(count: int, seed: int) -> bool:
+    tool = CalculatorTool()
+    items = make_items(count, seed)
+
+    started = time.perf_counter()
+    expected = await per_item(tool, items)
+    loop_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = await tool.execute_batch(items)
+    batch_time = time.perf_counter() - started
+
+    mismatches = [index for index, (left, right) in enumerate(zip(expected, actual)) if not same(left, right)]
+
+    print(f"items:      {len(items)}")
+    print(f"per-item:   {loop_time:.3f}s ({len(items) / loop_time:,.0f} ops/s)")
+    print(f"batched:    {batch_time:.3f}s ({len(items) / batch_time:,.0f} ops/s)")
+    print(f"speedup:    {loop_time / batch_time:.1f}x")
+    print(f"mismatches: {len(mismatches)}")
+    for index in mismatches[:5]:
+        print(f"  {items[index]}: {expected[index]!r} != {actual[index]!r}")
+    return not mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args.items, args.seed))
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Handler dispatch benchmark for Solta framework
+
+Measures the framework overhead per message delivered through
+Agent.handle() for an undecorated agent, an agent using @setup_agent and
+@requires_tool, and the same agent built with the previous per-call
+wrappers (reproduced here for comparison). Exits with a non-zero status
+when decorated handlers cost noticeably more than undecorated ones, or
+when decorators stacked above @setup_agent stop taking effect.
+
+Usage:
+    python benchmarks/dispatch_overhead.py [--messages 200000] [--max-ratio 1.3]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from functools import wraps
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from solta.core import Agent, BaseTool, cached_tool, requires_tool, setup_agent, with_context  # noqa: E402
+
+
+def legacy_setup_agent(func):
+    """The per-call wrapper @setup_agent used to add."""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            raise e
+    return wrapper
+
+
+def legacy_requires_tool(tool_name):
+    """The per-call tool check @requires_tool used to add."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            if tool_name not in self.tools:
+                raise RuntimeError(f"Required tool '{tool_name}' not found")
+            return await func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class EchoTool(BaseTool):
+    async def execute(self, **kwargs):
+        return kwargs
+
+
+class PlainAgent(Agent):
+    async def on_ready(self):
+        pass
+
+    async def on_message(self, message):
+        return await self.reply(message)
+
+    async def reply(self, message):
+        return message
+
+
+class DecoratedAgent(Agent):
+    @setup_agent
+    async def on_ready(self):
+        pass
+
+    @setup_agent
+    async def on_message(self, message):
+        return await self.reply(message)
+
+    @requires_tool("echo")
+    async def reply(self, message):
+        return message
+
+
+class LegacyAgent(Agent):
+    @legacy_setup_agent
+    async def on_ready(self):
+        pass
+
+    @legacy_setup_agent
+    async def on_message(self, message):
+        return await self.reply(message)
+
+    @legacy_requires_tool("echo")
+    async def reply(self, message):
+        return message
+
+
+class StackedAgent(Agent):
+    """Wrapping decorators placed above @setup_agent must be kept."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    @setup_agent
+    async def on_ready(self):
+        pass
+
+    @with_context(temperature=0.1)
+    @setup_agent
+    async def on_message(self, message):
+        return dict(self.context)
+
+    @cached_tool
+    @setup_agent
+    async def lookup(self, query):
+        self.calls += 1
+        return query
+
+
+async def check_stacking() -> bool:
+    agent = StackedAgent(name="stacked", ai_provider=object())
+    await agent.initialize()
+    context = await agent.handle({})
+    for _ in range(3):
+        await agent.lookup("ping")
+    print(f"stacked context: {context}, cached body calls: {agent.calls}")
+    return context == {"temperature": 0.1} and agent.calls == 1
+
+
+async def measure(agent_cls: type, messages: int, rounds: int) -> float:
+    """Best time per message in microseconds."""
+    agent = agent_cls(name=agent_cls.__name__, ai_provider=object())
+    agent.register_tool(EchoTool(name="echo"))
+    await agent.initialize()
+    message = {"query": "ping"}
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(messages):
+            await agent.handle(message)
+        best = min(best, time.perf_counter() - started)
+    return best / messages * 1e6
+
+
+async def run(messages: int, rounds: int, max_ratio: float) -> bool:
+    plain = await measure(PlainAgent, messages, rounds)
+    decorated = await measure(DecoratedAgent, messages, rounds)
+    legacy = await measure(LegacyAgent, messages, rounds)
+
+    print(f"messages:        {messages} x {rounds} rounds")
+    print(f"undecorated:     {plain:.3f} us/message")
+    print(f"decorated:       {decorated:.3f} us/message ({decorated / plain:.2f}x)")
+    print(f"legacy wrappers: {legacy:.3f} us/message ({legacy / plain:.2f}x)")
+    stacking = await check_stacking()
+    return decorated / plain <= max_ratio and stacking
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--max-ratio", type=float, default=1.3)
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args.messages, args.rounds, args.max_ratio))
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Import time benchmark for Solta framework
+
+Measures `import solta` (and a few common entry points) in fresh
+interpreters and checks that heavy optional dependencies stay unloaded.
+Exits with a non-zero status when a budget is exceeded.
+
+Usage:
+    python benchmarks/import_time.py [--scale 1.0] [--runs 7]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Modules that must not be imported by any statement
+HEAVY_MODULES = ("aiohttp", "watchdog", "pydantic", "multiprocessing", "numpy")
+
+# Statement -> median budget in milliseconds; Agent and Client need asyncio,
+# which alone accounts for most of their budget
+CASES = {
+    "import solta": 25.0,
+    "from solta import Agent": 100.0,
+    "from solta import Client": 120.0,
+}
+
+PROBE = """
+import sys, time, json
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"elapsed": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(statement: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(statement=statement)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply every budget (for slow machines)")
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    ok = True
+    for statement, budget_ms in CASES.items():
+        budget_ms *= args.scale
+        runs = [measure(statement) for _ in range(args.runs)]
+        median_ms = statistics.median(run["elapsed"] for run in runs) * 1000
+        loaded = sorted({
+            module.split(".")[0] for module in runs[0]["modules"]
+            if module.split(".")[0] in HEAVY_MODULES
+        })
+        within = median_ms <= budget_ms and not loaded
+        ok = ok and within
+        print(f"{statement:<28} {median_ms:7.1f} ms / {budget_ms:5.0f} ms  {'ok' if within else 'OVER BUDGET'}"
+              + (f"  (loaded: {', '.join(loaded)})" if loaded else ""))
+
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
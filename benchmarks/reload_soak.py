@@ -0,0 +1,116 @@
+"""
+Hot reload soak test for Solta framework
+
+Rewrites an agent file and reloads it thousands of times, then checks that
+sys.modules, router registrations, retired agents and traced memory stay
+flat. Exits with a non-zero status when anything keeps growing.
+
+Usage:
+    python benchmarks/reload_soak.py [--reloads 2000] [--max-growth-kb 512]
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from solta.core import Client  # noqa: E402
+
+AGENT_SOURCE = '''
+from solta.core import Agent
+
+PAYLOAD = list(range(2000))  # make leaked generations visible to tracemalloc
+
+
+class SoakAgent(Agent):
+    generation = {generation}
+
+    async def on_ready(self):
+        pass
+
+    async def on_message(self, message):
+        return {{"generation": self.generation, "size": len(PAYLOAD)}}
+'''
+
+
+def write_agent(path: str, generation: int) -> None:
+    with open(path, "w") as f:
+        f.write(AGENT_SOURCE.format(generation=generation))
+
+
+def route_count(client: Client) -> int:
+    return sum(len(agents) for agents in client._router.routes.values())
+
+
+async def soak(reloads: int, max_growth_kb: int) -> bool:
+    workdir = tempfile.mkdtemp(prefix="solta_soak_")
+    agent_dir = os.path.join(workdir, "soak_agent")
+    os.makedirs(agent_dir)
+    agent_file = os.path.realpath(os.path.join(agent_dir, "agent.py"))
+    write_agent(agent_file, 0)
+
+    client = Client(agent_dirs=[workdir], live_reload=True, drain_timeout=1)
+    await client.start()
+    loader = client._loader
+    # Reloads are driven directly; the file watcher is not needed
+    loader.stop_watching()
+
+    async def reload(generation: int) -> None:
+        write_agent(agent_file, generation)
+        await loader.reload_files({agent_file: time.perf_counter()})
+        # Let the retired instance drain and clean up
+        while client._retiring:
+            await asyncio.sleep(0)
+
+    # Warm up so one-off allocations do not count as growth
+    for generation in range(1, 51):
+        await reload(generation)
+
+    gc.collect()
+    tracemalloc.start()
+    baseline_memory = tracemalloc.get_traced_memory()[0]
+    baseline_modules = len(sys.modules)
+    baseline_routes = route_count(client)
+
+    started = time.perf_counter()
+    for generation in range(51, 51 + reloads):
+        await reload(generation)
+    elapsed = time.perf_counter() - started
+
+    response = await client.process_message({"content": "ping"})
+    alive = loader.retired_alive()
+    growth_kb = (tracemalloc.get_traced_memory()[0] - baseline_memory) / 1024
+    tracemalloc.stop()
+
+    modules_growth = len(sys.modules) - baseline_modules
+    routes_growth = route_count(client) - baseline_routes
+    await client._cleanup_async()
+
+    print(f"reloads:           {reloads} in {elapsed:.2f}s ({elapsed / reloads * 1000:.2f} ms each)")
+    print(f"last response:     {response}")
+    print(f"sys.modules delta: {modules_growth}")
+    print(f"route delta:       {routes_growth}")
+    print(f"retired alive:     {alive}")
+    print(f"traced growth:     {growth_kb:.1f} KiB (budget {max_growth_kb} KiB)")
+
+    return modules_growth <= 0 and routes_growth <= 0 and alive == 0 and growth_kb <= max_growth_kb
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reloads", type=int, default=2000)
+    parser.add_argument("--max-growth-kb", type=int, default=512)
+    args = parser.parse_args()
+
+    ok = asyncio.run(soak(args.reloads, args.max_growth_kb))
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
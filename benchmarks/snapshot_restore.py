@@ -0,0 +1,137 @@
+"""
+Snapshot and restore benchmark for Solta framework
+
+Fills a MemoryAgent with in-memory memories, a conversation history and a
+vector store, then measures how long the event loop is blocked while a
+snapshot is taken, how long an unchanged snapshot takes, and how long a
+new Client needs to start from the snapshot. Exits with a non-zero status
+when the loop stalls for longer than allowed or the state does not survive.
+
+Usage:
+    python benchmarks/snapshot_restore.py [--memories 100000] [--vectors 200000] [--max-stall-ms 50]
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from solta.core import Client  # noqa: E402
+from solta.examples.multi_agent_demo.memory_agent import MemoryAgent  # noqa: E402
+
+
+class StallMonitor:
+    """Longest gap between ticks of a task sleeping `period` seconds."""
+
+    def __init__(self, period: float = 0.001):
+        self.period = period
+        self.longest = 0.0
+        self._task = None
+
+    async def _tick(self) -> None:
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(self.period)
+            now = time.perf_counter()
+            self.longest = max(self.longest, now - last - self.period)
+            last = now
+
+    def __enter__(self) -> "StallMonitor":
+        self._task = asyncio.ensure_future(self._tick())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._task.cancel()
+
+
+async def fill(client: Client, memories: int, vectors: int, dim: int) -> None:
+    import numpy as np
+
+    agent = client.agents["MemoryAgent"]
+    storage = agent.tools["memory_store"].storage
+    for i in range(memories):
+        storage.set(f"user:{i:08d}", {"note": f"memory {i}", "tags": ["a", "b"]})
+    await storage.flush()
+    for i in range(100):
+        await client.process_message({"text": f"message {i}"})
+
+    rng = np.random.default_rng(0)
+    store = agent.tools["vector_memory"].store
+    store.add_many(
+        [f"v{i}" for i in range(vectors)],
+        rng.standard_normal((vectors, dim)).astype(np.float32),
+        [{"i": i} for i in range(vectors)]
+    )
+
+
+async def run(memories: int, vectors: int, dim: int, max_stall_ms: float) -> bool:
+    path = os.path.join(tempfile.mkdtemp(prefix="solta_snapshot_"), "state.snap")
+
+    client = Client(snapshot_path=path, snapshot_interval=None)
+    client.agent(MemoryAgent)
+    await client.start()
+    await fill(client, memories, vectors, dim)
+    # Settle the collector's debt from filling, so it is not charged to the snapshot
+    gc.collect()
+
+    with StallMonitor() as monitor:
+        started = time.perf_counter()
+        await client.snapshot()
+        first = time.perf_counter() - started
+    stall = monitor.longest
+
+    started = time.perf_counter()
+    written = await client.snapshot()
+    unchanged = time.perf_counter() - started
+
+    await client.process_message({"text": "one more"})
+    with StallMonitor() as monitor:
+        started = time.perf_counter()
+        await client.snapshot()
+        incremental = time.perf_counter() - started
+    stall = max(stall, monitor.longest)
+    size = client.snapshot_stats["last_bytes"]
+    await client._cleanup_async()
+
+    restored = Client(snapshot_path=path, snapshot_interval=None)
+    restored.agent(MemoryAgent)
+    started = time.perf_counter()
+    await restored.start()
+    restore = time.perf_counter() - started
+
+    agent = restored.agents["MemoryAgent"]
+    ok = (
+        len(agent.tools["memory_store"].storage) == memories
+        and len(agent.tools["vector_memory"].store) == vectors
+        and len(agent.conversation_history) == 100
+    )
+    await restored._cleanup_async()
+
+    print(f"snapshot size:        {size / 1e6:.1f} MB")
+    print(f"first snapshot:       {first * 1000:.1f} ms")
+    print(f"unchanged snapshot:   {unchanged * 1000:.1f} ms (written: {written})")
+    print(f"incremental snapshot: {incremental * 1000:.1f} ms")
+    print(f"longest loop stall:   {stall * 1000:.1f} ms (limit {max_stall_ms} ms)")
+    print(f"start from snapshot:  {restore * 1000:.1f} ms")
+    print(f"state restored:       {ok}")
+    return ok and not written and stall * 1000 <= max_stall_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--memories", type=int, default=100000)
+    parser.add_argument("--vectors", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--max-stall-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    ok = asyncio.run(run(args.memories, args.vectors, args.dim, args.max_stall_ms))
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
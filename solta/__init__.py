@@ -1,49 +1,60 @@
 """
 Solta - A framework for building AI agents with Ollama
 """
-from .core import (
-    # Base classes
-    Agent,
-    BaseTool,
-    
-    # Decorators
-    setup_agent,
-    requires_tool,
-    with_context,
-    
-    # Client and Router
-    Client,
-    DefaultRouter,
-    
-    # AI Providers
-    AIProvider,
-    OllamaProvider,
-    AIProviderFactory,
-    default_provider,
-)
+from typing import TYPE_CHECKING, Any, List
+
+from . import core
+
+if TYPE_CHECKING:
+    from .core import (
+        # Base classes
+        Agent,
+        BaseTool,
+        
+        # Decorators
+        setup_agent,
+        requires_tool,
+        with_context,
+        cached_tool,
+        
+        # Context
+        current_context,
+        use_context,
+        
+        # Client and Router
+        Client,
+        ShardedClient,
+        IngressFullError,
+        DefaultRouter,
+        
+        # Routing rules
+        RouteRule,
+        FieldRule,
+        KeywordRule,
+        RegexRule,
+        EmbeddingRule,
+        
+        # AI Providers
+        AIProvider,
+        OllamaProvider,
+        AIProviderFactory,
+        default_provider,
+    )
 
 __version__ = "0.0.4"
 
-__all__ = [
-    # Base classes
-    'Agent',
-    'BaseTool',
-    
-    # Decorators
-    'setup_agent',
-    'requires_tool',
-    'with_context',
-    
-    # Client and Router
-    'Client',
-    'DefaultRouter',
-    
-    # AI Providers
-    'AIProvider',
-    'OllamaProvider',
-    'AIProviderFactory',
-    'default_provider',
-    
+__all__ = core.__all__ + [
     # Version
     '__version__',
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # Public names resolve through solta.core, which imports them on first use
+    if name in core.__all__:
+        return getattr(core, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,35 +1,96 @@
 """
 Core module initialization for Solta framework
+
+Public names are imported on first access (PEP 562), so `import solta.core`
+stays cheap and optional dependencies are only loaded by the features
+that need them.
 """
-from .agent import Agent
-from .tools import BaseTool
-from .decorators import setup_agent, requires_tool, with_context
-from .client import Client
-from .default_router import DefaultRouter  # Updated import
-from .ai_providers import (
-    AIProvider,
-    OllamaProvider,
-    AIProviderFactory,
-    default_provider
-)
-
-__all__ = [
+import importlib
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    from .agent import Agent
+    from .tools import BaseTool
+    from .decorators import setup_agent, requires_tool, with_context, cached_tool
+    from .context import current_context, use_context
+    from .tool_calling import StepCache, ToolCall, ToolCallResult
+    from .storage import KeyValueStore, StorageBackend, InMemoryBackend, SQLiteBackend
+    from .snapshot import Snapshotter
+    from .client import Client
+    from .sharding import ShardedClient
+    from .ingress import IngressFullError
+    from .default_router import DefaultRouter
+    from .routing import RouteRule, FieldRule, KeywordRule, RegexRule, EmbeddingRule
+    from .ai_providers import (
+        AIProvider,
+        OllamaProvider,
+        AIProviderFactory,
+        default_provider
+    )
+
+# Public name -> submodule defining it
+_EXPORTS: Dict[str, str] = {
     # Base classes
-    'Agent',
-    'BaseTool',
+    'Agent': 'agent',
+    'BaseTool': 'tools',
     
     # Decorators
-    'setup_agent',
-    'requires_tool',
-    'with_context',
+    'setup_agent': 'decorators',
+    'requires_tool': 'decorators',
+    'with_context': 'decorators',
+    'cached_tool': 'decorators',
+    
+    # Context
+    'current_context': 'context',
+    'use_context': 'context',
+    
+    # Tool calling
+    'StepCache': 'tool_calling',
+    'ToolCall': 'tool_calling',
+    'ToolCallResult': 'tool_calling',
+    
+    # Storage
+    'KeyValueStore': 'storage',
+    'StorageBackend': 'storage',
+    'InMemoryBackend': 'storage',
+    'SQLiteBackend': 'storage',
+    
+    # Snapshots
+    'Snapshotter': 'snapshot',
     
     # Client and Router
-    'Client',
-    'DefaultRouter',
+    'Client': 'client',
+    'ShardedClient': 'sharding',
+    'IngressFullError': 'ingress',
+    'DefaultRouter': 'default_router',
+    
+    # Routing rules
+    'RouteRule': 'routing',
+    'FieldRule': 'routing',
+    'KeywordRule': 'routing',
+    'RegexRule': 'routing',
+    'EmbeddingRule': 'routing',
     
     # AI Providers
-    'AIProvider',
-    'OllamaProvider',
-    'AIProviderFactory',
-    'default_provider',
-]
+    'AIProvider': 'ai_providers',
+    'OllamaProvider': 'ai_providers',
+    'AIProviderFactory': 'ai_providers',
+    'default_provider': 'ai_providers',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    # The provider is created lazily by its module, so it is not cached here
+    if name != 'default_provider':
+        globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
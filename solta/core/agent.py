@@ -1,9 +1,15 @@
 """
 Base Agent class for Solta framework
 """
-from typing import Optional, Dict, Any, Union, AsyncGenerator
+from typing import Optional, Dict, Any, Union, AsyncGenerator, FrozenSet, Iterable, List, Mapping, TYPE_CHECKING
 from abc import ABC, abstractmethod
-from .ai_providers import AIProvider, default_provider
+import asyncio
+from types import MappingProxyType
+from .ai_providers import AIProvider, get_default_provider
+from .context import current_context
+
+if TYPE_CHECKING:
+    from .tool_calling import StepCache
 
 class Agent(ABC):
     """
@@ -12,8 +18,28 @@ class Agent(ABC):
     This class provides the foundation for creating AI agents that can interact
     with various AI providers (Ollama, OpenAI, etc.). It handles basic lifecycle
     management and provides hooks for customization.
+    
+    Decorators (@setup_agent, @requires_tool) only attach metadata, so
+    handlers are called directly without wrapper layers. Tool requirements
+    are collected once per class and checked once at initialization rather
+    than on every call.
     """
     
+    # Tools required by each method, collected by __init_subclass__
+    _method_tools: Dict[str, FrozenSet[str]] = {}
+    
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        method_tools: Dict[str, FrozenSet[str]] = {}
+        for name in dir(cls):
+            member = getattr(cls, name, None)
+            if not callable(member):
+                continue
+            tools = getattr(member, '_required_tools', None)
+            if tools:
+                method_tools[name] = frozenset(tools)
+        cls._method_tools = method_tools
+    
     def __init__(
         self,
         name: Optional[str] = None,
@@ -26,11 +52,16 @@ class Agent(ABC):
         self.tools = {}
         self.config = kwargs
         self._is_ready = False
-        self.ai_provider = ai_provider or default_provider
+        self.ai_provider = ai_provider or get_default_provider()
+        self._in_flight = 0
+        self._handled = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._default_context: Dict[str, Any] = {}
         
     async def initialize(self) -> None:
         """Initialize the agent and its resources."""
         if not self._is_ready:
+            self.check_required_tools()
             await self.on_ready()
             self._is_ready = True
             
@@ -52,6 +83,167 @@ class Agent(ABC):
         """
         pass
     
+    async def handle(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Deliver a message to on_message while tracking in-flight work.
+        
+        Routers should call this instead of on_message so the agent can be
+        drained before it is replaced or cleaned up.
+        """
+        self._in_flight += 1
+        try:
+            return await self.on_message(message)
+        finally:
+            self._in_flight -= 1
+            self._handled += 1
+            if self._in_flight == 0 and self._idle is not None:
+                self._idle.set()
+    
+    def check_required_tools(self) -> None:
+        """
+        Check that every tool named by @requires_tool is registered.
+        
+        Raises:
+            RuntimeError: If a required tool is missing
+        """
+        for method, tools in self._method_tools.items():
+            for tool_name in tools:
+                if tool_name not in self.tools:
+                    raise RuntimeError(f"Required tool '{tool_name}' not found (needed by {method})")
+    
+    @property
+    def context(self) -> Mapping[str, Any]:
+        """
+        Context active for the current call (read-only).
+        
+        Layers added by @with_context or use_context() apply on top of the
+        agent's default context; layers pushed for other agents do not.
+        """
+        active = current_context(self)
+        if not self._default_context:
+            return active
+        return MappingProxyType({**self._default_context, **active})
+    
+    @context.setter
+    def context(self, values: Dict[str, Any]) -> None:
+        """Set the agent's default context."""
+        self._default_context = dict(values)
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of messages currently being handled."""
+        return self._in_flight
+    
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until no message is being handled.
+        
+        Args:
+            timeout: Maximum seconds to wait
+            
+        Returns:
+            True if the agent is idle, False if the timeout expired first
+        """
+        if self._in_flight == 0:
+            return True
+        if self._idle is None:
+            self._idle = asyncio.Event()
+        self._idle.clear()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    def export_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Export state to carry over when the agent is replaced (hot reload).
+        
+        The default exports the state of the agent's own tools. Agents with
+        state of their own should extend the returned dict.
+        
+        Returns:
+            State dictionary, or None if there is nothing to carry over
+        """
+        tools = {}
+        for name, tool in self.tools.items():
+            if tool._agent is not self:
+                continue
+            state = tool.export_state()
+            if state is not None:
+                tools[name] = state
+        return {"tools": tools} if tools else None
+    
+    def import_state(self, state: Dict[str, Any]) -> None:
+        """
+        Import state exported by a previous instance of the agent.
+        
+        Called after construction and before initialization.
+        """
+        for name, tool_state in state.get("tools", {}).items():
+            tool = self.tools.get(name)
+            if tool is not None:
+                tool.import_state(tool_state)
+    
+    def release_state(self) -> None:
+        """
+        Called once the replacement that imported this agent's exported
+        state has taken over; the default releases the state of the
+        agent's own tools.
+        """
+        for tool in self.tools.values():
+            if tool._agent is self:
+                tool.release_state()
+    
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Capture the agent's state to persist across restarts (see the
+        Client's snapshot_path).
+        
+        Unlike export_state(), which may hand live objects to a replacement
+        in the same process, a snapshot is data: dicts, lists, strings,
+        numbers, None, bytes and memoryviews. It is encoded in a worker
+        thread while the agent keeps running, so it must not share mutable
+        objects with the agent; a value may also be a zero-argument
+        callable, called in the worker thread, to move expensive work on
+        copies off the event loop. Tools are snapshotted separately (see
+        snapshot_tools), so an agent's tools are only encoded again when
+        they change.
+        
+        Returns:
+            State dictionary, or None if there is nothing to persist
+        """
+        return None
+    
+    def restore(self, state: Dict[str, Any]) -> None:
+        """
+        Restore state captured by snapshot() in a previous run.
+        
+        Called after construction and before initialization.
+        """
+        pass
+    
+    def snapshot_version(self) -> Any:
+        """
+        Value that changes whenever snapshot() would return something new.
+        
+        Periodic snapshots only encode agents whose version changed; None
+        (unknown) includes the agent in every snapshot. The default is the
+        number of messages handled, so agents whose state changes outside
+        handle() should override this.
+        """
+        return self._handled
+    
+    def snapshot_tools(self) -> Dict[str, 'BaseTool']:
+        """Tools snapshotted with the agent: those it registered itself."""
+        return {name: tool for name, tool in self.tools.items() if tool._agent is self}
+    
+    def restore_tool(self, name: str, state: Dict[str, Any]) -> None:
+        """Restore one of the agent's tools from a previous run's snapshot."""
+        tool = self.snapshot_tools().get(name)
+        if tool is not None:
+            tool.restore(state)
+    
     async def generate(
         self,
         prompt: str,
@@ -61,6 +253,9 @@ class Agent(ABC):
         """
         Generate a response using the configured AI provider.
         
+        Parameters come from the agent's config, then the active context
+        (see @with_context), then the call's keyword arguments.
+        
         Args:
             prompt: Input prompt
             stream: Whether to stream the response
@@ -69,8 +264,8 @@ class Agent(ABC):
         Returns:
             AI provider response or async generator for streaming
         """
-        # Merge instance config with call-specific kwargs
-        params = {**self.config, **kwargs}
+        # Merge instance config, active context and call-specific kwargs
+        params = {**self.config, **self.context, **kwargs}
         params["model"] = kwargs.get("model", self.model)
         
         if stream:
@@ -78,11 +273,60 @@ class Agent(ABC):
         else:
             return await self.ai_provider.generate(prompt, **params)
     
+    async def chat(
+        self,
+        messages: Union[str, List[Dict[str, Any]]],
+        tools: Optional[Iterable[str]] = None,
+        max_steps: int = 8,
+        tool_timeout: Optional[float] = 30.0,
+        retries: int = 0,
+        cache: Optional['StepCache'] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Chat with the model, letting it call the agent's tools.
+        
+        Registered tools are offered as function schemas. When the model
+        requests several tools in one step they run concurrently, each with
+        its own timeout, and the results are sent back until the model
+        answers without calling a tool.
+        
+        Args:
+            messages: Conversation so far, or a single user prompt
+            tools: Names of the tools to offer (default: all registered tools)
+            max_steps: Maximum number of model responses
+            tool_timeout: Seconds allowed per tool call
+            retries: Extra attempts for tool calls that fail or time out
+            cache: Results of completed calls (see StepCache); pass the same
+                   cache when retrying a conversation so completed calls
+                   are not repeated
+            **kwargs: Additional parameters for the AI provider
+            
+        Returns:
+            Dictionary with the final `content`, the full `messages`, the
+            number of `steps`, the `tool_results`, the `finish_reason` and
+            summed `usage`
+        """
+        from .tool_calling import run_tool_loop
+        
+        params = {**self.config, **self.context, **kwargs}
+        params["model"] = kwargs.get("model", self.model)
+        return await run_tool_loop(
+            self, messages,
+            tools=tools,
+            max_steps=max_steps,
+            tool_timeout=tool_timeout,
+            retries=retries,
+            cache=cache,
+            **params
+        )
+    
     async def cleanup(self) -> None:
         """Cleanup resources before shutdown."""
-        # Clean up all tools
+        # Clean up own tools (shared tools are cleaned up by their owner)
         for tool in list(self.tools.values()):
-            await tool.cleanup()
+            if tool._agent is self:
+                await tool.cleanup()
         
         # Clear tool references
         self.tools.clear()
@@ -3,7 +3,6 @@ AI provider integrations for Solta framework
 """
 from typing import Dict, Any, Optional, List, Union
 import json
-import aiohttp
 from abc import ABC, abstractmethod
 
 class AIProvider(ABC):
@@ -33,6 +32,21 @@ class AIProvider(ABC):
     ):
         """Stream a response from the AI model."""
         pass
+    
+    async def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Send a chat conversation, optionally offering tools to call.
+        
+        Providers that support chat return an OpenAI-compatible chat
+        completion whose message may contain `tool_calls`.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support chat")
 
 class OllamaProvider(AIProvider):
     """
@@ -51,6 +65,8 @@ class OllamaProvider(AIProvider):
         data: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Make a POST request to the Ollama API."""
+        import aiohttp
+        
         async with aiohttp.ClientSession() as session:
             async with session.post(
                 f"{self.base_url}/{endpoint}",
@@ -145,6 +161,8 @@ class OllamaProvider(AIProvider):
         if max_tokens:
             data["options"]["num_predict"] = max_tokens
         
+        import aiohttp
+        
         async with aiohttp.ClientSession() as session:
             async with session.post(
                 f"{self.base_url}/api/generate",
@@ -169,6 +187,107 @@ class OllamaProvider(AIProvider):
                         except json.JSONDecodeError:
                             continue
 
+    async def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str = "llama2",
+        tools: Optional[List[Dict[str, Any]]] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Chat with an Ollama model, offering it tools to call.
+        
+        Args:
+            messages: Conversation so far ({"role": ..., "content": ...})
+            model: Model name (e.g., "llama3.1")
+            tools: Tools in function-calling format (see BaseTool.to_function_schema)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            **kwargs: Additional model parameters
+            
+        Returns:
+            OpenAI-compatible chat completion format
+        """
+        options = dict(kwargs, temperature=temperature)
+        if max_tokens:
+            options["num_predict"] = max_tokens
+        
+        data = {
+            "model": model,
+            "messages": [_ollama_message(message) for message in messages],
+            "stream": False,
+            "options": options
+        }
+        if tools:
+            data["tools"] = tools
+        
+        response = await self._post("api/chat", data)
+        message = response.get("message", {})
+        
+        tool_calls = [
+            {
+                "id": call.get("id") or f"call_{index}",
+                "type": "function",
+                "function": {
+                    "name": call.get("function", {}).get("name", ""),
+                    "arguments": call.get("function", {}).get("arguments", {})
+                }
+            }
+            for index, call in enumerate(message.get("tool_calls") or [])
+        ]
+        
+        reply = {"role": "assistant", "content": message.get("content", "")}
+        if tool_calls:
+            reply["tool_calls"] = tool_calls
+        
+        return {
+            "id": "ollama",
+            "object": "chat.completion",
+            "created": None,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": reply,
+                "finish_reason": "tool_calls" if tool_calls else "stop"
+            }],
+            "usage": {
+                "prompt_tokens": response.get("prompt_eval_count", 0),
+                "completion_tokens": response.get("eval_count", 0),
+                "total_tokens": (
+                    response.get("prompt_eval_count", 0) +
+                    response.get("eval_count", 0)
+                )
+            }
+        }
+
+def _ollama_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an OpenAI-style chat message to Ollama's format."""
+    converted = {"role": message["role"], "content": message.get("content") or ""}
+    if message.get("tool_calls"):
+        # Ollama expects arguments as an object, not a JSON string
+        converted["tool_calls"] = [
+            {"function": {
+                "name": call["function"]["name"],
+                "arguments": _ollama_arguments(call["function"].get("arguments"))
+            }}
+            for call in message["tool_calls"]
+        ]
+    if message["role"] == "tool" and "name" in message:
+        converted["tool_name"] = message["name"]
+    return converted
+
+def _ollama_arguments(arguments: Any) -> Dict[str, Any]:
+    """Tool call arguments as the object Ollama expects."""
+    if isinstance(arguments, str):
+        try:
+            arguments = json.loads(arguments)
+        except json.JSONDecodeError:
+            # Ollama cannot represent arguments that are not an object
+            return {}
+    return arguments if isinstance(arguments, dict) else {}
+
 class AIProviderFactory:
     """
     Factory for creating AI provider instances.
@@ -197,5 +316,17 @@ class AIProviderFactory:
         else:
             raise ValueError(f"Unknown AI provider: {provider}")
 
-# Default provider instance
-default_provider = AIProviderFactory.create("ollama")
+_default_provider: Optional[AIProvider] = None
+
+def get_default_provider() -> AIProvider:
+    """Return the shared default provider, creating it on first use."""
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = AIProviderFactory.create("ollama")
+    return _default_provider
+
+def __getattr__(name: str) -> Any:
+    # `default_provider` is created on first access rather than at import time
+    if name == "default_provider":
+        return get_default_provider()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
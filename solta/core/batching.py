@@ -0,0 +1,229 @@
+"""
+Bulk message processing helpers for Solta framework
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+Messages = Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
+
+
+class MessageOutcome:
+    """Result of processing one message in a batch or stream."""
+
+    __slots__ = ("index", "message", "response", "error", "latency")
+
+    def __init__(
+        self,
+        index: int,
+        message: Dict[str, Any],
+        response: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None,
+        latency: float = 0.0
+    ):
+        self.index = index
+        self.message = message
+        self.response = response
+        self.error = error
+        self.latency = latency
+
+    @property
+    def ok(self) -> bool:
+        """Whether the message was processed without error."""
+        return self.error is None
+
+    def __repr__(self) -> str:
+        status = "ok" if self.ok else f"error={self.error!r}"
+        return f"MessageOutcome(index={self.index}, {status}, latency={self.latency:.6f})"
+
+
+class ThroughputStats:
+    """
+    Throughput and latency statistics for bulk processing.
+
+    Latencies are kept so percentiles can be reported; a stream of millions
+    of messages keeps one float per message.
+    """
+
+    def __init__(self):
+        self.processed = 0
+        self.errors = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._latencies: List[float] = []
+
+    def start(self) -> None:
+        """Mark the start of processing."""
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+
+    def finish(self) -> None:
+        """Mark the end of processing."""
+        self.finished_at = time.perf_counter()
+
+    def record(self, outcome: MessageOutcome) -> None:
+        """Record a finished message."""
+        self.processed += 1
+        if outcome.error is not None:
+            self.errors += 1
+        self._latencies.append(outcome.latency)
+
+    @property
+    def elapsed(self) -> float:
+        """Wall time spent processing, in seconds."""
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """Messages processed per second."""
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Latency percentile in seconds (nearest-rank)."""
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        rank = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+        return ordered[rank]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarise the statistics."""
+        latencies = self._latencies
+        return {
+            "processed": self.processed,
+            "errors": self.errors,
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+            "latency": {
+                "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+                "p50": self.percentile(50),
+                "p95": self.percentile(95),
+                "p99": self.percentile(99),
+                "max": max(latencies) if latencies else 0.0,
+            }
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"ThroughputStats(processed={self.processed}, errors={self.errors}, "
+            f"throughput={self.throughput:.1f}/s)"
+        )
+
+
+class BatchResult:
+    """Outcomes and statistics of Client.process_many."""
+
+    def __init__(self, outcomes: List[MessageOutcome], stats: ThroughputStats):
+        self.outcomes = outcomes
+        self.stats = stats
+
+    @property
+    def responses(self) -> List[Optional[Dict[str, Any]]]:
+        """Responses in outcome order (None for failed messages)."""
+        return [outcome.response for outcome in self.outcomes]
+
+    @property
+    def errors(self) -> List[MessageOutcome]:
+        """Outcomes of messages that failed."""
+        return [outcome for outcome in self.outcomes if outcome.error is not None]
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    def __iter__(self):
+        return iter(self.outcomes)
+
+
+async def _iterate(messages: Messages) -> AsyncIterator[Dict[str, Any]]:
+    """Iterate sync and async message sources uniformly."""
+    if hasattr(messages, "__aiter__"):
+        async for message in messages:
+            yield message
+    else:
+        for message in messages:
+            yield message
+
+
+async def process_concurrently(
+    handler: Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]],
+    messages: Messages,
+    concurrency: int = 16,
+    ordered: bool = False,
+    stats: Optional[ThroughputStats] = None
+) -> AsyncIterator[MessageOutcome]:
+    """
+    Run handler over messages with bounded concurrency.
+
+    At most `concurrency` messages are in flight (or, when ordered, waiting
+    for an earlier message to finish) at any time, so memory stays bounded
+    for arbitrarily long sources. Errors are captured per message.
+
+    Args:
+        handler: Coroutine function processing one message
+        messages: Sync or async iterable of messages
+        concurrency: Maximum number of messages processed at once
+        ordered: Yield outcomes in input order instead of completion order
+        stats: Optional statistics object updated as messages finish
+
+    Yields:
+        MessageOutcome for every message
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    async def run_one(index: int, message: Dict[str, Any]) -> MessageOutcome:
+        started = time.perf_counter()
+        try:
+            response = await handler(message)
+            return MessageOutcome(index, message, response=response,
+                                  latency=time.perf_counter() - started)
+        except Exception as e:
+            return MessageOutcome(index, message, error=e,
+                                  latency=time.perf_counter() - started)
+
+    if stats is not None:
+        stats.start()
+
+    source = _iterate(messages).__aiter__()
+    pending = set()
+    buffered: Dict[int, MessageOutcome] = {}
+    next_index = 0
+    next_to_yield = 0
+    exhausted = False
+
+    try:
+        while True:
+            while not exhausted and len(pending) + len(buffered) < concurrency:
+                try:
+                    message = await source.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(run_one(next_index, message)))
+                next_index += 1
+
+            if not pending:
+                break
+
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                outcome = task.result()
+                if stats is not None:
+                    stats.record(outcome)
+                if ordered:
+                    buffered[outcome.index] = outcome
+                else:
+                    yield outcome
+
+            while next_to_yield in buffered:
+                yield buffered.pop(next_to_yield)
+                next_to_yield += 1
+    finally:
+        for task in pending:
+            task.cancel()
+        if stats is not None:
+            stats.finish()
@@ -0,0 +1,314 @@
+"""
+Result caching for Solta framework
+"""
+import asyncio
+import hashlib
+import inspect
+import pickle
+import struct
+import sys
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_MISSING = object()
+
+
+def make_key(args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> bytes:
+    """
+    Build a stable cache key from call arguments.
+
+    Arguments are canonicalised before hashing: dict and set ordering does
+    not matter, lists and tuples are compared by content, and 1, 1.0 and
+    True stay distinct. Values of unknown types are keyed by their pickled
+    form. The key is identical across processes and runs.
+
+    Raises:
+        TypeError: If an argument cannot be canonicalised
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    _encode(args, digest.update)
+    _encode(kwargs, digest.update)
+    return digest.digest()
+
+
+def _encode(value: Any, write: Callable[[bytes], Any], depth: int = 0) -> None:
+    if depth > 64:
+        raise TypeError("Arguments are nested too deeply to cache")
+
+    if value is None or value is True or value is False:
+        write(b"N" if value is None else (b"T" if value else b"F"))
+    elif type(value) is int:
+        text = str(value).encode()
+        write(b"i" + struct.pack(">I", len(text)) + text)
+    elif type(value) is float:
+        write(b"f" + struct.pack(">d", value))
+    elif type(value) is str:
+        data = value.encode("utf-8", "surrogatepass")
+        write(b"s" + struct.pack(">I", len(data)) + data)
+    elif type(value) is bytes:
+        write(b"b" + struct.pack(">I", len(value)) + value)
+    elif isinstance(value, (list, tuple)):
+        write((b"l" if isinstance(value, list) else b"t") + struct.pack(">I", len(value)))
+        for item in value:
+            _encode(item, write, depth + 1)
+    elif isinstance(value, dict):
+        items = sorted(
+            ((_encoded(key, depth + 1), item) for key, item in value.items()),
+            key=lambda pair: pair[0]
+        )
+        write(b"d" + struct.pack(">I", len(items)))
+        for key, item in items:
+            write(key)
+            _encode(item, write, depth + 1)
+    elif isinstance(value, (set, frozenset)):
+        members = sorted(_encoded(item, depth + 1) for item in value)
+        write(b"S" + struct.pack(">I", len(members)))
+        for member in members:
+            write(member)
+    else:
+        try:
+            data = pickle.dumps(value, protocol=4)
+        except Exception as e:
+            raise TypeError(f"Cannot build a cache key from {type(value).__name__}: {e}")
+        name = f"{type(value).__module__}.{type(value).__qualname__}".encode()
+        write(b"o" + struct.pack(">II", len(name), len(data)) + name + data)
+
+
+def _encoded(value: Any, depth: int) -> bytes:
+    parts: List[bytes] = []
+    _encode(value, parts.append, depth)
+    return b"".join(parts)
+
+
+def estimate_size(value: Any, depth: int = 0) -> int:
+    """Approximate memory footprint of a cached value in bytes."""
+    size = sys.getsizeof(value)
+    if depth > 16:
+        return size
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += estimate_size(key, depth + 1) + estimate_size(item, depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += estimate_size(item, depth + 1)
+    return size
+
+
+class ResultCache:
+    """
+    Bounded result cache for one method of one instance.
+
+    This class:
+    1. Keeps results in least-recently-used order, bounded by entry count
+       and optionally by an estimated byte budget
+    2. Expires entries after a time-to-live
+    3. Coalesces concurrent calls with the same key into one call
+    4. Counts hits, misses, coalesced calls, evictions and expirations
+    """
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = 1024,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        # key -> (result, expires_at, size)
+        self._entries: "OrderedDict[bytes, Tuple[Any, Optional[float], int]]" = OrderedDict()
+        self._pending: Dict[bytes, asyncio.Future] = {}
+        self.bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.uncacheable = 0
+
+    def get(self, key: bytes) -> Any:
+        """Return a cached result, or _MISSING."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        result, expires_at, _ = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: bytes, result: Any) -> None:
+        """Store a result, evicting the least recently used entries if needed."""
+        size = estimate_size(result) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (result, expires_at, size)
+        self.bytes += size
+
+        while self._entries and (
+            (self.maxsize is not None and len(self._entries) > self.maxsize)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: bytes) -> None:
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    async def call(self, key: bytes, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached result for key, computing it at most once.
+
+        Concurrent callers with the same key wait for the first caller's
+        result. Exceptions are passed to every waiting caller but never
+        cached. If the first caller is cancelled, the waiters are not: one
+        of them computes the result again.
+        """
+        while True:
+            result = self.get(key)
+            if result is not _MISSING:
+                self.hits += 1
+                return result
+
+            pending = self._pending.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Re-raise only if this caller was cancelled, not the first one
+                if not pending.cancelled():
+                    raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            result = await compute()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Waiters (if any) receive the exception; nobody else must retrieve it
+                future.exception()
+            raise
+        else:
+            self.put(key, result)
+            future.set_result(result)
+            return result
+        finally:
+            del self._pending[key]
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "uncacheable": self.uncacheable,
+            "size": len(self._entries),
+            "bytes": self.bytes,
+        }
+
+
+class CachedMethod:
+    """
+    Per-instance caches of one decorated method.
+
+    Instances are held weakly, so a tool or agent and its cache disappear
+    together (including instances replaced by hot reload).
+    """
+
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        maxsize: Optional[int],
+        ttl: Optional[float],
+        max_bytes: Optional[int],
+        key: Optional[Callable[..., Any]]
+    ):
+        if not inspect.iscoroutinefunction(func):
+            raise TypeError(f"@cached_tool requires an async method, got {func.__qualname__}")
+        self.func = func
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.key = key
+        self._signature = inspect.signature(func)
+        self._caches: "weakref.WeakKeyDictionary[Any, ResultCache]" = weakref.WeakKeyDictionary()
+
+    def cache_for(self, instance: Any) -> ResultCache:
+        """Cache of an instance, created on first use."""
+        cache = self._caches.get(instance)
+        if cache is None:
+            cache = ResultCache(self.maxsize, self.ttl, self.max_bytes)
+            self._caches[instance] = cache
+        return cache
+
+    async def __call__(self, instance: Any, *args: Any, **kwargs: Any) -> Any:
+        cache = None
+        try:
+            # Instances that cannot be hashed or weakly referenced get no cache
+            cache = self.cache_for(instance)
+            if self.key is not None:
+                key = make_key((self.key(*args, **kwargs),), {})
+            else:
+                key = make_key((), self._arguments(instance, args, kwargs))
+        except TypeError:
+            if cache is not None:
+                cache.uncacheable += 1
+            return await self.func(instance, *args, **kwargs)
+        return await cache.call(key, lambda: self.func(instance, *args, **kwargs))
+
+    def _arguments(self, instance: Any, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Arguments by parameter name with defaults filled in, so f("a"),
+        f(query="a") and a call passing a default explicitly share a key.
+
+        Raises:
+            TypeError: If the arguments do not match the signature
+        """
+        bound = self._signature.bind(instance, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        # The instance picks the cache; it is not part of the key
+        arguments.pop(next(iter(arguments)))
+        return dict(arguments)
+
+
+def cache_stats(instance: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Cache statistics of every @cached_tool method of an instance.
+
+    Returns:
+        Statistics by method name (methods not called yet are omitted)
+    """
+    stats = {}
+    for name in dir(type(instance)):
+        member = getattr(type(instance), name, None)
+        cached = getattr(member, '_cached_method', None)
+        if cached is not None and instance in cached._caches:
+            stats[name] = cached._caches[instance].stats()
+    return stats
@@ -1,16 +1,28 @@
 """
 Client implementation for Solta framework
 """
-from typing import Dict, Optional, Type, List, Any, Union
+from typing import Dict, Optional, Type, List, Any, Union, AsyncIterator
 import asyncio
+import concurrent.futures
 import inspect
 from pathlib import Path
 import importlib.util
 
 from .agent import Agent
+from .tools import BaseTool
+from .dependencies import DependencyGraph
 from .default_router import DefaultRouter  # Fixed import
 from .loader import AgentLoader
 from .decorators import setup_agent
+from .startup import LazyAgent, initialize_agents
+from .ingress import IngressQueue
+from .executors import ToolExecutors
+from .batching import BatchResult, Messages, MessageOutcome, ThroughputStats, process_concurrently
+from .snapshot import Snapshotter
+
+# Snapshot segments: agents use their names, their tools "<agent>/<tool>"
+ROUTER_SEGMENT = "__router__"
+SHARED_TOOLS_SEGMENT = "__tools__"
 
 class Client:
     """
@@ -30,11 +42,32 @@ class Client:
             live_reload=True
         )
         
+        # Serving HTTP/WebSocket requests while running
+        client = Client(
+            agent_dirs=["my_agents"],
+            server={"host": "0.0.0.0", "port": 8080}
+        )
+        
         # Using custom router
         client = Client(
             router="path/to/custom_router.py",
             agent_dirs=["my_agents"]
         )
+        
+        # Remembering which files define agents, so later starts skip the others
+        client = Client(agent_dirs=["my_agents"], manifest_path=".solta/discovery.json")
+        
+        # Constructing rarely used agents on their first message
+        client = Client(agent_dirs=["my_agents"], lazy_agents=["ReportAgent"])
+        
+        # Sizing the pools that run thread/process mode tools
+        client = Client(agent_dirs=["my_agents"], tool_threads=16, tool_processes=4)
+        
+        # Reporting inline tools that block the event loop for over 100 ms
+        client = Client(agent_dirs=["my_agents"], loop_lag_threshold=0.1)
+        
+        # Keeping agent and tool state across restarts, snapshotted every 10 seconds
+        client = Client(agent_dirs=["my_agents"], snapshot_path="state.snap", snapshot_interval=10)
     """
     
     def __init__(
@@ -42,16 +75,44 @@ class Client:
         router: str = "default",
         agent_dirs: Optional[List[str]] = None,
         live_reload: bool = False,
+        lazy_agents: Union[bool, List[str]] = False,
+        ingress_queue_size: int = 1000,
+        ingress_workers: int = 8,
+        ingress_overflow: str = "block",
         **config
     ):
         self.config = config
         self.agent_dirs = agent_dirs or []
         self.live_reload = live_reload
+        self.lazy_agents = lazy_agents
         self.agents: Dict[str, Agent] = {}
+        self.tools: Dict[str, BaseTool] = {}
         self._ready = False
         self._router: Optional[Agent] = None
         self._loop = None
         self._loader = AgentLoader(self)
+        self._server = None
+        self._retiring: set = set()
+        self._ingress = IngressQueue(
+            self.process_message,
+            maxsize=ingress_queue_size,
+            workers=ingress_workers,
+            overflow=ingress_overflow
+        )
+        self.executors = ToolExecutors(
+            max_threads=config.get("tool_threads"),
+            max_processes=config.get("tool_processes"),
+            lag_threshold=config.get("loop_lag_threshold"),
+            auto_offload=config.get("auto_offload", False)
+        )
+        self._snapshots: Optional[Snapshotter] = None
+        if config.get("snapshot_path"):
+            self._snapshots = Snapshotter(
+                config["snapshot_path"],
+                interval=config.get("snapshot_interval", 30.0),
+                codec=config.get("snapshot_codec", "msgpack"),
+                fsync=config.get("snapshot_fsync", False)
+            )
         
         # Initialize router
         self._init_router(router)
@@ -109,26 +170,144 @@ class Client:
         self.agents[cls.__name__] = cls
         return cls
     
-    async def load_agents(self) -> None:
-        """Load all registered agents."""
-        # Initialize agents
-        initialized_agents = {}
-        for name, agent_cls in self.agents.items():
+    def register_tool(self, tool: BaseTool) -> None:
+        """
+        Register a tool instance shared by every agent that requires it.
+        
+        Agents listing the tool in `required_tools` (or using it through
+        @requires_tool) receive this instance unless they register their own.
+        """
+        self.tools[tool.name] = tool
+    
+    def _is_lazy(self, agent_cls: Type[Agent]) -> bool:
+        """Check whether an agent should be constructed on first use."""
+        if getattr(agent_cls, 'lazy', False):
+            return True
+        if isinstance(self.lazy_agents, bool):
+            return self.lazy_agents
+        return agent_cls.__name__ in self.lazy_agents
+    
+    async def _start_agents(self, agent_classes: Dict[str, Type[Agent]]) -> Dict[str, Agent]:
+        """
+        Instantiate, initialize and register a set of agent classes.
+        
+        The dependency graph is validated first: unknown agents, dependency
+        cycles and missing tools raise DependencyError before any agent is
+        initialized. Agents are then initialized concurrently in topological
+        order; an agent listing other agent class names in its `depends_on`
+        attribute starts after them. Lazy agents are registered as stand-ins
+        and built on their first message.
+        
+        Returns:
+            Successfully started agents by name
+        """
+        running = {name for name, agent in self.agents.items() if isinstance(agent, Agent)}
+        graph = DependencyGraph(agent_classes, shared_tools=self.tools, available=running)
+        graph.check()
+        
+        instances: Dict[str, Agent] = {}
+        for name, agent_cls in agent_classes.items():
+            if self._is_lazy(agent_cls):
+                instances[name] = LazyAgent(
+                    agent_cls,
+                    prepare=lambda agent, name=name: graph.bind_tools(name, agent)
+                )
+                continue
             try:
                 agent = agent_cls()
-                await agent.initialize()
-                initialized_agents[name] = agent
-                
-                # Register with router
-                self._router.register_route(name.lower(), agent)
-                
             except Exception as e:
                 print(f"Failed to initialize agent {name}: {e}")
+                continue
+            graph.bind_tools(name, agent)
+            instances[name] = agent
+        
+        for name, agent in instances.items():
+            self._restore_snapshot(name, agent)
         
-        self.agents = initialized_agents
+        for name, agent in instances.items():
+            if isinstance(agent, LazyAgent):
+                resolved = (instances.get(dep) or self.agents.get(dep) for dep in graph.agent_dependencies[name])
+                agent.dependencies = [dep for dep in resolved if isinstance(dep, Agent)]
+        
+        failures = await initialize_agents(instances, graph.agent_dependencies, available=running)
+        
+        started: Dict[str, Agent] = {}
+        for name, agent in instances.items():
+            if name in failures:
+                print(f"Failed to initialize agent {name}: {failures[name]}")
+                continue
+            started[name] = agent
+            
+            # Register with router
+            self._router.register_route(name.lower(), agent)
+        
+        return started
+    
+    def _restore_snapshot(self, name: str, agent: Agent) -> None:
+        """Restore an agent and its tools from the snapshot read at startup."""
+        if self._snapshots is None:
+            return
+        state = self._snapshots.take(name)
+        tool_states = self._snapshots.take_prefix(f"{name}/")
+        try:
+            if state is not None:
+                agent.restore(state)
+            for tool_name, tool_state in tool_states.items():
+                agent.restore_tool(tool_name, tool_state)
+        except Exception as e:
+            print(f"Failed to restore agent {name} from snapshot: {e}")
+    
+    def _restore_shared_tools(self) -> None:
+        """Restore the shared tools from the snapshot read at startup."""
+        for name, state in self._snapshots.take_prefix(f"{SHARED_TOOLS_SEGMENT}/").items():
+            tool = self.tools.get(name)
+            if tool is None:
+                continue
+            try:
+                tool.restore(state)
+            except Exception as e:
+                print(f"Failed to restore tool {name} from snapshot: {e}")
+    
+    def _snapshot_sources(self) -> Dict[str, Any]:
+        """Running agents, their tools, the router and shared tools by segment name."""
+        sources: Dict[str, Any] = {
+            f"{SHARED_TOOLS_SEGMENT}/{name}": tool for name, tool in self.tools.items()
+        }
+        agents: Dict[str, Agent] = {name: agent for name, agent in self.agents.items() if isinstance(agent, Agent)}
+        if self._router is not None:
+            agents[ROUTER_SEGMENT] = self._router
+        for name, agent in agents.items():
+            sources[name] = agent
+            for tool_name, tool in agent.snapshot_tools().items():
+                sources[f"{name}/{tool_name}"] = tool
+        return sources
+    
+    async def snapshot(self) -> bool:
+        """
+        Snapshot agent state now (requires snapshot_path).
+        
+        Returns:
+            Whether a new snapshot was written (False when nothing changed)
+        """
+        if self._snapshots is None:
+            raise RuntimeError("Snapshots are not enabled (set snapshot_path)")
+        return await self._snapshots.save(self._snapshot_sources())
+    
+    async def load_agents(self) -> None:
+        """Load all registered agents."""
+        agent_classes = {
+            name: agent_cls for name, agent_cls in self.agents.items()
+            if inspect.isclass(agent_cls)
+        }
+        self.agents = {
+            name: agent for name, agent in self.agents.items()
+            if not inspect.isclass(agent)
+        }
+        self.agents.update(await self._start_agents(agent_classes))
     
     async def discover_and_load_agents(self) -> None:
         """Discover and load agents from configured directories."""
+        agent_classes: Dict[str, Type[Agent]] = {}
         for directory in self.agent_dirs:
             try:
                 # Discover agent files
@@ -136,62 +315,125 @@ class Client:
                 
                 # Load each discovered agent
                 for file_path in agent_files:
-                    agent_classes = self._loader.load_agent_file(file_path)
-                    
-                    # Initialize and register each agent
-                    for agent_cls in agent_classes:
-                        try:
-                            # Check dependencies
-                            required_tools = self._loader.resolve_dependencies(agent_cls)
-                            
-                            # Initialize agent
-                            agent = agent_cls()
-                            await agent.initialize()
-                            
-                            # Register with client and router
-                            self.agents[agent_cls.__name__] = agent
-                            self._router.register_route(agent_cls.__name__.lower(), agent)
-                            
-                        except Exception as e:
-                            print(f"Failed to initialize agent {agent_cls.__name__}: {e}")
+                    for agent_cls in self._loader.load_agent_file(file_path):
+                        agent_classes[agent_cls.__name__] = agent_cls
                 
             except Exception as e:
                 print(f"Error loading agents from directory {directory}: {e}")
+        
+        # Remember discovery results for the next start
+        self._loader.save_manifest()
+        
+        # Validate dependencies, then initialize and register all discovered agents together
+        self.agents.update(await self._start_agents(agent_classes))
     
     async def reload_agent(self, agent_cls: Type[Agent]) -> None:
         """
         Reload an agent with an updated class.
         
+        The swap has no downtime: the new instance is built and initialized
+        (with state exported by the old one) while the old one keeps serving,
+        then the router switches to it atomically and the old instance is
+        cleaned up in the background once its in-flight messages finish.
+        
         Args:
             agent_cls: Updated agent class
         """
         if not self.live_reload:
             return
-            
+        
+        name = agent_cls.__name__
         try:
-            # Clean up old agent if it exists
-            old_agent = self.agents.get(agent_cls.__name__)
-            if old_agent:
-                await old_agent.cleanup()
+            old_agent = self.agents.get(name)
+            if not isinstance(old_agent, Agent):
+                old_agent = None
+            
+            # Build the new agent while the old one keeps serving
+            graph = DependencyGraph({name: agent_cls}, shared_tools=self.tools)
+            if self._is_lazy(agent_cls):
+                new_agent = LazyAgent(agent_cls, prepare=lambda agent: graph.bind_tools(name, agent))
+            else:
+                new_agent = agent_cls()
+                graph.bind_tools(name, new_agent)
+            
+            state = None
+            if old_agent is not None:
+                state = old_agent.export_state()
+                if state is not None:
+                    new_agent.import_state(state)
             
-            # Initialize new agent
-            new_agent = agent_cls()
             await new_agent.initialize()
             
-            # Update client and router
-            self.agents[agent_cls.__name__] = new_agent
-            self._router.register_route(agent_cls.__name__.lower(), new_agent)
+            # Switch client and router over in one step
+            self.agents[name] = new_agent
+            if old_agent is not None and hasattr(self._router, 'replace_agent'):
+                self._router.replace_agent(old_agent, new_agent)
+            else:
+                self._router.register_route(name.lower(), new_agent)
+            # Only now does the new agent own what the old one exported
+            if state is not None:
+                old_agent.release_state()
+            
+            # Let the old agent finish its in-flight messages, then clean it up
+            if old_agent is not None:
+                task = asyncio.ensure_future(self._retire_agent(old_agent))
+                self._retiring.add(task)
+                task.add_done_callback(self._retiring.discard)
             
-            print(f"Reloaded agent: {agent_cls.__name__}")
+            print(f"Reloaded agent: {name}")
             
         except Exception as e:
-            print(f"Failed to reload agent {agent_cls.__name__}: {e}")
+            print(f"Failed to reload agent {name}: {e}")
+    
+    async def remove_agent(self, name: str) -> None:
+        """
+        Stop routing to an agent and retire it.
+        
+        Args:
+            name: Agent class name
+        """
+        agent = self.agents.pop(name, None)
+        if not isinstance(agent, Agent):
+            return
+        if hasattr(self._router, 'unregister_agent'):
+            self._router.unregister_agent(agent)
+        
+        task = asyncio.ensure_future(self._retire_agent(agent))
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+        print(f"Removed agent: {name}")
+    
+    async def _retire_agent(self, agent: Agent) -> None:
+        """Drain a replaced agent and clean it up."""
+        timeout = self.config.get("drain_timeout", 30.0)
+        if not await agent.drain(timeout):
+            print(f"Agent {agent.name} still had {agent.in_flight} messages in flight after {timeout}s")
+        try:
+            await agent.cleanup()
+        except Exception as e:
+            print(f"Error cleaning up replaced agent {agent.name}: {e}")
+        
+        # Watch the retired instance so leaks across reloads can be detected
+        self._loader.track_retired(agent)
     
     async def start(self) -> None:
         """Initialize and start the client."""
         if self._ready:
             return
         
+        # Read and decode the last snapshot while the executors start
+        restoring = None
+        if self._snapshots is not None:
+            restoring = asyncio.ensure_future(self._snapshots.load())
+        
+        # Start the executors before any agent or tool runs
+        await self.executors.start()
+        
+        if restoring is not None:
+            await restoring
+            self._restore_shared_tools()
+            self._restore_snapshot(ROUTER_SEGMENT, self._router)
+        
         # Initialize router
         await self._router.initialize()
         
@@ -206,8 +448,42 @@ class Client:
             if self.live_reload:
                 self._loader.start_watching(self.agent_dirs)
         
+        # Start the worker pool serving send_message
+        await self._ingress.start()
+        
+        # Snapshot agent state periodically in the background
+        if self._snapshots is not None:
+            self._snapshots.start(self._snapshot_sources)
+        
         self._ready = True
         print(f"Client ready with {len(self.agents)} agents")
+        
+        # Start the built-in ingress server if configured
+        server_options = self.config.get("server")
+        if server_options:
+            await self.start_server(**(server_options if isinstance(server_options, dict) else {}))
+    
+    async def start_server(self, host: str = "127.0.0.1", port: int = 8080, **options) -> Any:
+        """
+        Start the built-in HTTP/WebSocket ingress server.
+        
+        Args:
+            host: Interface to bind
+            port: Port to listen on
+            **options: Additional IngressServer options (connection limits,
+                       keepalive_timeout, drain_timeout, ...)
+            
+        Returns:
+            The running IngressServer
+        """
+        if self._server is not None:
+            raise RuntimeError("Ingress server already running")
+        
+        from .server import IngressServer
+        
+        self._server = IngressServer(self, host=host, port=port, **options)
+        await self._server.start()
+        return self._server
     
     def run(self) -> None:
         """Run the client (blocking)."""
@@ -222,9 +498,25 @@ class Client:
     
     async def _cleanup_async(self) -> None:
         """Async cleanup implementation."""
+        # Stop accepting network requests and finish in-flight ones
+        if self._server is not None:
+            await self._server.stop()
+            self._server = None
+        
+        # Finish messages already accepted by send_message
+        await self._ingress.stop()
+        
+        # Take a final snapshot while the agents still hold their state
+        if self._snapshots is not None:
+            await self._snapshots.stop(self._snapshot_sources() if self._ready else None)
+        
         # Stop file watching if enabled
         self._loader.stop_watching()
         
+        # Finish retiring agents replaced by hot reloads
+        if self._retiring:
+            await asyncio.gather(*self._retiring, return_exceptions=True)
+        
         # Clean up router
         if self._router is not None:
             await self._router.cleanup()
@@ -237,6 +529,14 @@ class Client:
         # Clear agent references
         self.agents.clear()
         
+        # Clean up shared tools
+        for tool in list(self.tools.values()):
+            await tool.cleanup()
+        self.tools.clear()
+        
+        # Shut the tool thread and process pools down
+        await self.executors.shutdown()
+        
         self._ready = False
     
     def cleanup(self) -> None:
@@ -271,12 +571,115 @@ class Client:
         
         return await self._router.route_message(message)
     
-    def send_message(self, message: Dict[str, Any]) -> None:
-        """Send a message to be processed (non-blocking)."""
-        if self._loop is None:
+    def send_message(
+        self,
+        message: Dict[str, Any],
+        overflow: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> concurrent.futures.Future:
+        """
+        Send a message to be processed from any thread.
+        
+        The message goes through a bounded ingress queue served by a fixed
+        pool of workers on the client's loop.
+        
+        Args:
+            message: Message to process
+            overflow: "block", "timeout" or "reject" when the queue is full
+                      (defaults to the client's ingress_overflow)
+            timeout: Seconds to wait for room with the "timeout" policy
+            
+        Returns:
+            Future resolving to the router's response
+            
+        Raises:
+            IngressFullError: If the queue stayed full
+        """
+        if not self._ingress.running:
             raise RuntimeError("Client not running")
+        
+        return self._ingress.submit(message, overflow=overflow, timeout=timeout)
+    
+    @property
+    def ingress_stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight and drop metrics of send_message."""
+        return self._ingress.stats()
+    
+    @property
+    def executor_stats(self) -> Dict[str, Any]:
+        """Offloaded tool submissions and event loop lag metrics."""
+        return self.executors.stats()
+    
+    @property
+    def snapshot_stats(self) -> Optional[Dict[str, Any]]:
+        """Snapshot counts, sizes and timings (None when snapshots are off)."""
+        return self._snapshots.stats() if self._snapshots is not None else None
+
+    
+    async def process_many(
+        self,
+        messages: Messages,
+        concurrency: int = 16,
+        ordered: bool = True
+    ) -> BatchResult:
+        """
+        Process many messages through the router with bounded concurrency.
+        
+        Errors are captured per message instead of aborting the batch.
+        
+        Args:
+            messages: Iterable (or async iterable) of messages
+            concurrency: Maximum number of messages processed at once
+            ordered: Return outcomes in input order instead of completion order
             
-        asyncio.run_coroutine_threadsafe(
-            self.process_message(message),
-            self._loop
-        )
+        Returns:
+            BatchResult with one MessageOutcome per message and throughput stats
+            
+        Example:
+            result = await client.process_many(dataset, concurrency=64)
+            print(result.stats.to_dict())
+        """
+        stats = ThroughputStats()
+        outcomes = [
+            outcome async for outcome in self.process_stream(
+                messages,
+                concurrency=concurrency,
+                ordered=ordered,
+                stats=stats
+            )
+        ]
+        return BatchResult(outcomes, stats)
+    
+    async def process_stream(
+        self,
+        messages: Messages,
+        concurrency: int = 16,
+        ordered: bool = False,
+        stats: Optional[ThroughputStats] = None
+    ) -> AsyncIterator[MessageOutcome]:
+        """
+        Process a (possibly unbounded) stream of messages through the router.
+        
+        Outcomes are yielded as soon as they are available; at most
+        `concurrency` messages are held in memory at any time.
+        
+        Args:
+            messages: Async iterable (or iterable) of messages
+            concurrency: Maximum number of messages processed at once
+            ordered: Yield outcomes in input order instead of completion order
+            stats: Optional ThroughputStats updated while the stream runs
+            
+        Yields:
+            MessageOutcome for every message
+        """
+        if not self._ready:
+            raise RuntimeError("Client not ready. Call run() first.")
+        
+        async for outcome in process_concurrently(
+            self.process_message,
+            messages,
+            concurrency=concurrency,
+            ordered=ordered,
+            stats=stats
+        ):
+            yield outcome
@@ -0,0 +1,115 @@
+"""
+Call-scoped context layers for Solta framework
+"""
+from contextvars import ContextVar, Token
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+class _Layer:
+    """
+    One immutable layer of context values on top of its parent.
+
+    A layer pushed for an agent (owner) only applies to that agent; layers
+    without an owner apply to every agent. Pushing a layer only links it
+    to the current one; the merged view is built the first time it is read
+    and reused for the next read by the same owner.
+    """
+
+    __slots__ = ("values", "owner", "parent", "_merged", "_merged_for")
+
+    def __init__(self, values: Mapping[str, Any], owner: Any, parent: Optional['_Layer']):
+        self.values = values
+        self.owner = owner
+        self.parent = parent
+        self._merged: Optional[Mapping[str, Any]] = None
+        self._merged_for: Any = None
+
+    def merged(self, owner: Any) -> Mapping[str, Any]:
+        if self._merged is None or self._merged_for is not owner:
+            inherited = _EMPTY if self.parent is None else self.parent.merged(owner)
+            if self.owner is not None and self.owner is not owner:
+                merged = inherited
+            elif not inherited:
+                merged = self.values
+            else:
+                merged = MappingProxyType({**inherited, **self.values})
+            self._merged = merged
+            self._merged_for = owner
+        return self._merged
+
+
+_current: ContextVar[Optional[_Layer]] = ContextVar("solta_context", default=None)
+
+
+def freeze_context(values: Dict[str, Any]) -> Mapping[str, Any]:
+    """Read-only copy of context values, suitable for push_context."""
+    return MappingProxyType(dict(values))
+
+
+def push_context(values: Mapping[str, Any], owner: Any = None) -> Token:
+    """
+    Activate a context layer for the current task.
+
+    Args:
+        values: Context values; they are not copied, so pass a mapping that
+                is not modified afterwards (see freeze_context)
+        owner: Agent the layer applies to (None for every agent)
+
+    Returns:
+        Token to pass to pop_context
+    """
+    return _current.set(_Layer(values, owner, _current.get()))
+
+
+def pop_context(token: Token) -> None:
+    """Deactivate the layer pushed with token."""
+    _current.reset(token)
+
+
+def current_context(owner: Any = None) -> Mapping[str, Any]:
+    """
+    Read-only view of the active context.
+
+    Context is task-local: tasks started while a layer is active inherit
+    it, and concurrent tasks never see each other's layers.
+
+    Args:
+        owner: Agent whose view to return; layers pushed for other agents
+               are left out (None leaves out every agent's layers)
+    """
+    layer = _current.get()
+    return _EMPTY if layer is None else layer.merged(owner)
+
+
+class use_context:
+    """
+    Context manager activating a context layer.
+
+    Pass an agent first to limit the layer to that agent; otherwise it
+    applies to every agent called inside the block.
+
+    Example:
+        with use_context(temperature=0.2):
+            response = await agent.generate(prompt)
+
+        with use_context(agent, temperature=0.2):
+            response = await agent.generate(prompt)
+    """
+
+    __slots__ = ("values", "owner", "_token")
+
+    def __init__(self, owner: Any = None, /, **values: Any):
+        self.values = freeze_context(values)
+        self.owner = owner
+        self._token: Optional[Token] = None
+
+    def __enter__(self) -> Mapping[str, Any]:
+        self._token = push_context(self.values, self.owner)
+        return current_context(self.owner)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pop_context(self._token)
+        self._token = None
@@ -2,7 +2,10 @@
 Decorators for Solta framework
 """
 from functools import wraps
-from typing import Callable, Any, TypeVar, ParamSpec
+from typing import Callable, Any, Optional, TypeVar, ParamSpec
+
+from .cache import CachedMethod
+from .context import freeze_context, pop_context, push_context
 
 P = ParamSpec('P')
 T = TypeVar('T')
@@ -16,6 +19,9 @@ def setup_agent(func: Callable[P, T]) -> Callable[P, T]:
     2. Define command handlers
     3. Set up event listeners
     
+    The method itself is returned unchanged, so calling it adds no wrapper
+    layer.
+    
     Example:
         @setup_agent
         async def on_ready(self):
@@ -25,38 +31,29 @@ def setup_agent(func: Callable[P, T]) -> Callable[P, T]:
         async def handle_query(self, query: str):
             return await self.process_query(query)
     """
-    @wraps(func)
-    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
-        try:
-            return await func(*args, **kwargs)
-        except Exception as e:
-            # In the future, we'll add proper error handling and logging here
-            raise e
-    
     # Add metadata to the function for the agent to use
-    setattr(wrapper, '_is_agent_method', True)
-    setattr(wrapper, '_original_func', func)
+    setattr(func, '_is_agent_method', True)
+    setattr(func, '_original_func', func)
     
-    return wrapper
+    return func
 
 def requires_tool(tool_name: str) -> Callable[[Callable[P, T]], Callable[P, T]]:
     """
     Decorator to specify that a method requires a specific tool.
     
+    The requirement is checked once, when the agent is initialized (and by
+    the Client's dependency graph before that), instead of on every call.
+    
     Example:
         @requires_tool('search')
         async def search_query(self, query: str):
             return await self.tools['search'].execute(query=query)
     """
     def decorator(func: Callable[P, T]) -> Callable[P, T]:
-        @wraps(func)
-        async def wrapper(self: Any, *args: P.args, **kwargs: P.kwargs) -> T:
-            if tool_name not in self.tools:
-                raise RuntimeError(f"Required tool '{tool_name}' not found")
-            return await func(self, *args, **kwargs)
-        
-        setattr(wrapper, '_required_tool', tool_name)
-        return wrapper
+        tools = set(getattr(func, '_required_tools', ()))
+        tools.add(tool_name)
+        setattr(func, '_required_tools', frozenset(tools))
+        return func
     
     return decorator
 
@@ -64,23 +61,72 @@ def with_context(**context: Any) -> Callable[[Callable[P, T]], Callable[P, T]]:
     """
     Decorator to add context to a method.
     
+    The context is layered over the caller's for the duration of the call
+    and applies only to the decorated method's agent: other agents called
+    from it keep their own context. It is local to the running task, so
+    concurrent messages to the same agent never see each other's context.
+    Agent.generate picks it up automatically.
+    
     Example:
         @with_context(temperature=0.7, max_tokens=100)
         async def generate_response(self, prompt: str):
             return await self.generate(prompt)
     """
+    # Frozen once; every call only links this layer to the active one
+    layer = freeze_context(context)
+    
     def decorator(func: Callable[P, T]) -> Callable[P, T]:
         @wraps(func)
         async def wrapper(self: Any, *args: P.args, **kwargs: P.kwargs) -> T:
-            # Merge context with any existing context
-            original_context = getattr(self, 'context', {}).copy()
-            self.context = {**original_context, **context}
+            token = push_context(layer, self)
             try:
                 return await func(self, *args, **kwargs)
             finally:
-                # Restore original context
-                self.context = original_context
+                pop_context(token)
+        
+        return wrapper
+    
+    return decorator
+
+def cached_tool(
+    func: Optional[Callable[P, T]] = None,
+    *,
+    maxsize: Optional[int] = 1024,
+    ttl: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+    key: Optional[Callable[..., Any]] = None
+) -> Any:
+    """
+    Decorator to memoize a tool's execute (or any async agent/tool method).
+    
+    Results are cached per instance under a stable key built from the call's
+    arguments bound to the method's parameters (defaults included), so
+    search("a"), search(query="a") and search("a", limit=5) with a default
+    limit of 5 share an entry. Concurrent identical calls run once; exceptions are
+    never cached. Cached results are shared between callers, so treat them
+    as read-only. Statistics are available via tool.cache_stats().
+    
+    Args:
+        maxsize: Maximum number of cached results (None for unbounded)
+        ttl: Seconds a result stays valid
+        max_bytes: Approximate memory budget for cached results
+        key: Build the cache key from the call's arguments yourself
+    
+    Example:
+        @cached_tool(maxsize=256, ttl=300)
+        async def execute(self, **kwargs):
+            return await self.search(kwargs["query"])
+    """
+    def decorator(func: Callable[P, T]) -> Callable[P, T]:
+        cached = CachedMethod(func, maxsize=maxsize, ttl=ttl, max_bytes=max_bytes, key=key)
+        
+        @wraps(func)
+        async def wrapper(self: Any, *args: P.args, **kwargs: P.kwargs) -> T:
+            return await cached(self, *args, **kwargs)
         
+        setattr(wrapper, '_cached_method', cached)
         return wrapper
     
+    if func is not None:
+        return decorator(func)
     return decorator
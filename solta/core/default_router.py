@@ -4,6 +4,7 @@ Default router implementation for Solta framework
 from typing import Dict, Any, Optional, List
 from .agent import Agent
 from .decorators import setup_agent
+from .routing import RouteRule, RuleEngine, Embedder
 
 class DefaultRouter(Agent):
     """
@@ -11,18 +12,26 @@ class DefaultRouter(Agent):
     
     This router provides:
     1. Simple message broadcasting
-    2. Basic conversation history
-    3. Error handling
+    2. Content-based routing through compiled rules
+    3. Basic conversation history
+    4. Error handling
     
     For more complex routing needs, users can implement their own router
     by creating a custom Agent class.
     """
     
-    def __init__(self, name: str = "DefaultRouter", model: str = "llama2"):
+    def __init__(
+        self,
+        name: str = "DefaultRouter",
+        model: str = "llama2",
+        embedder: Optional[Embedder] = None
+    ):
         super().__init__(name=name, model=model)
         self.routes: Dict[str, List[Agent]] = {}
+        self.rules = RuleEngine(embedder=embedder)
         self.conversation_history: List[Dict[str, Any]] = []
         self.max_history = 100
+        self._routed = 0
         
     @setup_agent
     async def on_ready(self) -> None:
@@ -34,24 +43,62 @@ class DefaultRouter(Agent):
         if pattern not in self.routes:
             self.routes[pattern] = []
         self.routes[pattern].append(agent)
+    
+    def replace_agent(self, old: Agent, new: Agent) -> None:
+        """Atomically point every route and rule of an agent at a replacement."""
+        for agents in self.routes.values():
+            for index, agent in enumerate(agents):
+                if agent is old:
+                    agents[index] = new
+        self.rules.replace_target(old, new)
+    
+    def unregister_agent(self, agent: Agent) -> None:
+        """Remove an agent from every route and rule."""
+        for pattern in list(self.routes):
+            agents = [registered for registered in self.routes[pattern] if registered is not agent]
+            if agents:
+                self.routes[pattern] = agents
+            else:
+                del self.routes[pattern]
+        self.rules.remove_target(agent)
+    
+    def add_rule(self, rule: RouteRule, agent: Agent) -> None:
+        """
+        Route messages matching a rule to an agent.
+        
+        Once an agent has a rule it only receives messages that match one of
+        its rules; agents without rules keep receiving every message.
+        
+        Example:
+            router.add_rule(FieldRule("calculate"), calculator)
+            router.add_rule(KeywordRule(["remember", "recall"]), memory)
+        """
+        self.rules.add(rule, agent)
+    
+    async def select_agents(self, message: Dict[str, Any]) -> List[Agent]:
+        """Select the agents that should receive a message."""
+        matched = await self.rules.match(message)
+        
+        selected: Dict[int, Agent] = {id(agent): agent for agent in matched}
+        for agents in self.routes.values():
+            for agent in agents:
+                if id(agent) not in selected and not self.rules.has_target(agent):
+                    selected[id(agent)] = agent
+        return list(selected.values())
         
     async def route_message(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Route a message to all registered agents."""
+        """Route a message to the agents selected for it."""
         # Store in conversation history
         self.conversation_history.append(message)
         if len(self.conversation_history) > self.max_history:
             self.conversation_history.pop(0)
+        self._routed += 1
         
-        # Get all registered agents
-        all_agents = set()
-        for agents in self.routes.values():
-            all_agents.update(agents)
-        
-        # Send to all agents and collect responses
+        # Send to selected agents and collect responses
         responses = []
-        for agent in all_agents:
+        for agent in await self.select_agents(message):
             try:
-                response = await agent.on_message(message)
+                response = await agent.handle(message)
                 if response:
                     responses.append(response)
             except Exception as e:
@@ -69,8 +116,21 @@ class DefaultRouter(Agent):
         """Handle incoming messages."""
         return await self.route_message(message)
     
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Persist the conversation history across restarts."""
+        return {"conversation_history": list(self.conversation_history)}
+    
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Restore the conversation history."""
+        self.conversation_history = list(state.get("conversation_history", []))[-self.max_history:]
+    
+    def snapshot_version(self) -> Any:
+        """Number of messages routed."""
+        return self._routed
+    
     async def cleanup(self) -> None:
         """Cleanup router resources."""
         self.conversation_history.clear()
         self.routes.clear()
+        self.rules = RuleEngine(embedder=self.rules.embedder)
         await super().cleanup()
@@ -0,0 +1,140 @@
+"""
+Agent and tool dependency graph for Solta framework
+"""
+from typing import Dict, Iterable, List, Optional, Set, Type
+
+from .agent import Agent
+from .tools import BaseTool
+
+
+class DependencyError(Exception):
+    """Raised when agent or tool dependencies cannot be satisfied."""
+    pass
+
+
+def required_tools_of(agent_cls: Type[Agent]) -> Set[str]:
+    """
+    Collect the tools an agent class needs.
+
+    This combines the `required_tools` class attribute with every tool named
+    by a @requires_tool decorator on the class's methods.
+    """
+    tools = set(getattr(agent_cls, 'required_tools', []))
+    for method_tools in getattr(agent_cls, '_method_tools', {}).values():
+        tools.update(method_tools)
+    return tools
+
+
+def find_cycle(dependencies: Dict[str, Iterable[str]]) -> Optional[List[str]]:
+    """
+    Find a dependency cycle.
+
+    Returns:
+        The names along the cycle (first name repeated at the end), or None
+    """
+    WHITE, GREY, BLACK = 0, 1, 2
+    color = {name: WHITE for name in dependencies}
+
+    for root in dependencies:
+        if color[root] != WHITE:
+            continue
+        path = [root]
+        stack = [iter(dependencies[root])]
+        color[root] = GREY
+        while stack:
+            dependency = next(stack[-1], None)
+            if dependency is None:
+                color[path.pop()] = BLACK
+                stack.pop()
+                continue
+            if dependency not in color:
+                continue
+            if color[dependency] == GREY:
+                return path[path.index(dependency):] + [dependency]
+            if color[dependency] == WHITE:
+                color[dependency] = GREY
+                path.append(dependency)
+                stack.append(iter(dependencies[dependency]))
+    return None
+
+
+class DependencyGraph:
+    """
+    Dependency graph of a set of agent classes.
+
+    This class:
+    1. Records agent -> agent edges (`depends_on`) and agent -> tool edges
+       (`required_tools` and @requires_tool)
+    2. Fails fast on missing agents and dependency cycles
+    3. Supplies shared tool instances and validates tools once per agent
+
+    Agents are started in dependency order by startup.initialize_agents.
+    """
+
+    def __init__(
+        self,
+        agent_classes: Dict[str, Type[Agent]],
+        shared_tools: Optional[Dict[str, BaseTool]] = None,
+        available: Optional[Iterable[str]] = None
+    ):
+        self.agent_classes = agent_classes
+        self.shared_tools = shared_tools or {}
+        self.available = set(available or ())
+        self.agent_dependencies: Dict[str, Set[str]] = {
+            name: set(getattr(agent_cls, 'depends_on', []))
+            for name, agent_cls in agent_classes.items()
+        }
+        self.tool_dependencies: Dict[str, Set[str]] = {
+            name: required_tools_of(agent_cls)
+            for name, agent_cls in agent_classes.items()
+        }
+
+    @property
+    def tool_users(self) -> Dict[str, Set[str]]:
+        """Agents using each tool, by tool name."""
+        users: Dict[str, Set[str]] = {}
+        for name, tools in self.tool_dependencies.items():
+            for tool in tools:
+                users.setdefault(tool, set()).add(name)
+        return users
+
+    def check(self) -> None:
+        """
+        Validate agent dependencies.
+
+        Raises:
+            DependencyError: On a missing agent or a dependency cycle
+        """
+        for name, dependencies in self.agent_dependencies.items():
+            missing = dependencies - set(self.agent_classes) - self.available
+            if missing:
+                raise DependencyError(
+                    f"Agent '{name}' depends on unknown agents: {', '.join(sorted(missing))}"
+                )
+
+        cycle = find_cycle(self.agent_dependencies)
+        if cycle:
+            raise DependencyError(f"Dependency cycle between agents: {' -> '.join(cycle)}")
+
+    def bind_tools(self, name: str, agent: Agent) -> None:
+        """
+        Supply shared tools to an agent and validate its tool requirements.
+
+        Tools the agent did not register itself are taken from the shared
+        tool instances.
+
+        Raises:
+            DependencyError: If a required tool is unavailable
+        """
+        required = self.tool_dependencies.get(name, set())
+        missing = []
+        for tool_name in sorted(required):
+            if tool_name in agent.tools:
+                continue
+            shared = self.shared_tools.get(tool_name)
+            if shared is None:
+                missing.append(tool_name)
+            else:
+                agent.tools[tool_name] = shared
+        if missing:
+            raise DependencyError(f"Agent '{name}' is missing required tools: {', '.join(missing)}")
@@ -0,0 +1,216 @@
+"""
+Eviction policies for Solta framework
+"""
+import heapq
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+EVICTION_POLICIES = ("lru", "lfu", "ttl")
+
+
+class EvictionTracker:
+    """
+    Size, access and expiry bookkeeping for a bounded key-value store.
+
+    This class:
+    1. Accounts the approximate size of every key in bytes
+    2. Orders keys for eviction by the chosen policy: least recently used,
+       least frequently used (ties broken by recency) or soonest to expire
+       (keys without a TTL go last, least recently used first)
+    3. Keeps expiry times in a heap, so expired keys are found without
+       scanning the store
+    4. Counts evictions and expirations
+
+    Expiry times are wall-clock (time.time()) so they stay meaningful when
+    they are persisted and the store is reopened.
+    """
+
+    def __init__(
+        self,
+        policy: str = "lru",
+        max_keys: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(
+                f"Unknown eviction policy: {policy!r} "
+                f"(expected one of: {', '.join(EVICTION_POLICIES)})"
+            )
+        self.policy = policy
+        self.max_keys = max_keys
+        self.max_bytes = max_bytes
+
+        self.bytes = 0
+        self._sizes: Dict[str, int] = {}
+        # Recency order (lru, ttl), oldest first
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        # lfu: key -> use count, and keys by use count in recency order
+        self._uses: Dict[str, int] = {}
+        self._by_uses: Dict[int, "OrderedDict[str, None]"] = {}
+        self._min_uses = 0
+        # Expiry times and a heap of (expires_at, key); stale heap entries are skipped
+        self._expires: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sizes
+
+    @property
+    def expiring_keys(self) -> int:
+        """Number of keys with a TTL."""
+        return len(self._expires)
+
+    def put(self, key: str, size: int, expires_at: Optional[float] = None) -> None:
+        """Record a written key (new or replaced)."""
+        if key in self._sizes:
+            self.bytes -= self._sizes[key]
+            self.touch(key)
+        elif self.policy == "lfu":
+            self._uses[key] = 1
+            self._by_uses.setdefault(1, OrderedDict())[key] = None
+            self._min_uses = 1
+        else:
+            self._recent[key] = None
+        self._sizes[key] = size
+        self.bytes += size
+
+        if expires_at is None:
+            self._expires.pop(key, None)
+        else:
+            self._expires[key] = expires_at
+            heapq.heappush(self._heap, (expires_at, key))
+
+    def touch(self, key: str) -> None:
+        """Record a use of a key."""
+        if self.policy != "lfu":
+            if key in self._recent:
+                self._recent.move_to_end(key)
+            return
+        uses = self._uses.get(key)
+        if uses is None:
+            return
+        bucket = self._by_uses[uses]
+        del bucket[key]
+        if not bucket:
+            del self._by_uses[uses]
+            if self._min_uses == uses:
+                self._min_uses = uses + 1
+        self._uses[key] = uses + 1
+        self._by_uses.setdefault(uses + 1, OrderedDict())[key] = None
+
+    def remove(self, key: str) -> Optional[int]:
+        """Forget a key; returns its size, or None if it was not tracked."""
+        size = self._sizes.pop(key, None)
+        if size is None:
+            return None
+        self.bytes -= size
+        self._expires.pop(key, None)
+        if self.policy == "lfu":
+            uses = self._uses.pop(key)
+            bucket = self._by_uses[uses]
+            del bucket[key]
+            if not bucket:
+                del self._by_uses[uses]
+                if self._min_uses == uses:
+                    self._min_uses = min(self._by_uses, default=0)
+        else:
+            del self._recent[key]
+        return size
+
+    def is_expired(self, key: str, now: Optional[float] = None) -> bool:
+        """Whether key has a TTL that has run out."""
+        expires_at = self._expires.get(key)
+        if expires_at is None:
+            return False
+        return expires_at <= (time.time() if now is None else now)
+
+    def expiry_times(self) -> Dict[str, float]:
+        """Copy of the expiry time of every key with a TTL."""
+        return dict(self._expires)
+
+    def expired(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[str]:
+        """Pop up to `limit` expired keys (the caller deletes them)."""
+        now = time.time() if now is None else now
+        keys = []
+        heap = self._heap
+        while heap and heap[0][0] <= now and (limit is None or len(keys) < limit):
+            expires_at, key = heapq.heappop(heap)
+            if self._expires.get(key) == expires_at:
+                keys.append(key)
+                self.remove(key)
+                self.expirations += 1
+        # Drop stale entries once they outnumber the live ones
+        if len(heap) > 2 * len(self._expires) + 64:
+            self._heap = [(expires_at, key) for key, expires_at in self._expires.items()]
+            heapq.heapify(self._heap)
+        return keys
+
+    def over_limit(self) -> bool:
+        """Whether the tracked keys exceed max_keys or max_bytes."""
+        return (self.max_keys is not None and len(self._sizes) > self.max_keys) or \
+            (self.max_bytes is not None and self.bytes > self.max_bytes)
+
+    def victims(self, keep: Optional[str] = None) -> Iterator[str]:
+        """
+        Pop keys to evict until the store is within its limits.
+
+        Args:
+            keep: Key that must not be evicted (the one just written)
+        """
+        while self.over_limit():
+            key = self._next_victim(keep)
+            if key is None:
+                return
+            size = self.remove(key)
+            self.evictions += 1
+            self.evicted_bytes += size
+            yield key
+
+    def _next_victim(self, keep: Optional[str]) -> Optional[str]:
+        if self.policy == "lfu":
+            for key in self._by_uses.get(self._min_uses, ()):
+                if key != keep:
+                    return key
+            for uses in sorted(self._by_uses):
+                for key in self._by_uses[uses]:
+                    if key != keep:
+                        return key
+            return None
+
+        if self.policy == "ttl":
+            while self._heap:
+                expires_at, key = self._heap[0]
+                if self._expires.get(key) != expires_at:
+                    heapq.heappop(self._heap)
+                    continue
+                if key != keep:
+                    heapq.heappop(self._heap)
+                    return key
+                break
+
+        for key in self._recent:
+            if key != keep:
+                return key
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and eviction counters."""
+        return {
+            "policy": self.policy,
+            "keys": len(self._sizes),
+            "bytes": self.bytes,
+            "max_keys": self.max_keys,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "expirations": self.expirations,
+            "expiring_keys": self.expiring_keys,
+        }
@@ -0,0 +1,244 @@
+"""
+Tool executors for Solta framework
+"""
+import asyncio
+import concurrent.futures
+import functools
+import pickle
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+EXECUTION_MODES = ("inline", "thread", "process")
+
+
+def _call_in_process(func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+    """Process pool entry point (module level so it can be pickled)."""
+    return func(*args, **kwargs)
+
+
+class ToolExecutors:
+    """
+    Shared, size-limited executors for tools that must not run on the event loop.
+
+    This class:
+    1. Lazily creates one thread pool and one process pool shared by every tool
+    2. Runs tool work inline, in a thread or in a process according to the
+       tool's execution_mode, within the tool's max_concurrency
+    3. Optionally monitors event loop lag (lag_threshold) and reports the
+       tools whose synchronous run(), executed inline, stalled the loop
+    4. Optionally moves those tools to the thread pool (auto_offload)
+
+    Only inline run() calls are blamed: async execute() bodies yield to the
+    loop while they wait, so a stall during one is usually caused by
+    another task. The monitor wakes every lag_interval, so it is off unless
+    lag_threshold is set (auto_offload turns it on with a 0.1 s threshold).
+
+    A Client owns one instance and installs it as the process-wide default
+    while it runs; tools not started by a Client use a lazily created default.
+    """
+
+    def __init__(
+        self,
+        max_threads: Optional[int] = None,
+        max_processes: Optional[int] = None,
+        lag_threshold: Optional[float] = None,
+        lag_interval: float = 0.05,
+        auto_offload: bool = False
+    ):
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        if lag_threshold is None and auto_offload:
+            lag_threshold = 0.1
+        self.lag_threshold = lag_threshold
+        self.lag_interval = lag_interval
+        self.auto_offload = auto_offload
+
+        self._threads: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._processes: Optional[concurrent.futures.Executor] = None
+        self._monitor: Optional[asyncio.Task] = None
+        self._previous: Optional['ToolExecutors'] = None
+        # (finished_at, duration, tool) of recent inline run() calls
+        self._finished_inline: deque = deque(maxlen=256)
+
+        self.submitted: Dict[str, int] = {mode: 0 for mode in EXECUTION_MODES}
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.stalls_by_tool: Dict[str, int] = {}
+
+    @property
+    def threads(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Shared thread pool, created on first use."""
+        if self._threads is None:
+            self._threads = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_threads,
+                thread_name_prefix="solta-tool"
+            )
+        return self._threads
+
+    @property
+    def processes(self) -> concurrent.futures.Executor:
+        """Shared process pool, created on first use."""
+        if self._processes is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._processes = ProcessPoolExecutor(max_workers=self.max_processes)
+        return self._processes
+
+    async def start(self) -> None:
+        """Install as the default executors and start the loop lag monitor."""
+        global _default_executors
+        if self._monitor is not None:
+            return
+        self._previous = _default_executors
+        _default_executors = self
+        if self.lag_threshold:
+            self._monitor = asyncio.ensure_future(self._watch_loop())
+            # Let the monitor take its first reading
+            await asyncio.sleep(0)
+
+    async def run(self, tool: Any, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a synchronous function for a tool according to its execution mode.
+
+        Args:
+            tool: Tool the work belongs to (supplies execution_mode and
+                  max_concurrency)
+            func: Function to run; for process mode it and its arguments must
+                  be picklable
+
+        Returns:
+            The function's result
+        """
+        mode = getattr(tool, 'execution_mode', 'inline')
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode for tool {tool.name}: {mode}")
+
+        slots = tool._concurrency_slots()
+        if slots is None:
+            return await self._dispatch(tool, mode, func, args, kwargs)
+        async with slots:
+            return await self._dispatch(tool, mode, func, args, kwargs)
+
+    async def _dispatch(
+        self,
+        tool: Any,
+        mode: str,
+        func: Callable[..., Any],
+        args: tuple,
+        kwargs: Dict[str, Any]
+    ) -> Any:
+        self.submitted[mode] += 1
+        if mode == "inline":
+            with self.inline(tool):
+                return func(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        if mode == "thread":
+            return await loop.run_in_executor(self.threads, functools.partial(func, *args, **kwargs))
+
+        try:
+            return await loop.run_in_executor(self.processes, _call_in_process, func, args, kwargs)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            # Unpicklable arguments or results surface as pickling errors
+            if "pickle" not in str(e).lower():
+                raise
+            raise TypeError(
+                f"Tool '{tool.name}' runs in a process pool; its arguments and "
+                f"result must be picklable: {e}"
+            ) from e
+
+    def inline(self, tool: Any) -> '_InlineScope':
+        """
+        Context manager timing a synchronous call made on the event loop
+        for a tool (it must not span an await).
+        """
+        return _InlineScope(self, tool)
+
+    async def _watch_loop(self) -> None:
+        """Measure how late the loop wakes up and attribute stalls to inline run() calls."""
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.lag_interval)
+            lag = time.monotonic() - started - self.lag_interval
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag < self.lag_threshold:
+                continue
+
+            # Blame inline calls made during the stall that blocked long enough to cause it
+            self.stalls += 1
+            suspects = {}
+            for finished_at, duration, tool in self._finished_inline:
+                if finished_at >= started and duration >= self.lag_threshold:
+                    suspects[id(tool)] = tool
+            for tool in suspects.values():
+                self._record_stall(tool, lag)
+
+    def _record_stall(self, tool: Any, lag: float) -> None:
+        first = tool.name not in self.stalls_by_tool
+        self.stalls_by_tool[tool.name] = self.stalls_by_tool.get(tool.name, 0) + 1
+
+        if self.auto_offload and tool.execution_mode == "inline" and tool.has_run:
+            tool.execution_mode = "thread"
+            print(f"Tool {tool.name} blocked the event loop for {lag * 1000:.0f} ms; moved to the thread pool")
+        elif first:
+            print(
+                f"Tool {tool.name} blocked the event loop for {lag * 1000:.0f} ms; "
+                f"consider execution_mode = 'thread' or 'process'"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """Submission counts and loop lag metrics."""
+        return {
+            "submitted": dict(self.submitted),
+            "stalls": self.stalls,
+            "max_lag": self.max_lag,
+            "stalls_by_tool": dict(self.stalls_by_tool),
+        }
+
+    async def shutdown(self) -> None:
+        """Stop the lag monitor and shut the pools down."""
+        global _default_executors
+        if self._monitor is not None:
+            self._monitor.cancel()
+            await asyncio.gather(self._monitor, return_exceptions=True)
+            self._monitor = None
+        if _default_executors is self:
+            _default_executors = self._previous
+        self._previous = None
+
+        loop = asyncio.get_running_loop()
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                await loop.run_in_executor(None, functools.partial(pool.shutdown, wait=True))
+        self._threads = None
+        self._processes = None
+
+
+class _InlineScope:
+    """Times an inline tool call for loop lag attribution."""
+
+    __slots__ = ("executors", "tool", "started")
+
+    def __init__(self, executors: ToolExecutors, tool: Any):
+        self.executors = executors
+        self.tool = tool
+        self.started = 0.0
+
+    def __enter__(self) -> None:
+        self.started = time.monotonic()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        finished_at = time.monotonic()
+        self.executors._finished_inline.append((finished_at, finished_at - self.started, self.tool))
+
+
+_default_executors: Optional[ToolExecutors] = None
+
+
+def get_executors() -> ToolExecutors:
+    """Return the executors of the running Client, or a process-wide default."""
+    global _default_executors
+    if _default_executors is None:
+        _default_executors = ToolExecutors()
+    return _default_executors
@@ -0,0 +1,219 @@
+"""
+Bounded ingress queue for Solta framework
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+OVERFLOW_POLICIES = ("block", "timeout", "reject")
+
+
+class IngressFullError(Exception):
+    """Raised when a message is rejected because the ingress queue is full."""
+    pass
+
+
+class IngressQueue:
+    """
+    Thread-safe bounded queue feeding messages to a fixed worker pool on the loop.
+
+    This class:
+    1. Accepts messages from any thread and returns a concurrent.futures.Future
+    2. Bounds the number of accepted but unfinished messages, blocking,
+       timing out or rejecting producers when the queue is full
+    3. Processes queued messages with a fixed number of worker tasks
+    4. Tracks queue depth, in-flight work and drops
+
+    When the queue is full, producers on the event loop thread are always
+    rejected rather than blocked, since blocking would deadlock the loop.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+        maxsize: int = 1000,
+        workers: int = 8,
+        overflow: str = "block",
+        timeout: Optional[float] = None
+    ):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+
+        self.handler = handler
+        self.maxsize = maxsize
+        self.workers = workers
+        self.overflow = overflow
+        self.timeout = timeout
+
+        self._slots = threading.Semaphore(maxsize)
+        self._lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._tasks: List[asyncio.Task] = []
+        self._closed = True
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.in_flight = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the queue is accepting messages."""
+        return not self._closed
+
+    async def start(self) -> None:
+        """Start the worker pool on the running loop."""
+        if not self._closed:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._queue = asyncio.Queue()
+        self._tasks = [self._loop.create_task(self._worker()) for _ in range(self.workers)]
+        self._closed = False
+
+    def _acquire_slot(self, overflow: str, timeout: Optional[float]) -> bool:
+        """Reserve a queue slot according to the overflow policy."""
+        if overflow == "reject" or threading.get_ident() == self._loop_thread:
+            return self._slots.acquire(blocking=False)
+        if overflow == "timeout":
+            return self._slots.acquire(timeout=timeout)
+        return self._slots.acquire()
+
+    def submit(
+        self,
+        message: Dict[str, Any],
+        overflow: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> concurrent.futures.Future:
+        """
+        Queue a message for processing.
+
+        Args:
+            message: Message to process
+            overflow: Override the queue's overflow policy for this call
+            timeout: Seconds to wait for a slot with the "timeout" policy
+
+        Returns:
+            Future resolving to the handler's result or exception
+
+        Raises:
+            IngressFullError: If no slot became available
+            RuntimeError: If the queue is not running
+        """
+        if self._closed:
+            raise RuntimeError("Ingress queue is not running")
+
+        overflow = overflow or self.overflow
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if timeout is None:
+            timeout = self.timeout
+
+        if not self._acquire_slot(overflow, timeout):
+            with self._lock:
+                self.rejected += 1
+            raise IngressFullError(f"Ingress queue full ({self.maxsize} messages)")
+
+        with self._lock:
+            self.submitted += 1
+            self.depth += 1
+            if self.depth > self.max_depth:
+                self.max_depth = self.depth
+
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        item = (message, future)
+        try:
+            if threading.get_ident() == self._loop_thread:
+                self._queue.put_nowait(item)
+            else:
+                self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        except RuntimeError:
+            # Loop closed between the check and the hand-off
+            self._release(dequeued=True)
+            raise RuntimeError("Ingress queue is not running")
+        return future
+
+    def _release(self, dequeued: bool = False) -> None:
+        """Give a queue slot back."""
+        if dequeued:
+            with self._lock:
+                self.depth -= 1
+        self._slots.release()
+
+    async def _worker(self) -> None:
+        """Process queued messages until cancelled."""
+        while True:
+            message, future = await self._queue.get()
+            with self._lock:
+                self.depth -= 1
+                self.in_flight += 1
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    result = await self.handler(message)
+                except asyncio.CancelledError:
+                    future.set_exception(concurrent.futures.CancelledError())
+                    raise
+                except BaseException as e:
+                    with self._lock:
+                        self.failed += 1
+                    future.set_exception(e)
+                else:
+                    with self._lock:
+                        self.completed += 1
+                    future.set_result(result)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                self._slots.release()
+                self._queue.task_done()
+
+    async def stop(self, drain: bool = True) -> None:
+        """
+        Stop accepting messages and shut the worker pool down.
+
+        Args:
+            drain: Finish already queued messages before stopping
+        """
+        if self._closed:
+            return
+        self._closed = True
+
+        if drain:
+            await self._queue.join()
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            future.cancel()
+            self._release(dequeued=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput and drop metrics."""
+        with self._lock:
+            return {
+                "maxsize": self.maxsize,
+                "workers": self.workers,
+                "depth": self.depth,
+                "max_depth": self.max_depth,
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,203 @@
+"""
+Sorted key index for Solta framework
+"""
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+
+def prefix_bounds(prefix: str) -> Tuple[str, Optional[str]]:
+    """
+    Key range [low, high) holding exactly the keys starting with prefix.
+
+    high is None when no upper bound exists (empty prefix, or a prefix of
+    only maximal code points).
+    """
+    stripped = prefix
+    while stripped and stripped[-1] == "\U0010ffff":
+        stripped = stripped[:-1]
+    if not stripped:
+        return prefix, None
+    return prefix, stripped[:-1] + chr(ord(stripped[-1]) + 1)
+
+
+class SortedKeyIndex:
+    """
+    Set of string keys kept in sorted order.
+
+    Keys are stored in a list of sorted chunks of roughly `load` keys
+    (split when they grow to twice that), with the last key of every chunk
+    kept in a separate list for bisecting and the chunk sizes in a Fenwick
+    tree. This gives:
+    1. O(log n) add, discard and membership (plus an O(load) list insert)
+    2. O(log n + page) range and prefix scans
+    3. O(log n) counts of a range, with no scan over the keys
+    """
+
+    def __init__(self, keys: Iterable[str] = (), load: int = 512):
+        self._load = load
+        ordered = sorted(set(keys))
+        self._chunks: List[List[str]] = [ordered[i:i + load] for i in range(0, len(ordered), load)]
+        self._maxes: List[str] = [chunk[-1] for chunk in self._chunks]
+        self._len = len(ordered)
+        self._tree: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, key: str) -> bool:
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return False
+        chunk = self._chunks[i]
+        j = bisect_left(chunk, key)
+        return j < len(chunk) and chunk[j] == key
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self._chunks:
+            yield from chunk
+
+    def add(self, key: str) -> bool:
+        """Add a key; returns False if it was already present."""
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+            self._len = 1
+            self._tree = None
+            return True
+
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+            self._chunks[i].append(key)
+            self._maxes[i] = key
+        else:
+            chunk = self._chunks[i]
+            j = bisect_left(chunk, key)
+            if chunk[j] == key:
+                return False
+            chunk.insert(j, key)
+        self._len += 1
+
+        if len(self._chunks[i]) > 2 * self._load:
+            chunk = self._chunks[i]
+            half = len(chunk) // 2
+            self._chunks[i:i + 1] = [chunk[:half], chunk[half:]]
+            self._maxes[i:i + 1] = [chunk[half - 1], chunk[-1]]
+            self._tree = None
+        else:
+            self._tree_add(i, 1)
+        return True
+
+    def discard(self, key: str) -> bool:
+        """Remove a key; returns False if it was not present."""
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            return False
+        chunk = self._chunks[i]
+        j = bisect_left(chunk, key)
+        if j == len(chunk) or chunk[j] != key:
+            return False
+        del chunk[j]
+        self._len -= 1
+
+        if not chunk:
+            del self._chunks[i]
+            del self._maxes[i]
+            self._tree = None
+        elif len(chunk) < self._load // 4 and len(self._chunks) > 1:
+            # Merge small chunks into a neighbour to keep bisecting cheap
+            left = i - 1 if i > 0 else i
+            merged = self._chunks[left] + self._chunks[left + 1]
+            self._chunks[left:left + 2] = [merged]
+            self._maxes[left:left + 2] = [merged[-1]]
+            self._tree = None
+            if len(merged) > 2 * self._load:
+                half = len(merged) // 2
+                self._chunks[left:left + 1] = [merged[:half], merged[half:]]
+                self._maxes[left:left + 1] = [merged[half - 1], merged[-1]]
+        else:
+            self._maxes[i] = chunk[-1]
+            self._tree_add(i, -1)
+        return True
+
+    def _build_tree(self) -> List[int]:
+        tree = [0] + [len(chunk) for chunk in self._chunks]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+        return tree
+
+    def _tree_add(self, chunk: int, delta: int) -> None:
+        tree = self._tree
+        if tree is None:
+            return
+        i = chunk + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _keys_before_chunk(self, chunk: int) -> int:
+        tree = self._tree if self._tree is not None else self._build_tree()
+        total = 0
+        i = chunk
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def rank(self, key: str, inclusive: bool = False) -> int:
+        """Number of keys below key (or at most key when inclusive)."""
+        find = bisect_right if inclusive else bisect_left
+        i = find(self._maxes, key)
+        if i == len(self._maxes):
+            return self._len
+        return self._keys_before_chunk(i) + find(self._chunks[i], key)
+
+    def count(self, start: Optional[str] = None, end: Optional[str] = None) -> int:
+        """Number of keys in [start, end); None means unbounded."""
+        low = 0 if start is None else self.rank(start)
+        high = self._len if end is None else self.rank(end)
+        return max(high - low, 0)
+
+    def irange(
+        self,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        after: Optional[str] = None
+    ) -> Iterator[str]:
+        """
+        Iterate over the keys in [start, end) in order.
+
+        Args:
+            start: First key to include (inclusive)
+            end: Key to stop before (exclusive)
+            after: Only keys strictly greater than this (a pagination cursor)
+        """
+        if after is not None and (start is None or after >= start):
+            find, bound = bisect_right, after
+        elif start is not None:
+            find, bound = bisect_left, start
+        else:
+            find, bound = None, None
+
+        if find is None:
+            i, j = 0, 0
+        else:
+            i = find(self._maxes, bound)
+            if i == len(self._maxes):
+                return
+            j = find(self._chunks[i], bound)
+
+        chunks = self._chunks
+        while i < len(chunks):
+            chunk = chunks[i]
+            while j < len(chunk):
+                key = chunk[j]
+                if end is not None and key >= end:
+                    return
+                yield key
+                j += 1
+            i += 1
+            j = 0
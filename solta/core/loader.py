@@ -3,13 +3,15 @@ Agent loading and discovery system for Solta framework
 """
 import os
 import sys
+import gc
+import json
+import time
+import weakref
 import asyncio
 import importlib.util
 import inspect
 from pathlib import Path
-from typing import Dict, List, Type, Optional, Set
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from typing import Any, Dict, List, Type, Optional, Set, Union
 
 from .agent import Agent
 
@@ -21,41 +23,98 @@ class AgentReloadError(Exception):
     """Raised when an agent cannot be reloaded."""
     pass
 
-class AgentWatcher(FileSystemEventHandler):
-    """Watches for changes in agent files and triggers reloads."""
+# File names that may define agents
+AGENT_FILE_NAMES = ("agent.py", "setup.py")
+
+# Directories never searched for agents
+IGNORED_DIRS = {
+    "__pycache__", ".git", ".hg", ".svn", ".venv", "venv", "env",
+    "node_modules", ".tox", ".nox", ".mypy_cache", ".pytest_cache",
+    ".ruff_cache", "site-packages", "build", "dist",
+}
+
+class DiscoveryManifest:
+    """
+    Persisted record of agent discovery results.
     
-    def __init__(self, loader: 'AgentLoader'):
-        self.loader = loader
-        self.processing = False
-        self._loop = None
+    This class remembers:
+    1. For each directory (by mtime), its agent files and subdirectories,
+       so unchanged directories are not listed again
+    2. For each agent file (by mtime and size), the Agent classes it defines,
+       so files without agents are not imported and files with agents skip
+       the class scan
+
+    Files that define agents are still imported on every start; only the
+    directory listing and the inspect.getmembers scan are saved. Nothing
+    is written unless a path is given (the Client's manifest_path option),
+    so choose one per project, e.g. inside the project directory.
+    """
     
-    def _get_event_loop(self):
-        """Get or create an event loop."""
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        return loop
+    VERSION = 1
+    
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path else None
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.dirs: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._load()
     
-    def on_modified(self, event):
-        if event.is_directory or self.processing:
+    def _load(self) -> None:
+        """Read the manifest from disk, ignoring missing or corrupt files."""
+        if self.path is None or not self.path.exists():
             return
-            
-        if event.src_path.endswith('.py'):
-            self.processing = True
-            try:
-                loop = self._get_event_loop()
-                loop.run_until_complete(self._handle_modified(event))
-            finally:
-                self.processing = False
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") != self.VERSION:
+            return
+        self.files = data.get("files", {})
+        self.dirs = data.get("dirs", {})
+    
+    @staticmethod
+    def _signature(stat: os.stat_result) -> List[int]:
+        return [stat.st_mtime_ns, stat.st_size]
+    
+    def directory(self, path: str, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        """Cached listing of a directory if it has not changed."""
+        entry = self.dirs.get(path)
+        if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry
+        return None
+    
+    def record_directory(self, path: str, stat: os.stat_result, files: List[str], subdirs: List[str]) -> None:
+        """Remember the listing of a directory."""
+        self.dirs[path] = {"mtime_ns": stat.st_mtime_ns, "files": files, "subdirs": subdirs}
+        self._dirty = True
+    
+    def agents_in(self, path: str, stat: os.stat_result) -> Optional[List[str]]:
+        """Agent class names defined by a file if it has not changed."""
+        entry = self.files.get(path)
+        if entry is not None and entry["signature"] == self._signature(stat):
+            return entry["agents"]
+        return None
+    
+    def record_file(self, path: str, stat: os.stat_result, agents: List[str]) -> None:
+        """Remember the Agent classes defined by a file."""
+        self.files[path] = {"signature": self._signature(stat), "agents": agents}
+        self._dirty = True
     
-    async def _handle_modified(self, event):
-        """Handle file modification event."""
+    def save(self) -> None:
+        """Write the manifest to disk if it changed."""
+        if self.path is None or not self._dirty:
+            return
         try:
-            await self.loader.reload_agent_file(event.src_path)
-        except Exception as e:
-            print(f"Error reloading agent: {e}")
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(
+                json.dumps({"version": self.VERSION, "files": self.files, "dirs": self.dirs}),
+                encoding="utf-8"
+            )
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"Warning: Could not write discovery manifest {self.path}: {e}")
 
 class AgentLoader:
     """
@@ -65,24 +124,51 @@ class AgentLoader:
     1. Scans directories for agent files
     2. Loads agents and their dependencies
     3. Manages hot reloading
-    4. Tracks agent dependencies
     """
     
     def __init__(self, client):
         self.client = client
+        # Opt-in: the manifest is only kept when the client names a file for it
+        self.manifest = DiscoveryManifest(getattr(client, 'config', {}).get('manifest_path'))
         self.loaded_agents: Dict[str, Type[Agent]] = {}
         self.agent_paths: Dict[str, str] = {}
-        self.dependencies: Dict[str, Set[str]] = {}
-        self.observer: Optional[Observer] = None
+        self.observer = None
         self._loop = None
+        
+        # Module lifecycle: current generation per agent file and weak
+        # references to superseded modules and replaced agent instances
+        self.module_generations: Dict[str, int] = {}
+        self._retired: List[weakref.ref] = []
+        
+        # Debounced hot reload state (only touched on the event loop)
+        self.reload_debounce: float = getattr(client, 'config', {}).get('reload_debounce', 0.25)
+        self._pending_reloads: Dict[str, float] = {}
+        self._reload_timers: Dict[str, asyncio.TimerHandle] = {}
+        self._ready_reloads: Dict[str, float] = {}
+        self._reload_task: Optional[asyncio.Task] = None
+        self.reload_stats: Dict[str, Any] = {
+            "batches": 0,
+            "files": 0,
+            "agents": 0,
+            "last_latency": None,
+            "max_latency": 0.0,
+        }
     
     def start_watching(self, directories: List[str]) -> None:
         """Start watching directories for changes."""
         if not self.client.live_reload:
             return
-            
+        
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = asyncio.get_event_loop()
+        
+        from watchdog.observers import Observer
+        from .watcher import AgentWatcher
+        
         self.observer = Observer()
-        handler = AgentWatcher(self)
+        handler = AgentWatcher(self, self._loop)
         
         for directory in directories:
             try:
@@ -98,37 +184,200 @@ class AgentLoader:
             self.observer.stop()
             self.observer.join()
             self.observer = None
+        
+        for timer in self._reload_timers.values():
+            timer.cancel()
+        self._reload_timers.clear()
+        self._pending_reloads.clear()
+        self._ready_reloads.clear()
+    
+    def schedule_reload(self, file_path: str, event_time: Optional[float] = None) -> None:
+        """
+        Schedule a debounced reload of a changed file (event loop only).
+        
+        Repeated events for the same file within the debounce window are
+        coalesced; the file is reloaded once it has been quiet for
+        `reload_debounce` seconds.
+        """
+        file_path = os.path.realpath(file_path)
+        self._pending_reloads.setdefault(file_path, event_time or time.perf_counter())
+        
+        timer = self._reload_timers.get(file_path)
+        if timer is not None:
+            timer.cancel()
+        loop = self._loop or asyncio.get_event_loop()
+        self._reload_timers[file_path] = loop.call_later(
+            self.reload_debounce, self._file_settled, file_path
+        )
+    
+    def _file_settled(self, file_path: str) -> None:
+        """Move a quiet file into the next reload batch."""
+        self._reload_timers.pop(file_path, None)
+        first_event = self._pending_reloads.pop(file_path, None)
+        if first_event is None:
+            return
+        self._ready_reloads.setdefault(file_path, first_event)
+        
+        # Wait for files still receiving events so one save reloads each agent once
+        if self._pending_reloads:
+            return
+        if self._reload_task is None or self._reload_task.done():
+            loop = self._loop or asyncio.get_event_loop()
+            self._reload_task = loop.create_task(self._run_reload_batches())
+    
+    async def _run_reload_batches(self) -> None:
+        """Reload settled files in batches until none are left."""
+        while self._ready_reloads:
+            batch, self._ready_reloads = self._ready_reloads, {}
+            try:
+                await self.reload_files(batch)
+            except Exception as e:
+                print(f"Error reloading agents: {e}")
+    
+    def _affected_agent_files(self, file_path: str) -> List[str]:
+        """Agent files that must be reloaded when a file changes."""
+        known = set(self.agent_paths.values())
+        if file_path in known or os.path.basename(file_path) in AGENT_FILE_NAMES:
+            return [file_path]
+        if not file_path.endswith('.py'):
+            # A deleted or moved directory takes its agent files along
+            prefix = file_path + os.sep
+            return sorted(path for path in known if path.startswith(prefix))
+        # A helper module (e.g. tools.py) affects the agent files next to it
+        directory = os.path.dirname(file_path)
+        return sorted(path for path in known if os.path.dirname(path) == directory)
+    
+    async def reload_files(self, changes: Dict[str, float]) -> None:
+        """
+        Reload a batch of changed files.
+        
+        Every affected agent file is loaded once and every agent class it
+        defines is reloaded once, however many events triggered the batch.
+        
+        Args:
+            changes: Changed file paths mapped to the time of their first event
+        """
+        agent_files: Dict[str, None] = {}
+        helpers: List[str] = []
+        for file_path in changes:
+            affected = self._affected_agent_files(file_path)
+            if affected != [file_path]:
+                helpers.append(file_path)
+            for agent_file in affected:
+                agent_files[agent_file] = None
+        
+        # Agent files re-executed below must import the changed helpers anew
+        if helpers:
+            self.evict_modules(helpers)
+            importlib.invalidate_caches()
+        
+        agent_classes: Dict[str, Type[Agent]] = {}
+        removed: Set[str] = set()
+        for agent_file in agent_files:
+            if not os.path.exists(agent_file):
+                removed |= self.unload_agent_file(agent_file)
+                continue
+            previous = self.agent_names_for(agent_file)
+            try:
+                for agent_cls in self.load_agent_file(agent_file):
+                    agent_classes[agent_cls.__name__] = agent_cls
+            except AgentLoadError as e:
+                print(f"Error reloading agent: {e}")
+                continue
+            removed |= previous - self.agent_names_for(agent_file)
+        
+        for agent_cls in agent_classes.values():
+            await self.client.reload_agent(agent_cls)
+        
+        # Agents whose class disappeared from their file are retired as well
+        for name in removed - set(agent_classes):
+            await self.client.remove_agent(name)
+        
+        if not changes:
+            return
+        latency = time.perf_counter() - min(changes.values())
+        stats = self.reload_stats
+        stats["batches"] += 1
+        stats["files"] += len(agent_files)
+        stats["agents"] += len(agent_classes)
+        stats["last_latency"] = latency
+        stats["max_latency"] = max(stats["max_latency"], latency)
+        print(
+            f"Reloaded {len(agent_classes)} agents from {len(agent_files)} files "
+            f"in {latency * 1000:.0f} ms"
+        )
     
     def discover_agents(self, directory: str) -> List[str]:
         """
         Discover agent files in a directory.
         
+        Ignored directories (caches, VCS metadata, virtualenvs) are pruned,
+        and directories whose mtime matches the discovery manifest are not
+        listed again.
+        
         Args:
             directory: Directory to scan for agents
             
         Returns:
             List of discovered agent file paths
         """
-        agent_files = []
         directory_path = Path(directory)
         
         if not directory_path.exists():
             print(f"Warning: Directory not found: {directory}")
-            return agent_files
+            return []
         
-        for item in directory_path.rglob("*"):
-            if item.is_file():
-                if item.name == "agent.py":
-                    agent_files.append(str(item))
-                elif item.name == "setup.py":
-                    agent_files.append(str(item))
+        agent_files: List[str] = []
+        pending = [str(directory_path.resolve())]
+        while pending:
+            current = pending.pop()
+            try:
+                stat = os.stat(current)
+            except OSError:
+                continue
+            
+            listing = self.manifest.directory(current, stat)
+            if listing is None:
+                files, subdirs = self._scan_directory(current)
+                self.manifest.record_directory(current, stat, files, subdirs)
+            else:
+                files, subdirs = listing["files"], listing["subdirs"]
+            
+            agent_files.extend(os.path.join(current, name) for name in files)
+            pending.extend(os.path.join(current, name) for name in reversed(subdirs))
         
         return agent_files
     
+    @staticmethod
+    def _scan_directory(path: str) -> "tuple":
+        """List the agent files and searchable subdirectories of a directory."""
+        files: List[str] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if (entry.name in IGNORED_DIRS or entry.name.endswith(".egg-info")
+                                or os.path.exists(os.path.join(entry.path, "pyvenv.cfg"))):
+                            continue
+                        subdirs.append(entry.name)
+                    elif entry.name in AGENT_FILE_NAMES:
+                        files.append(entry.name)
+        except OSError:
+            pass
+        return sorted(files), sorted(subdirs)
+    
+    def save_manifest(self) -> None:
+        """Persist the discovery manifest."""
+        self.manifest.save()
+    
     def load_agent_file(self, file_path: str) -> List[Type[Agent]]:
         """
         Load agents from a file.
         
+        Files recorded in the discovery manifest as defining no agents are
+        skipped without importing them while they are unchanged.
+        
         Args:
             file_path: Path to the agent file
             
@@ -136,32 +385,141 @@ class AgentLoader:
             List of loaded agent classes
         """
         try:
-            # Import the module
+            stat = os.stat(file_path)
+            known_agents = self.manifest.agents_in(file_path, stat)
+            if known_agents == []:
+                return []
+            
+            # Import the module under a stable name, replacing the previous generation
             module_name = f"solta_agent_{Path(file_path).stem}_{hash(file_path)}"
             spec = importlib.util.spec_from_file_location(module_name, file_path)
             if spec is None or spec.loader is None:
                 raise AgentLoadError(f"Could not load spec for {file_path}")
                 
             module = importlib.util.module_from_spec(spec)
+            previous_module = sys.modules.get(module_name)
             sys.modules[module_name] = module
-            spec.loader.exec_module(module)
+            try:
+                spec.loader.exec_module(module)
+            except BaseException:
+                # Keep serving the previous generation if the new one is broken
+                if previous_module is not None:
+                    sys.modules[module_name] = previous_module
+                else:
+                    sys.modules.pop(module_name, None)
+                raise
+            if previous_module is not None:
+                self.track_retired(previous_module)
+            self.module_generations[file_path] = self.module_generations.get(file_path, 0) + 1
+            
+            # Find agent classes, using the manifest's names when available
+            members = None
+            if known_agents is not None:
+                members = [(name, getattr(module, name, None)) for name in known_agents]
+                if not all(self._is_agent_class(item) for _, item in members):
+                    members = None
+            if members is None:
+                members = [
+                    (item_name, item) for item_name, item in inspect.getmembers(module)
+                    if self._is_agent_class(item)
+                ]
+                self.manifest.record_file(file_path, stat, [name for name, _ in members])
+            
+            # Forget classes of the previous generation before recording the new ones
+            for unique_name in self._unique_names_for(file_path):
+                del self.loaded_agents[unique_name]
+                del self.agent_paths[unique_name]
             
-            # Find agent classes
             agents = []
-            for item_name, item in inspect.getmembers(module):
-                if (inspect.isclass(item) and 
-                    issubclass(item, Agent) and 
-                    item != Agent):
-                    agents.append(item)
-                    unique_name = f"{item_name}_{hash(file_path)}"
-                    self.loaded_agents[unique_name] = item
-                    self.agent_paths[unique_name] = file_path
+            for item_name, item in members:
+                agents.append(item)
+                unique_name = f"{item_name}_{hash(file_path)}"
+                self.loaded_agents[unique_name] = item
+                self.agent_paths[unique_name] = file_path
             
             return agents
             
         except Exception as e:
             raise AgentLoadError(f"Error loading {file_path}: {str(e)}")
     
+    @staticmethod
+    def _is_agent_class(item: Any) -> bool:
+        return inspect.isclass(item) and issubclass(item, Agent) and item != Agent
+    
+    def _unique_names_for(self, file_path: str) -> List[str]:
+        return [name for name, path in self.agent_paths.items() if path == file_path]
+    
+    def agent_names_for(self, file_path: str) -> Set[str]:
+        """Class names of the agents currently loaded from a file."""
+        return {self.loaded_agents[name].__name__ for name in self._unique_names_for(file_path)}
+    
+    def unload_agent_file(self, file_path: str) -> Set[str]:
+        """
+        Forget an agent file and evict its module.
+        
+        Returns:
+            Class names of the agents the file defined
+        """
+        names = self.agent_names_for(file_path)
+        for unique_name in self._unique_names_for(file_path):
+            del self.loaded_agents[unique_name]
+            del self.agent_paths[unique_name]
+        module = sys.modules.pop(f"solta_agent_{Path(file_path).stem}_{hash(file_path)}", None)
+        if module is not None:
+            self.track_retired(module)
+        self.module_generations.pop(file_path, None)
+        return names
+    
+    def evict_modules(self, paths: List[str]) -> int:
+        """
+        Remove imported modules loaded from changed files (or from under
+        changed directories) from sys.modules, so the next import runs
+        their new code.
+        
+        Returns:
+            Number of evicted modules
+        """
+        files = {path for path in paths if path.endswith('.py')}
+        prefixes = tuple(path + os.sep for path in paths if not path.endswith('.py'))
+        evicted = 0
+        for name, module in list(sys.modules.items()):
+            module_file = getattr(module, '__file__', None)
+            if not module_file or name.startswith('solta_agent_'):
+                continue
+            module_file = os.path.realpath(module_file)
+            if module_file in files or (prefixes and module_file.startswith(prefixes)):
+                del sys.modules[name]
+                # `from package import helper` would find the old attribute
+                package, _, attribute = name.rpartition('.')
+                parent = sys.modules.get(package) if package else None
+                if parent is not None and getattr(parent, attribute, None) is module:
+                    delattr(parent, attribute)
+                self.track_retired(module)
+                evicted += 1
+        return evicted
+    
+    def track_retired(self, obj: Any) -> None:
+        """Keep a weak reference to a superseded module or agent."""
+        try:
+            self._retired.append(weakref.ref(obj))
+        except TypeError:
+            pass
+    
+    def retired_alive(self, collect: bool = True) -> int:
+        """
+        Count superseded modules and agents that are still referenced.
+        
+        A number that keeps growing across reloads means something (a route,
+        a task, a global cache) still holds on to old generations.
+        
+        Args:
+            collect: Run the garbage collector first
+        """
+        if collect:
+            gc.collect()
+        self._retired = [ref for ref in self._retired if ref() is not None]
+        return len(self._retired)
+    
     async def reload_agent_file(self, file_path: str) -> None:
         """
         Reload agents from a modified file.
@@ -173,14 +531,8 @@ class AgentLoader:
             return
             
         try:
-            # Find agents that need to be reloaded
-            agents_to_reload = [
-                name for name, path in self.agent_paths.items()
-                if path == file_path
-            ]
-            
             # Load the updated agents
-            updated_agents = self.load_agent_file(file_path)
+            updated_agents = self.load_agent_file(os.path.realpath(file_path))
             
             # Update the client's agents
             for agent_cls in updated_agents:
@@ -188,17 +540,3 @@ class AgentLoader:
                 
         except Exception as e:
             raise AgentReloadError(f"Error reloading {file_path}: {str(e)}")
-    
-    def resolve_dependencies(self, agent_cls: Type[Agent]) -> List[str]:
-        """
-        Resolve dependencies for an agent.
-        
-        Args:
-            agent_cls: Agent class to resolve dependencies for
-            
-        Returns:
-            List of required tool names
-        """
-        # For now, we'll just look for required tools in the class
-        required_tools = getattr(agent_cls, 'required_tools', [])
-        return required_tools
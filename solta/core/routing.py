@@ -0,0 +1,539 @@
+"""
+Content-based routing rules for Solta framework
+"""
+import asyncio
+import math
+import re
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse
+
+_MISSING = object()
+
+Embedder = Callable[[str], Any]
+
+
+def _split_path(path: Optional[str]) -> Tuple[str, ...]:
+    """Split a dotted message path into its key segments."""
+    if not path:
+        return ()
+    return tuple(path.split("."))
+
+
+def _resolve_path(message: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    """Follow a key path through nested dicts, returning _MISSING if absent."""
+    value: Any = message
+    for segment in path:
+        if not isinstance(value, dict) or segment not in value:
+            return _MISSING
+        value = value[segment]
+    return value
+
+
+def _collect_text(value: Any, parts: List[str]) -> None:
+    """Collect every string found in a (possibly nested) message value."""
+    if isinstance(value, str):
+        parts.append(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_text(item, parts)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_text(item, parts)
+
+
+def extract_text(message: Dict[str, Any], field: Tuple[str, ...]) -> Optional[str]:
+    """
+    Extract the text a rule matches against.
+
+    With an empty field path every string in the message is joined together,
+    otherwise the value at the path is used if it is a string.
+    """
+    if not field:
+        parts: List[str] = []
+        _collect_text(message, parts)
+        return "\x00".join(parts) if parts else None
+    value = _resolve_path(message, field)
+    return value if isinstance(value, str) else None
+
+
+class RouteRule:
+    """
+    Base class for routing rules.
+
+    Rules are declarative: they describe what a message must look like and
+    are compiled by the RuleEngine into shared lookup structures instead of
+    being evaluated one by one.
+    """
+
+    def __init__(self, field: Optional[str] = None):
+        self.field = field
+        self.path = _split_path(field)
+
+
+class FieldRule(RouteRule):
+    """
+    Match on a message field.
+
+    Example:
+        FieldRule("calculate")                       # key is present
+        FieldRule("memory.operation", "store")       # nested value equals
+        FieldRule("priority", predicate=lambda p: p > 5)
+    """
+
+    def __init__(
+        self,
+        field: str,
+        value: Any = _MISSING,
+        predicate: Optional[Callable[[Any], bool]] = None
+    ):
+        if not field:
+            raise ValueError("FieldRule requires a field path")
+        super().__init__(field)
+        self.value = value
+        self.predicate = predicate
+
+
+class KeywordRule(RouteRule):
+    """
+    Match when any of the keywords occurs in the message text
+    (case-insensitive substring match).
+
+    Example:
+        KeywordRule(["remember", "recall"], field="prompt")
+    """
+
+    def __init__(self, keywords: Union[str, Iterable[str]], field: Optional[str] = None):
+        super().__init__(field)
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        self.keywords = [keyword.lower() for keyword in keywords if keyword]
+        if not self.keywords:
+            raise ValueError("KeywordRule requires at least one keyword")
+
+
+class RegexRule(RouteRule):
+    """
+    Match when the regular expression is found in the message text.
+
+    Example:
+        RegexRule(r"\\d+\\s*[-+*/]\\s*\\d+", field="prompt")
+    """
+
+    def __init__(self, pattern: Union[str, "re.Pattern"], field: Optional[str] = None, flags: int = 0):
+        super().__init__(field)
+        self.pattern = re.compile(pattern, flags) if isinstance(pattern, str) else pattern
+
+
+class EmbeddingRule(RouteRule):
+    """
+    Match when the message text is semantically close to a class of examples.
+
+    Examples can be strings (embedded once with the router's embedder) or
+    precomputed vectors; either way the router needs an embedder for the
+    message text. Among all embedding rules on the same field only the
+    best scoring class above its threshold matches.
+
+    Example:
+        EmbeddingRule(["what is 2 + 2", "compute the sum"], threshold=0.75)
+    """
+
+    def __init__(
+        self,
+        examples: Sequence[Union[str, Sequence[float]]],
+        threshold: float = 0.8,
+        field: Optional[str] = None
+    ):
+        super().__init__(field)
+        if not examples:
+            raise ValueError("EmbeddingRule requires at least one example")
+        self.examples = list(examples)
+        self.threshold = threshold
+
+
+class _TrieNode:
+    """Node of the compiled field-rule trie."""
+
+    __slots__ = ("children", "present", "equals", "checks")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.present: List[int] = []
+        self.equals: Dict[Any, List[int]] = {}
+        self.checks: List[Tuple[int, Any, Optional[Callable[[Any], bool]]]] = []
+
+
+class _KeywordAutomaton:
+    """Aho-Corasick automaton matching many keywords in one pass over the text."""
+
+    def __init__(self, keywords: Dict[str, Set[int]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[Set[int]] = [set()]
+
+        for keyword, rule_ids in keywords.items():
+            state = 0
+            for char in keyword:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(set())
+                state = next_state
+            self.output[state].update(rule_ids)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                if state == 0:
+                    continue
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] |= self.output[self.fail[next_state]]
+
+    def search(self, text: str, matched: Set[int]) -> None:
+        """Add the ids of every rule with a keyword in text to matched."""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                matched |= output[state]
+
+
+# Fields with at least this many regex rules with a literal get a prefilter
+# automaton even without keyword rules (below that, searching is cheaper)
+REGEX_PREFILTER_MIN = 8
+
+
+def _literal_runs(items: Any, runs: List[str]) -> None:
+    """Collect the runs of consecutive literal characters of a parsed pattern."""
+    run: List[str] = []
+    for op, av in items:
+        if op is _sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        if run:
+            runs.append("".join(run))
+            run = []
+        if op is _sre_parse.SUBPATTERN:
+            # A group at this level is part of every match
+            _literal_runs(av[-1], runs)
+    if run:
+        runs.append("".join(run))
+
+
+def _required_literal(pattern: "re.Pattern") -> Optional[str]:
+    """
+    Longest run of literal characters (lowercased) that every match of a
+    pattern contains, or None if there is none of two or more characters.
+
+    Only the top level and groups are searched (branches and repeats may
+    be skipped by a match). Case-insensitive patterns get None: their
+    matches need not contain the literal in lower case (re folds "ſ" to
+    "s", for example).
+    """
+    if not isinstance(pattern.pattern, str) or pattern.flags & re.IGNORECASE:
+        return None
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return None
+    runs: List[str] = []
+    _literal_runs(parsed, runs)
+    best = max(runs, key=len, default="")
+    # A capital sigma lowercases differently at the end of a word
+    if len(best) < 2 or "Σ" in best:
+        return None
+    return best.lower()
+
+
+class _RegexSet:
+    """
+    Regular expressions of one text field.
+
+    Each pattern's required literal (see _required_literal) can be added to
+    the field's keyword automaton, so the single pass over the text that
+    finds keywords also finds the few regex rules worth searching, and only
+    those patterns run. Patterns without a required literal are searched on
+    every message.
+    """
+
+    def __init__(self, patterns: List[Tuple[int, "re.Pattern"]]):
+        self.patterns: Dict[int, "re.Pattern"] = dict(patterns)
+        self.literals: Dict[str, Set[int]] = {}
+        for rule_id, pattern in patterns:
+            literal = _required_literal(pattern)
+            if literal is not None:
+                self.literals.setdefault(literal, set()).add(rule_id)
+        self.always: List[Tuple[int, "re.Pattern"]] = list(patterns)
+
+    def prefilter(self) -> None:
+        """Leave patterns with a literal to the automaton."""
+        filtered = {rule_id for rule_ids in self.literals.values() for rule_id in rule_ids}
+        self.always = [
+            (rule_id, pattern) for rule_id, pattern in self.patterns.items()
+            if rule_id not in filtered
+        ]
+
+    def search(self, text: str, candidates: Iterable[int], matched: Set[int]) -> None:
+        """Add the ids of the matching candidates and unfiltered patterns to matched."""
+        for rule_id, pattern in self.always:
+            if pattern.search(text):
+                matched.add(rule_id)
+        for rule_id in candidates:
+            if self.patterns[rule_id].search(text):
+                matched.add(rule_id)
+
+
+class RuleEngine:
+    """
+    Compiles routing rules into a decision structure.
+
+    This class:
+    1. Groups field rules into a key trie with hashed value lookups
+    2. Builds one Aho-Corasick automaton per text field for keyword rules
+    3. Adds the literal every match of a regular expression must contain to
+       the keyword automaton, so only regexes whose literal occurs are run
+    4. Scores embedding classes with a single similarity pass per field
+
+    Rules are compiled lazily on the first match after any change, so
+    selection cost does not grow linearly with the number of rules.
+    """
+
+    def __init__(self, embedder: Optional[Embedder] = None):
+        self.embedder = embedder
+        self._rules: List[Tuple[RouteRule, Any]] = []
+        self._target_ids: Set[int] = set()
+        self._compiled = False
+        self._trie = _TrieNode()
+        self._automata: Dict[Tuple[str, ...], _KeywordAutomaton] = {}
+        self._regexes: Dict[Tuple[str, ...], _RegexSet] = {}
+        self._embedding_rules: Dict[Tuple[str, ...], List[int]] = {}
+        self._embedding_classes: Dict[Tuple[str, ...], List[Tuple[int, float, List[List[float]]]]] = {}
+        self._text_fields: Set[Tuple[str, ...]] = set()
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def add(self, rule: RouteRule, target: Any) -> None:
+        """Add a rule that selects target when it matches."""
+        if not isinstance(rule, RouteRule):
+            raise TypeError("Routing rules must be RouteRule instances")
+        if isinstance(rule, EmbeddingRule) and self.embedder is None:
+            # Even precomputed examples are compared against the embedded message
+            raise ValueError("Embedding rules require the router to have an embedder")
+        self._rules.append((rule, target))
+        self._target_ids.add(id(target))
+        self._compiled = False
+
+    def remove_target(self, target: Any) -> None:
+        """Remove every rule that selects target."""
+        self._rules = [(rule, t) for rule, t in self._rules if t is not target]
+        self._target_ids.discard(id(target))
+        self._compiled = False
+
+    def replace_target(self, old: Any, new: Any) -> None:
+        """Point every rule selecting old at new instead."""
+        if id(old) not in self._target_ids:
+            return
+        self._rules = [(rule, new if t is old else t) for rule, t in self._rules]
+        self._target_ids.discard(id(old))
+        self._target_ids.add(id(new))
+
+    def targets(self) -> List[Any]:
+        """Targets that have at least one rule, in registration order."""
+        return list({id(t): t for _, t in self._rules}.values())
+
+    def has_target(self, target: Any) -> bool:
+        """Check whether target has any rule."""
+        return id(target) in self._target_ids
+
+    def compile(self) -> None:
+        """Compile the registered rules into lookup structures."""
+        trie = _TrieNode()
+        keywords: Dict[Tuple[str, ...], Dict[str, Set[int]]] = {}
+        regexes: Dict[Tuple[str, ...], List[Tuple[int, "re.Pattern"]]] = {}
+        embedding_rules: Dict[Tuple[str, ...], List[int]] = {}
+
+        for rule_id, (rule, _) in enumerate(self._rules):
+            if isinstance(rule, FieldRule):
+                node = trie
+                for segment in rule.path:
+                    node = node.children.setdefault(segment, _TrieNode())
+                if rule.predicate is not None:
+                    node.checks.append((rule_id, rule.value, rule.predicate))
+                elif rule.value is _MISSING:
+                    node.present.append(rule_id)
+                else:
+                    try:
+                        node.equals.setdefault(rule.value, []).append(rule_id)
+                    except TypeError:
+                        node.checks.append((rule_id, rule.value, None))
+            elif isinstance(rule, KeywordRule):
+                field_keywords = keywords.setdefault(rule.path, {})
+                for keyword in rule.keywords:
+                    field_keywords.setdefault(keyword, set()).add(rule_id)
+            elif isinstance(rule, RegexRule):
+                regexes.setdefault(rule.path, []).append((rule_id, rule.pattern))
+            elif isinstance(rule, EmbeddingRule):
+                embedding_rules.setdefault(rule.path, []).append(rule_id)
+
+        self._regexes = {}
+        for path, patterns in regexes.items():
+            regex_set = _RegexSet(patterns)
+            if regex_set.literals and (path in keywords or len(regex_set.literals) >= REGEX_PREFILTER_MIN):
+                # Regex candidates share the automaton under negative ids
+                field_keywords = keywords.setdefault(path, {})
+                for literal, rule_ids in regex_set.literals.items():
+                    field_keywords.setdefault(literal, set()).update(-1 - rule_id for rule_id in rule_ids)
+                regex_set.prefilter()
+            self._regexes[path] = regex_set
+
+        self._trie = trie
+        self._automata = {path: _KeywordAutomaton(words) for path, words in keywords.items()}
+        self._embedding_rules = embedding_rules
+        self._embedding_classes = {}
+        self._text_fields = set(self._automata) | set(self._regexes) | set(embedding_rules)
+        self._compiled = True
+
+    async def _embed(self, text: str) -> List[float]:
+        """Embed text with the configured embedder (sync or async)."""
+        vector = self.embedder(text)
+        if asyncio.iscoroutine(vector) or isinstance(vector, asyncio.Future):
+            vector = await vector
+        return _normalize(vector)
+
+    async def _embedding_class_table(
+        self,
+        path: Tuple[str, ...]
+    ) -> List[Tuple[int, float, List[List[float]]]]:
+        """Embed and normalize the examples of every embedding rule on a field once."""
+        table = self._embedding_classes.get(path)
+        if table is None:
+            table = []
+            for rule_id in self._embedding_rules[path]:
+                rule = self._rules[rule_id][0]
+                vectors = []
+                for example in rule.examples:
+                    if isinstance(example, str):
+                        vectors.append(await self._embed(example))
+                    else:
+                        vectors.append(_normalize(example))
+                table.append((rule_id, rule.threshold, vectors))
+            self._embedding_classes[path] = table
+        return table
+
+    def _match_fields(self, node: _TrieNode, value: Any, matched: Set[int]) -> None:
+        """Walk the trie alongside the message, collecting matching rules."""
+        if node.present:
+            matched.update(node.present)
+        if node.equals:
+            try:
+                rule_ids = node.equals.get(value)
+            except TypeError:
+                rule_ids = None
+            if rule_ids:
+                matched.update(rule_ids)
+        for rule_id, expected, predicate in node.checks:
+            try:
+                if predicate is not None:
+                    ok = predicate(value) and (expected is _MISSING or value == expected)
+                else:
+                    ok = value == expected
+            except Exception:
+                ok = False
+            if ok:
+                matched.add(rule_id)
+        if node.children and isinstance(value, dict):
+            if len(node.children) <= len(value):
+                for segment, child in node.children.items():
+                    if segment in value:
+                        self._match_fields(child, value[segment], matched)
+            else:
+                for segment, item in value.items():
+                    child = node.children.get(segment)
+                    if child is not None:
+                        self._match_fields(child, item, matched)
+
+    async def match(self, message: Dict[str, Any]) -> List[Any]:
+        """
+        Select the targets of all rules matching a message.
+
+        Returns:
+            Matching targets in rule registration order, without duplicates
+        """
+        if not self._rules:
+            return []
+        if not self._compiled:
+            self.compile()
+
+        matched: Set[int] = set()
+        self._match_fields(self._trie, message, matched)
+
+        for path in self._text_fields:
+            text = extract_text(message, path)
+            if text is None:
+                continue
+            automaton = self._automata.get(path)
+            candidates: List[int] = []
+            if automaton is not None:
+                found: Set[int] = set()
+                automaton.search(text, found)
+                for rule_id in found:
+                    if rule_id < 0:
+                        candidates.append(-1 - rule_id)
+                    else:
+                        matched.add(rule_id)
+            regexes = self._regexes.get(path)
+            if regexes is not None:
+                regexes.search(text, candidates, matched)
+            if path in self._embedding_rules and self.embedder is not None:
+                best = await self._best_embedding_class(path, text)
+                if best is not None:
+                    matched.add(best)
+
+        if not matched:
+            return []
+        targets: Dict[int, Any] = {}
+        for rule_id in sorted(matched):
+            target = self._rules[rule_id][1]
+            targets.setdefault(id(target), target)
+        return list(targets.values())
+
+    async def _best_embedding_class(self, path: Tuple[str, ...], text: str) -> Optional[int]:
+        """Return the best scoring embedding rule above its threshold."""
+        table = await self._embedding_class_table(path)
+        query = await self._embed(text)
+        best_id, best_score = None, -math.inf
+        for rule_id, threshold, vectors in table:
+            score = max(_dot(query, vector) for vector in vectors)
+            if score >= threshold and score > best_score:
+                best_id, best_score = rule_id, score
+        return best_id
+
+
+def _normalize(vector: Sequence[float]) -> List[float]:
+    """Scale a vector to unit length so dot products are cosine similarities."""
+    values = [float(x) for x in vector]
+    norm = math.sqrt(sum(x * x for x in values))
+    if norm == 0:
+        return values
+    return [x / norm for x in values]
+
+
+def _dot(a: Sequence[float], b: Sequence[float]) -> float:
+    """Dot product of two equally sized vectors."""
+    return sum(x * y for x, y in zip(a, b))
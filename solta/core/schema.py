@@ -0,0 +1,272 @@
+"""
+Tool parameter schemas for Solta framework
+"""
+import copy
+import numbers
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Validator = Callable[[Dict[str, Any]], Dict[str, Any]]
+ValueCheck = Callable[[Any, str], None]
+
+_TYPE_NAMES = {
+    "string": "a string",
+    "number": "a number",
+    "integer": "an integer",
+    "boolean": "a boolean",
+    "array": "an array",
+    "object": "an object",
+    "null": "null",
+}
+
+
+def _is_number(value: Any) -> bool:
+    return type(value) in (int, float) or (
+        isinstance(value, numbers.Real) and not isinstance(value, bool)
+    )
+
+
+def _is_integer(value: Any) -> bool:
+    return type(value) is int or (
+        isinstance(value, numbers.Integral) and not isinstance(value, bool)
+    )
+
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda value: isinstance(value, str),
+    "number": _is_number,
+    "integer": _is_integer,
+    "boolean": lambda value: isinstance(value, bool),
+    "array": lambda value: isinstance(value, (list, tuple)),
+    "object": lambda value: isinstance(value, dict),
+    "null": lambda value: value is None,
+}
+
+
+def is_pydantic_model(parameters: Any) -> bool:
+    """Whether parameters is a pydantic (v2) model class."""
+    return isinstance(parameters, type) and hasattr(parameters, "model_validate") \
+        and hasattr(parameters, "model_json_schema")
+
+
+def json_schema(parameters: Any) -> Dict[str, Any]:
+    """
+    JSON Schema of a tool's parameters.
+
+    Args:
+        parameters: Dict schema, pydantic model class or None
+    """
+    if parameters is None:
+        return {"type": "object", "properties": {}}
+    if is_pydantic_model(parameters):
+        return parameters.model_json_schema()
+    return copy.deepcopy(parameters)
+
+
+def compile_schema(parameters: Any) -> Optional[Validator]:
+    """
+    Compile a parameter schema into a validator.
+
+    Dict schemas use a JSON Schema subset (type, properties, required,
+    additionalProperties (false or a schema), default, enum, const, oneOf,
+    minimum/maximum, minLength/maxLength, minItems/maxItems, items, and
+    allOf of if/then rules whose `if` matches property values). They are turned into nested
+    closures, so validation does no schema lookups at call time. Pydantic
+    models validate through model_validate.
+
+    The validator returns the parameters with defaults filled in; it
+    raises ValueError for missing or out-of-range values and TypeError for
+    values of the wrong type.
+    """
+    if parameters is None:
+        return None
+    if is_pydantic_model(parameters):
+        return _pydantic_validator(parameters)
+    if not isinstance(parameters, dict):
+        raise TypeError(f"Tool parameters must be a dict schema or a pydantic model, got {parameters!r}")
+    return _compile_object(parameters, "")
+
+
+def _pydantic_validator(model: Any) -> Validator:
+    def validate(params: Dict[str, Any]) -> Dict[str, Any]:
+        # pydantic's ValidationError is a ValueError
+        return model.model_validate(params).model_dump()
+    return validate
+
+
+def _compile_object(schema: Dict[str, Any], path: str) -> Validator:
+    properties = schema.get("properties", {})
+    required = tuple(schema.get("required", ()))
+    checks: List[Tuple[str, ValueCheck]] = [
+        (name, _compile_value(subschema, f"{path}{name}"))
+        for name, subschema in properties.items()
+    ]
+    defaults = {
+        name: subschema["default"]
+        for name, subschema in properties.items()
+        if isinstance(subschema, dict) and "default" in subschema
+    }
+    additional = schema.get("additionalProperties", True)
+    allowed = frozenset(properties) if additional is not True else None
+    additional_check = _compile_value(additional, f"{path}*") if isinstance(additional, dict) else None
+    rules = [_compile_rule(rule, path) for rule in schema.get("allOf", ()) if "if" in rule]
+
+    def validate(params: Dict[str, Any]) -> Dict[str, Any]:
+        for name in required:
+            if name not in params:
+                raise ValueError(f"Parameter '{path}{name}' is required")
+        if allowed is not None:
+            for name in params:
+                if name in allowed:
+                    continue
+                if additional_check is None:
+                    raise ValueError(f"Unknown parameter '{path}{name}'")
+                additional_check(params[name], name)
+        for name, check in checks:
+            if name in params:
+                check(params[name], name)
+        for rule in rules:
+            rule(params)
+        if defaults:
+            missing = {name: value for name, value in defaults.items() if name not in params}
+            if missing:
+                params = {**copy.deepcopy(missing), **params}
+        return params
+
+    return validate
+
+
+def _compile_rule(rule: Dict[str, Any], path: str) -> Callable[[Dict[str, Any]], None]:
+    """Compile an if/then rule such as "key is required when operation is store"."""
+    conditions = []
+    for name, subschema in rule["if"].get("properties", {}).items():
+        if "const" in subschema:
+            conditions.append((name, (subschema["const"],)))
+        elif "enum" in subschema:
+            conditions.append((name, tuple(subschema["enum"])))
+    then = _compile_object(rule.get("then", {}), path)
+
+    def apply(params: Dict[str, Any]) -> None:
+        for name, values in conditions:
+            if name not in params or params[name] not in values:
+                return
+        then(params)
+
+    return apply
+
+
+def _compile_value(schema: Dict[str, Any], path: str) -> ValueCheck:
+    checks: List[ValueCheck] = []
+
+    types = schema.get("type")
+    if types is not None:
+        names = (types,) if isinstance(types, str) else tuple(types)
+        type_checks = tuple(_TYPE_CHECKS[name] for name in names)
+        expected = " or ".join(_TYPE_NAMES[name] for name in names)
+
+        def check_type(value: Any, name: str) -> None:
+            for type_check in type_checks:
+                if type_check(value):
+                    return
+            raise TypeError(f"Parameter '{path}' must be {expected}")
+        checks.append(check_type)
+
+    if "const" in schema or "enum" in schema:
+        allowed = (schema["const"],) if "const" in schema else tuple(schema["enum"])
+
+        def check_enum(value: Any, name: str) -> None:
+            if value not in allowed:
+                raise ValueError(
+                    f"Parameter '{path}' must be one of: {', '.join(map(str, allowed))} (got {value!r})"
+                )
+        checks.append(check_enum)
+
+    for keyword, compare, message in (
+        ("minimum", lambda value, bound: value >= bound, "at least"),
+        ("maximum", lambda value, bound: value <= bound, "at most"),
+    ):
+        if keyword in schema:
+            checks.append(_bound_check(path, schema[keyword], compare, f"must be {message}", len_of=None))
+    for keyword, compare, message in (
+        ("minLength", lambda size, bound: size >= bound, "at least"),
+        ("maxLength", lambda size, bound: size <= bound, "at most"),
+        ("minItems", lambda size, bound: size >= bound, "at least"),
+        ("maxItems", lambda size, bound: size <= bound, "at most"),
+    ):
+        if keyword in schema:
+            checks.append(_bound_check(path, schema[keyword], compare, f"length must be {message}", len_of=len))
+
+    if isinstance(schema.get("items"), dict):
+        item_check = _compile_value(schema["items"], f"{path}[]")
+
+        def check_items(value: Any, name: str) -> None:
+            if isinstance(value, (list, tuple)):
+                for item in value:
+                    item_check(item, name)
+        checks.append(check_items)
+
+    if "oneOf" in schema:
+        options = [_compile_value(option, path) for option in schema["oneOf"]]
+
+        def check_one_of(value: Any, name: str) -> None:
+            matched = 0
+            for option in options:
+                try:
+                    option(value, name)
+                except (TypeError, ValueError):
+                    continue
+                matched += 1
+            if matched != 1:
+                raise TypeError(f"Parameter '{path}' must match exactly one of its allowed schemas")
+        checks.append(check_one_of)
+
+    if "properties" in schema or "required" in schema or isinstance(schema.get("additionalProperties"), dict):
+        object_check = _compile_object(schema, f"{path}.")
+
+        def check_object(value: Any, name: str) -> None:
+            if isinstance(value, dict):
+                object_check(value)
+        checks.append(check_object)
+
+    if not checks:
+        return lambda value, name: None
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value: Any, name: str) -> None:
+        for check in checks:
+            check(value, name)
+    return check_all
+
+
+def _bound_check(
+    path: str,
+    bound: Any,
+    compare: Callable[[Any, Any], bool],
+    message: str,
+    len_of: Optional[Callable[[Any], int]]
+) -> ValueCheck:
+    def check(value: Any, name: str) -> None:
+        try:
+            measured = len_of(value) if len_of is not None else value
+            ok = compare(measured, bound)
+        except TypeError:
+            # Wrong types are reported by the type check
+            return
+        if not ok:
+            raise ValueError(f"Parameter '{path}' {message} {bound}")
+    return check
+
+
+_validators: "weakref.WeakKeyDictionary[type, Tuple[Any, Optional[Validator]]]" = weakref.WeakKeyDictionary()
+
+
+def validator_for(tool_cls: type) -> Optional[Validator]:
+    """Validator of a tool class, compiled on first use and cached per class."""
+    parameters = getattr(tool_cls, "parameters", None)
+    cached = _validators.get(tool_cls)
+    if cached is not None and cached[0] is parameters:
+        return cached[1]
+    validator = compile_schema(parameters)
+    _validators[tool_cls] = (parameters, validator)
+    return validator
@@ -0,0 +1,276 @@
+"""
+HTTP/WebSocket ingress server for Solta framework
+"""
+import asyncio
+import json
+from typing import Any, Dict, Optional, Set
+
+from aiohttp import web, WSMsgType
+
+from .batching import MessageOutcome
+
+
+def _dumps(value: Any) -> str:
+    """Serialize a response, falling back to str() for unknown types."""
+    return json.dumps(value, default=str)
+
+
+def _outcome_payload(outcome: MessageOutcome) -> Dict[str, Any]:
+    """JSON payload of a single message outcome."""
+    payload: Dict[str, Any] = {"index": outcome.index, "response": outcome.response}
+    if outcome.error is not None:
+        payload["error"] = f"{type(outcome.error).__name__}: {outcome.error}"
+    return payload
+
+
+class IngressServer:
+    """
+    Built-in HTTP/WebSocket server feeding a running Client.
+
+    Endpoints:
+    1. POST /messages - process one JSON message (or a JSON list of messages)
+       and return the router's response
+    2. POST /messages/stream - process a JSON list or NDJSON body and stream
+       each outcome back as a Server-Sent Event as soon as it is ready
+    3. GET /ws - WebSocket; every JSON frame is processed concurrently and
+       answered with {"id", "response"} (or "error")
+    4. GET /health - readiness and load information
+
+    Requests beyond max_concurrent_requests and WebSockets beyond
+    max_websockets are answered with 503; WebSocket frames count towards
+    max_concurrent_requests too and are answered with an error frame when
+    over it. A WebSocket stops being read while max_pending_frames of its
+    frames are being processed. On stop() the server drains:
+    new requests are refused, in-flight ones are allowed to finish (up to
+    drain_timeout) and WebSockets are closed afterwards.
+    """
+
+    def __init__(
+        self,
+        client,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        max_concurrent_requests: int = 256,
+        max_websockets: int = 64,
+        max_pending_frames: int = 32,
+        keepalive_timeout: float = 75.0,
+        stream_concurrency: int = 16,
+        drain_timeout: float = 30.0,
+        backlog: int = 128
+    ):
+        self.client = client
+        self.host = host
+        self.port = port
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_websockets = max_websockets
+        self.max_pending_frames = max_pending_frames
+        self.keepalive_timeout = keepalive_timeout
+        self.stream_concurrency = stream_concurrency
+        self.drain_timeout = drain_timeout
+        self.backlog = backlog
+
+        self.draining = False
+        self.in_flight = 0
+        self.rejected = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._websockets: Set[web.WebSocketResponse] = set()
+        self._runner: Optional[web.AppRunner] = None
+        self._app = self._build_app()
+
+    def _build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._admission])
+        app.router.add_post("/messages", self._handle_message)
+        app.router.add_post("/messages/stream", self._handle_stream)
+        app.router.add_get("/ws", self._handle_websocket)
+        app.router.add_get("/health", self._handle_health)
+        return app
+
+    def _enter(self) -> None:
+        self.in_flight += 1
+        self._idle.clear()
+
+    def _exit(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+
+    @web.middleware
+    async def _admission(self, request: web.Request, handler):
+        """Refuse work while draining or over the concurrency limit."""
+        if request.path == "/health":
+            return await handler(request)
+        if self.draining:
+            self.rejected += 1
+            return web.json_response(
+                {"error": "Server is shutting down"},
+                status=503,
+                headers={"Connection": "close"}
+            )
+        if request.path == "/ws":
+            # Each WebSocket frame is counted individually while it is processed
+            return await handler(request)
+        if self.in_flight >= self.max_concurrent_requests:
+            self.rejected += 1
+            return web.json_response({"error": "Too many concurrent requests"}, status=503)
+
+        self._enter()
+        try:
+            return await handler(request)
+        finally:
+            self._exit()
+
+    async def _read_json(self, request: web.Request) -> Any:
+        try:
+            return await request.json(loads=json.loads)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise web.HTTPBadRequest(text=_dumps({"error": f"Invalid JSON: {e}"}),
+                                     content_type="application/json")
+
+    async def _handle_message(self, request: web.Request) -> web.Response:
+        payload = await self._read_json(request)
+
+        if isinstance(payload, list):
+            result = await self.client.process_many(payload, concurrency=self.stream_concurrency)
+            return web.json_response(
+                {
+                    "results": [_outcome_payload(outcome) for outcome in result],
+                    "stats": result.stats.to_dict()
+                },
+                dumps=_dumps
+            )
+
+        if not isinstance(payload, dict):
+            raise web.HTTPBadRequest(text=_dumps({"error": "Message must be a JSON object"}),
+                                     content_type="application/json")
+        try:
+            response = await self.client.process_message(payload)
+        except Exception as e:
+            return web.json_response({"error": f"{type(e).__name__}: {e}"}, status=500, dumps=_dumps)
+        return web.json_response({"response": response}, dumps=_dumps)
+
+    async def _handle_stream(self, request: web.Request) -> web.StreamResponse:
+        if request.content_type == "application/x-ndjson":
+            text = await request.text()
+            try:
+                messages = [json.loads(line) for line in text.splitlines() if line.strip()]
+            except json.JSONDecodeError as e:
+                raise web.HTTPBadRequest(text=_dumps({"error": f"Invalid JSON: {e}"}),
+                                         content_type="application/json")
+        else:
+            messages = await self._read_json(request)
+            if isinstance(messages, dict):
+                messages = [messages]
+        if not isinstance(messages, list):
+            raise web.HTTPBadRequest(text=_dumps({"error": "Expected a list of messages"}),
+                                     content_type="application/json")
+
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+        })
+        await response.prepare(request)
+        async for outcome in self.client.process_stream(messages, concurrency=self.stream_concurrency):
+            await response.write(f"data: {_dumps(_outcome_payload(outcome))}\n\n".encode("utf-8"))
+        await response.write(b"event: end\ndata: {}\n\n")
+        await response.write_eof()
+        return response
+
+    async def _handle_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        if len(self._websockets) >= self.max_websockets:
+            self.rejected += 1
+            return web.json_response({"error": "Too many WebSocket connections"}, status=503)
+
+        ws = web.WebSocketResponse(heartbeat=self.keepalive_timeout / 2)
+        await ws.prepare(request)
+        self._websockets.add(ws)
+        pending: Set[asyncio.Task] = set()
+
+        async def answer(request_id: Any, message: Any) -> None:
+            # Entered by the reader when the frame was admitted
+            try:
+                if not isinstance(message, dict):
+                    raise ValueError("Message must be a JSON object")
+                response = await self.client.process_message(message)
+                reply = {"id": request_id, "response": response}
+            except Exception as e:
+                reply = {"id": request_id, "error": f"{type(e).__name__}: {e}"}
+            finally:
+                self._exit()
+            if not ws.closed:
+                await ws.send_str(_dumps(reply))
+
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT:
+                    if self.draining:
+                        await ws.send_str(_dumps({"error": "Server is shutting down"}))
+                        continue
+                    try:
+                        frame = json.loads(msg.data)
+                    except json.JSONDecodeError as e:
+                        await ws.send_str(_dumps({"error": f"Invalid JSON: {e}"}))
+                        continue
+                    request_id = frame.get("id") if isinstance(frame, dict) else None
+                    message = frame.get("message", frame) if isinstance(frame, dict) else frame
+                    if self.in_flight >= self.max_concurrent_requests:
+                        self.rejected += 1
+                        await ws.send_str(_dumps({"id": request_id, "error": "Too many concurrent requests"}))
+                        continue
+                    self._enter()
+                    task = asyncio.ensure_future(answer(request_id, message))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                    # Stop reading frames until this connection's backlog drops
+                    if len(pending) >= self.max_pending_frames:
+                        await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                elif msg.type == WSMsgType.ERROR:
+                    break
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            self._websockets.discard(ws)
+        return ws
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "status": "draining" if self.draining else "ok",
+            "in_flight": self.in_flight,
+            "websockets": len(self._websockets),
+            "rejected": self.rejected,
+        })
+
+    async def start(self) -> None:
+        """Start listening for connections."""
+        self._runner = web.AppRunner(
+            self._app,
+            keepalive_timeout=self.keepalive_timeout,
+            handle_signals=False,
+            access_log=None
+        )
+        await self._runner.setup()
+        site = web.TCPSite(
+            self._runner,
+            self.host,
+            self.port,
+            backlog=self.backlog
+        )
+        await site.start()
+        print(f"Ingress server listening on http://{self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        """Drain in-flight work and stop the server."""
+        if self._runner is None:
+            return
+        self.draining = True
+
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"Ingress server drain timed out with {self.in_flight} requests in flight")
+
+        for ws in list(self._websockets):
+            await ws.close(code=1001, message=b"Server shutdown")
+
+        await self._runner.cleanup()
+        self._runner = None
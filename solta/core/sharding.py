@@ -0,0 +1,465 @@
+"""
+Sharded multi-process client for Solta framework
+"""
+import asyncio
+import bisect
+import concurrent.futures
+import hashlib
+import itertools
+import multiprocessing
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Type, Union
+
+from .agent import Agent
+
+ShardKey = Union[str, Callable[[Dict[str, Any]], Any]]
+
+
+class ShardError(RuntimeError):
+    """Raised when a shard worker fails to process a message."""
+    pass
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping keys to nodes.
+
+    Each node is placed on the ring at several virtual points so keys spread
+    evenly, and adding or removing a node only moves the keys that belonged
+    to the neighbouring points (about 1/n of them).
+    """
+
+    def __init__(self, nodes: Optional[List[str]] = None, replicas: int = 64):
+        self.replicas = replicas
+        self._points: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self.nodes: Set[str] = set()
+        for node in nodes or []:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+    def add(self, node: str) -> None:
+        """Place a node on the ring."""
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            self._owners[point] = node
+            bisect.insort(self._points, point)
+
+    def remove(self, node: str) -> None:
+        """Take a node off the ring."""
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        for replica in range(self.replicas):
+            point = self._hash(f"{node}#{replica}")
+            if self._owners.pop(point, None) is not None:
+                index = bisect.bisect_left(self._points, point)
+                del self._points[index]
+
+    def get(self, key: Any) -> str:
+        """Return the node owning a key."""
+        if not self._points:
+            raise ShardError("No shards available")
+        index = bisect.bisect(self._points, self._hash(str(key)))
+        if index == len(self._points):
+            index = 0
+        return self._owners[self._points[index]]
+
+
+def _shard_worker(
+    shard_id: str,
+    client_options: Dict[str, Any],
+    agent_classes: List[Type[Agent]],
+    inbox: "multiprocessing.Queue",
+    outbox: "multiprocessing.Queue"
+) -> None:
+    """Entry point of a shard process: run a full Client and serve its inbox."""
+    from .client import Client
+
+    if client_options.get("snapshot_path"):
+        # Every shard snapshots the conversations it owns to its own file
+        client_options = {**client_options, "snapshot_path": f"{client_options['snapshot_path']}.{shard_id}"}
+
+    async def serve() -> None:
+        client = Client(**client_options)
+        for agent_cls in agent_classes:
+            client.agent(agent_cls)
+        try:
+            await client.start()
+        except Exception as e:
+            outbox.put(("failed", shard_id, None, None, f"{type(e).__name__}: {e}"))
+            return
+        outbox.put(("ready", shard_id, None, None, None))
+
+        loop = asyncio.get_running_loop()
+        pending: Set[asyncio.Task] = set()
+
+        async def handle(request_id: int, message: Dict[str, Any]) -> None:
+            try:
+                response = await client.process_message(message)
+                outbox.put(("result", shard_id, request_id, response, None))
+            except Exception as e:
+                outbox.put(("result", shard_id, request_id, None, f"{type(e).__name__}: {e}"))
+
+        while True:
+            item = await loop.run_in_executor(None, inbox.get)
+            if item is None:
+                break
+            task = loop.create_task(handle(*item))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        # Drain in-flight messages before shutting the shard down
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await client._cleanup_async()
+        # Queued after every result, so the parent knows none are left in the pipe
+        outbox.put(("drained", shard_id, None, None, None))
+
+    asyncio.run(serve())
+
+
+class _Shard:
+    """Parent-side handle of a shard worker process."""
+
+    def __init__(self, shard_id: str):
+        self.shard_id = shard_id
+        self.process: Optional[multiprocessing.Process] = None
+        self.inbox: Optional["multiprocessing.Queue"] = None
+        self.ready: Optional[asyncio.Future] = None
+        self.drained: Optional[asyncio.Future] = None
+        self.in_flight: Set[int] = set()
+        self.restarts = 0
+        self.failures = 0
+        self.retry_at = 0.0
+        self.retiring = False
+
+
+class ShardedClient:
+    """
+    Client that spreads message processing over several worker processes.
+
+    This class:
+    1. Starts N worker processes, each running its own Client, router and agents
+    2. Routes messages by consistent hash of a conversation/session key
+    3. Restarts workers that die, keeping their position on the hash ring
+    4. Rebalances with minimal key movement when the worker count changes
+
+    Agents registered with the decorator must be importable (or the platform
+    must use the "fork" start method) so worker processes can construct them.
+
+    Agent state lives in the worker processes and is not migrated: a
+    conversation that moves to another shard (when the worker count changes
+    or while its shard is down) continues with that shard's agents, and a
+    restarted worker starts with fresh agents unless snapshot_path is set
+    (each shard restores its own snapshot file). A shard whose restart
+    fails is kept off the ring and retried with backoff (up to
+    max_restart_delay seconds apart) until it starts again.
+
+    The built-in ingress server (the Client's `server` option) is not
+    supported: each shard would bind the same address.
+
+    Example:
+        client = ShardedClient(
+            workers=4,
+            agent_dirs=["my_agents"],
+            shard_key="conversation_id"
+        )
+
+        @client.agent
+        class MyAgent(Agent):
+            ...
+
+        client.run()
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        router: str = "default",
+        agent_dirs: Optional[List[str]] = None,
+        shard_key: ShardKey = "conversation_id",
+        start_method: Optional[str] = None,
+        health_interval: float = 1.0,
+        drain_timeout: float = 30.0,
+        max_restart_delay: float = 60.0,
+        **config
+    ):
+        if workers < 1:
+            raise ValueError("At least one worker is required")
+        if config.get("server"):
+            raise ValueError("ShardedClient does not support the ingress server (each shard would bind the same address)")
+        self.workers = workers
+        self.shard_key = shard_key
+        self.health_interval = health_interval
+        self.drain_timeout = drain_timeout
+        self.max_restart_delay = max_restart_delay
+        self.client_options: Dict[str, Any] = {
+            "router": router,
+            "agent_dirs": agent_dirs or [],
+            **config
+        }
+        self.agent_classes: List[Type[Agent]] = []
+        self.shards: Dict[str, _Shard] = {}
+        self.ring = HashRing()
+        self._context = multiprocessing.get_context(start_method)
+        self._outbox: Optional["multiprocessing.Queue"] = None
+        self._results: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count()
+        self._round_robin = itertools.count()
+        self._shard_ids = itertools.count()
+        self._reader: Optional[threading.Thread] = None
+        self._monitor: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready = False
+
+    def agent(self, cls: Type[Agent]) -> Type[Agent]:
+        """Decorator to register an agent class with every shard."""
+        if not isinstance(cls, type) or not issubclass(cls, Agent):
+            raise TypeError("Decorator must be applied to an Agent class")
+        self.agent_classes.append(cls)
+        return cls
+
+    def _key_for(self, message: Dict[str, Any]) -> Any:
+        """Extract the affinity key of a message, if any."""
+        if callable(self.shard_key):
+            return self.shard_key(message)
+        return message.get(self.shard_key)
+
+    def _spawn(self, shard: _Shard) -> None:
+        """Start (or restart) the worker process of a shard."""
+        shard.inbox = self._context.Queue()
+        shard.ready = self._loop.create_future()
+        shard.drained = self._loop.create_future()
+        shard.process = self._context.Process(
+            target=_shard_worker,
+            args=(
+                shard.shard_id,
+                self.client_options,
+                self.agent_classes,
+                shard.inbox,
+                self._outbox
+            ),
+            name=f"solta-{shard.shard_id}",
+            daemon=True
+        )
+        shard.process.start()
+
+    async def _add_shard(self) -> _Shard:
+        """Start a new shard and put it on the ring once it is ready."""
+        shard = _Shard(f"shard-{next(self._shard_ids)}")
+        self.shards[shard.shard_id] = shard
+        self._spawn(shard)
+        try:
+            await shard.ready
+        except Exception:
+            self.shards.pop(shard.shard_id, None)
+            raise
+        self.ring.add(shard.shard_id)
+        return shard
+
+    async def _retire_shard(self, shard: _Shard) -> None:
+        """
+        Take a shard off the ring, let it drain and stop its process.
+
+        The worker finishes its in-flight messages and then sends a
+        "drained" marker after its last result; only requests still
+        unanswered once that marker is handled are failed. A worker that
+        does not exit within drain_timeout is terminated.
+        """
+        shard.retiring = True
+        self.ring.remove(shard.shard_id)
+        process = shard.process
+        if process is not None and process.is_alive():
+            shard.inbox.put(None)
+            await self._loop.run_in_executor(None, process.join, self.drain_timeout)
+            if process.is_alive():
+                print(f"Shard {shard.shard_id} did not drain within {self.drain_timeout}s, terminating")
+                process.terminate()
+                await self._loop.run_in_executor(None, process.join, 5)
+            elif process.exitcode == 0 and shard.drained is not None:
+                # The marker is flushed before the worker exits; wait for the
+                # reader thread to hand it (and every result before it) over
+                try:
+                    await asyncio.wait_for(asyncio.shield(shard.drained), 5)
+                except asyncio.TimeoutError:
+                    print(f"Shard {shard.shard_id} exited without confirming its drain")
+        self._fail_in_flight(shard, "Shard retired before responding")
+        self.shards.pop(shard.shard_id, None)
+
+    def _read_results(self) -> None:
+        """Reader thread forwarding worker results to the event loop."""
+        while True:
+            item = self._outbox.get()
+            if item is None:
+                break
+            self._loop.call_soon_threadsafe(self._on_result, item)
+
+    def _on_result(self, item: tuple) -> None:
+        """Resolve the future waiting for a worker result."""
+        kind, shard_id, request_id, response, error = item
+        shard = self.shards.get(shard_id)
+
+        if kind in ("ready", "failed"):
+            if shard is not None and shard.ready is not None and not shard.ready.done():
+                if kind == "ready":
+                    shard.ready.set_result(None)
+                else:
+                    shard.ready.set_exception(ShardError(f"{shard_id} failed to start: {error}"))
+            return
+
+        if kind == "drained":
+            if shard is not None and shard.drained is not None and not shard.drained.done():
+                shard.drained.set_result(None)
+            return
+
+        if shard is not None:
+            shard.in_flight.discard(request_id)
+        future = self._results.pop(request_id, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(ShardError(f"{shard_id}: {error}"))
+        else:
+            future.set_result(response)
+
+    def _fail_in_flight(self, shard: _Shard, reason: str) -> None:
+        """Fail every request still waiting on a shard."""
+        for request_id in list(shard.in_flight):
+            future = self._results.pop(request_id, None)
+            if future is not None and not future.done():
+                future.set_exception(ShardError(f"{shard.shard_id}: {reason}"))
+        shard.in_flight.clear()
+
+    async def _watch_workers(self) -> None:
+        """Restart worker processes that exit unexpectedly."""
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for shard in list(self.shards.values()):
+                if shard.retiring or shard.process is None or shard.process.is_alive():
+                    continue
+                if self._loop.time() < shard.retry_at:
+                    continue
+                if shard.failures == 0:
+                    print(f"Shard {shard.shard_id} exited with code {shard.process.exitcode}, restarting")
+                self._fail_in_flight(shard, "Worker process exited")
+                shard.restarts += 1
+                self._spawn(shard)
+                try:
+                    await shard.ready
+                except Exception as e:
+                    # Keep the shard off the ring until a retry succeeds
+                    shard.failures += 1
+                    delay = min(self.health_interval * 2 ** shard.failures, self.max_restart_delay)
+                    shard.retry_at = self._loop.time() + delay
+                    print(f"Failed to restart shard {shard.shard_id}: {e}; retrying in {delay:.1f}s")
+                    self.ring.remove(shard.shard_id)
+                    self._fail_in_flight(shard, "Worker process failed to restart")
+                    continue
+                if shard.failures:
+                    print(f"Shard {shard.shard_id} restarted after {shard.failures} failed attempts")
+                    shard.failures = 0
+                    self.ring.add(shard.shard_id)
+
+    async def start(self) -> None:
+        """Start all shard workers."""
+        if self._ready:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._outbox = self._context.Queue()
+        self._reader = threading.Thread(target=self._read_results, name="solta-shard-results", daemon=True)
+        self._reader.start()
+
+        await asyncio.gather(*(self._add_shard() for _ in range(self.workers)))
+        self._monitor = self._loop.create_task(self._watch_workers())
+
+        self._ready = True
+        print(f"Sharded client ready with {len(self.shards)} workers")
+
+    async def resize(self, workers: int) -> None:
+        """
+        Change the number of worker processes.
+
+        New shards join the ring once ready; removed shards stop receiving
+        messages immediately and finish their in-flight work before exiting.
+        Consistent hashing keeps most conversations on their current shard;
+        the agent state of those that move is not carried over.
+        """
+        if workers < 1:
+            raise ValueError("At least one worker is required")
+
+        active = [shard for shard in self.shards.values() if not shard.retiring]
+        if workers > len(active):
+            await asyncio.gather(*(self._add_shard() for _ in range(workers - len(active))))
+        elif workers < len(active):
+            await asyncio.gather(*(self._retire_shard(shard) for shard in active[workers:]))
+        self.workers = workers
+
+    async def process_message(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Process a message on the shard owning its conversation key."""
+        if not self._ready:
+            raise RuntimeError("Client not ready. Call run() first.")
+
+        key = self._key_for(message)
+        if key is None:
+            nodes = sorted(self.ring.nodes)
+            if not nodes:
+                raise ShardError("No shards available")
+            shard_id = nodes[next(self._round_robin) % len(nodes)]
+        else:
+            shard_id = self.ring.get(key)
+        shard = self.shards[shard_id]
+
+        request_id = next(self._request_ids)
+        future = self._loop.create_future()
+        self._results[request_id] = future
+        shard.in_flight.add(request_id)
+        shard.inbox.put((request_id, message))
+        return await future
+
+    def send_message(self, message: Dict[str, Any]) -> concurrent.futures.Future:
+        """Send a message to be processed from any thread."""
+        if self._loop is None:
+            raise RuntimeError("Client not running")
+        return asyncio.run_coroutine_threadsafe(self.process_message(message), self._loop)
+
+    async def _cleanup_async(self) -> None:
+        """Stop all shards and the result reader."""
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+        await asyncio.gather(
+            *(self._retire_shard(shard) for shard in list(self.shards.values())),
+            return_exceptions=True
+        )
+
+        if self._outbox is not None:
+            self._outbox.put(None)
+            if self._reader is not None:
+                self._reader.join(timeout=5)
+            self._outbox = None
+            self._reader = None
+
+        self._ready = False
+
+    def run(self) -> None:
+        """Run the sharded client (blocking)."""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.start())
+            loop.run_forever()
+        except KeyboardInterrupt:
+            print("\nShutting down...")
+        finally:
+            loop.run_until_complete(self._cleanup_async())
+            loop.close()
+            self._loop = None
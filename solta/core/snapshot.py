@@ -0,0 +1,559 @@
+"""
+State snapshots for Solta framework
+"""
+import asyncio
+import concurrent.futures
+import os
+import pickle
+import struct
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# File header: magic, format version, codec id
+MAGIC = b"SOLTASNP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sBB")
+# Segment header: name length, buffer count, CRC-32 of body and buffers, body length
+SEGMENT = struct.Struct("<HIIQ")
+BUFFER = struct.Struct("<Q")
+
+CODECS = {"msgpack": 1, "pickle": 2}
+_CODEC_NAMES = {number: name for name, number in CODECS.items()}
+
+# Containers larger than this are encoded a chunk at a time
+CHUNK = 1024
+# Containers this close to the top of a state are always walked into
+_WALK_DEPTH = 3
+# msgpack extension type referring to an out-of-band buffer
+_BUFFER_EXT = 1
+
+
+def require_msgpack() -> None:
+    """
+    Raises:
+        ImportError: If msgpack, the default snapshot codec, is not installed
+    """
+    try:
+        import msgpack  # noqa: F401
+    except ImportError:
+        raise ImportError(
+            "Snapshots need msgpack: install it with `pip install solta[snapshot]` "
+            "(or opt in to the pickle codec with snapshot_codec=\"pickle\")"
+        ) from None
+
+
+class EncodedState:
+    """
+    Encoded snapshot state: the codec's body plus out-of-band buffers.
+
+    Buffers (memoryviews in the state, e.g. of NumPy arrays) are written
+    to the snapshot file as they are, without being copied into the body,
+    and are decoded as memoryviews of the file's data.
+    """
+
+    __slots__ = ("body", "buffers", "_checksum")
+
+    def __init__(self, body: bytes, buffers: List[Any]):
+        self.body = body
+        self.buffers = buffers
+        self._checksum: Optional[int] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(BUFFER.size + memoryview(buffer).nbytes for buffer in self.buffers)
+
+    def checksum(self) -> int:
+        """CRC-32 of the body and buffers (computed once)."""
+        if self._checksum is None:
+            checksum = zlib.crc32(self.body)
+            for buffer in self.buffers:
+                view = memoryview(buffer).cast("B")
+                checksum = zlib.crc32(view, zlib.crc32(BUFFER.pack(view.nbytes), checksum))
+            self._checksum = checksum
+        return self._checksum
+
+
+class _Chunk:
+    """Part of a large container; pickling each part calls back into Python."""
+
+    __slots__ = ("items",)
+
+    def __init__(self, items: Any):
+        self.items = items
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return _identity, (self.items,)
+
+
+class _Chunked:
+    """A large list or dict pickled as a sequence of chunks."""
+
+    __slots__ = ("join", "chunks")
+
+    def __init__(self, join: Callable[..., Any], chunks: List[_Chunk]):
+        self.join = join
+        self.chunks = chunks
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return self.join, tuple(self.chunks)
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _join_list(*chunks: List[Any]) -> List[Any]:
+    joined: List[Any] = []
+    for chunk in chunks:
+        joined.extend(chunk)
+    return joined
+
+
+def _join_dict(*chunks: Dict[Any, Any]) -> Dict[Any, Any]:
+    joined: Dict[Any, Any] = {}
+    for chunk in chunks:
+        joined.update(chunk)
+    return joined
+
+
+def _resolve(value: Any) -> Any:
+    """Call deferred values (zero-argument callables)."""
+    while callable(value) and not isinstance(value, type):
+        value = value()
+    return value
+
+
+def _encode_pickle(state: Any) -> EncodedState:
+    buffers: List[Any] = []
+
+    def prepare(value: Any, depth: int) -> Any:
+        value = _resolve(value)
+        if isinstance(value, memoryview):
+            return pickle.PickleBuffer(value)
+        kind = type(value)
+        if kind not in (list, tuple, dict) or (depth >= _WALK_DEPTH and len(value) <= CHUNK):
+            return value
+        if kind is dict:
+            chunks = [{}]
+            for key, item in value.items():
+                if len(chunks[-1]) == CHUNK:
+                    chunks.append({})
+                chunks[-1][key] = prepare(item, depth + 1)
+            if len(chunks) == 1:
+                return chunks[0]
+            return _Chunked(_join_dict, [_Chunk(chunk) for chunk in chunks])
+        items = [prepare(item, depth + 1) for item in value]
+        if len(items) <= CHUNK:
+            return kind(items)
+        # Tuples come back as lists, as with msgpack
+        return _Chunked(_join_list, [_Chunk(items[start:start + CHUNK]) for start in range(0, len(items), CHUNK)])
+
+    body = pickle.dumps(prepare(state, 0), protocol=5, buffer_callback=buffers.append)
+    return EncodedState(body, [buffer.raw() for buffer in buffers])
+
+
+def _encode_msgpack(state: Any) -> EncodedState:
+    import msgpack
+
+    buffers: List[Any] = []
+
+    def out_of_band(view: memoryview) -> Any:
+        buffers.append(view)
+        return msgpack.ExtType(_BUFFER_EXT, BUFFER.pack(len(buffers) - 1))
+
+    def default(value: Any) -> Any:
+        if isinstance(value, (set, frozenset)):
+            return list(value)
+        if callable(value) and not isinstance(value, type):
+            return _resolve(value)
+        raise TypeError(f"Cannot snapshot value of type {type(value).__name__}")
+
+    # Everything is packed into the packer's own buffer
+    packer = msgpack.Packer(use_bin_type=True, default=default, autoreset=False)
+
+    def pack(value: Any, depth: int) -> None:
+        value = _resolve(value)
+        kind = type(value)
+        if kind is memoryview:
+            # msgpack would copy memoryviews into the body
+            packer.pack(out_of_band(value))
+        elif kind not in (list, tuple, dict) or (depth >= _WALK_DEPTH and len(value) <= CHUNK):
+            packer.pack(value)
+        elif kind is dict:
+            packer.pack_map_header(len(value))
+            for key, item in value.items():
+                packer.pack(key)
+                pack(item, depth + 1)
+        else:
+            packer.pack_array_header(len(value))
+            for item in value:
+                pack(item, depth + 1)
+
+    pack(state, 0)
+    return EncodedState(packer.bytes(), buffers)
+
+
+def encode_state(state: Any, codec: str) -> EncodedState:
+    """
+    Encode snapshot state.
+
+    States hold dicts, lists, strings, numbers, None, bytes and
+    memoryviews (written out-of-band); tuples come back as lists. Any
+    value may be a zero-argument callable, called here to produce it.
+    Large containers are encoded a chunk at a time, so a worker thread
+    encoding a large state does not hold the GIL for long.
+    """
+    if codec == "msgpack":
+        return _encode_msgpack(state)
+    if codec == "pickle":
+        return _encode_pickle(state)
+    raise ValueError(f"Unknown snapshot codec: {codec!r}")
+
+
+def decode_state(encoded: EncodedState, codec: str) -> Any:
+    """Decode a state written by encode_state; buffers come back as memoryviews."""
+    if codec == "msgpack":
+        import msgpack
+
+        def ext_hook(code: int, data: bytes) -> Any:
+            if code == _BUFFER_EXT:
+                return memoryview(encoded.buffers[BUFFER.unpack(data)[0]])
+            return msgpack.ExtType(code, data)
+
+        return msgpack.unpackb(encoded.body, raw=False, strict_map_key=False, ext_hook=ext_hook)
+    if codec == "pickle":
+        return pickle.loads(encoded.body, buffers=encoded.buffers)
+    raise ValueError(f"Unknown snapshot codec: {codec!r}")
+
+
+def write_snapshot(path: str, segments: Dict[str, EncodedState], codec: str, fsync: bool = False) -> int:
+    """
+    Write encoded segments to a snapshot file.
+
+    The file is written next to the target and renamed over it, so a crash
+    mid-write leaves the previous snapshot intact.
+
+    Returns:
+        Size of the file in bytes
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    staging = f"{path}.tmp"
+    size = HEADER.size
+    with open(staging, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, CODECS[codec]))
+        for name, encoded in segments.items():
+            encoded_name = name.encode("utf-8")
+            f.write(SEGMENT.pack(len(encoded_name), len(encoded.buffers), encoded.checksum(), len(encoded.body)))
+            f.write(encoded_name)
+            f.write(encoded.body)
+            for buffer in encoded.buffers:
+                view = memoryview(buffer).cast("B")
+                f.write(BUFFER.pack(view.nbytes))
+                f.write(view)
+            size += SEGMENT.size + len(encoded_name) + encoded.size
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(staging, path)
+    return size
+
+
+def read_snapshot(path: str) -> Tuple[str, Dict[str, EncodedState]]:
+    """
+    Read the segments of a snapshot file without decoding them.
+
+    Segments failing their checksum, and a truncated tail, are skipped.
+
+    Returns:
+        The codec name and the encoded state of every segment by name
+
+    Raises:
+        ValueError: If the file is not a snapshot
+    """
+    with open(path, "rb") as f:
+        data = memoryview(f.read())
+    if len(data) < HEADER.size:
+        raise ValueError(f"Not a snapshot file: {path}")
+    magic, version, codec = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION or codec not in _CODEC_NAMES:
+        raise ValueError(f"Not a snapshot file (or unsupported version): {path}")
+
+    segments: Dict[str, EncodedState] = {}
+    offset = HEADER.size
+    while offset < len(data):
+        try:
+            name_length, count, checksum, body_length = SEGMENT.unpack_from(data, offset)
+            offset += SEGMENT.size
+            name = bytes(data[offset:offset + name_length]).decode("utf-8")
+            offset += name_length
+            body = data[offset:offset + body_length]
+            offset += body_length
+            buffers = []
+            for _ in range(count):
+                length, = BUFFER.unpack_from(data, offset)
+                offset += BUFFER.size
+                buffers.append(data[offset:offset + length])
+                offset += length
+            if offset > len(data) or len(body) != body_length:
+                raise struct.error("segment extends past the end of the file")
+        except (struct.error, UnicodeDecodeError):
+            print(f"Snapshot {path} is truncated; ignoring its last segment")
+            break
+        encoded = EncodedState(body, buffers)
+        if encoded.checksum() != checksum:
+            print(f"Snapshot segment '{name}' failed its checksum; skipping it")
+            continue
+        segments[name] = encoded
+    return _CODEC_NAMES[codec], segments
+
+
+class Snapshotter:
+    """
+    Periodic, incremental snapshots of agent and tool state in one file.
+
+    This class:
+    1. Writes one length-prefixed, checksummed segment per agent and per
+       tool, encoded with msgpack (pickle only when chosen explicitly)
+    2. Only re-encodes sources whose snapshot_version() changed since the
+       last snapshot; unchanged segments are written from their previous
+       encoding, and nothing is written when no segment changed
+    3. Collects state on the event loop (snapshot() returns copies, views
+       or deferred values) and encodes and writes it in worker threads,
+       a chunk at a time, so the loop keeps running meanwhile
+    4. Reads a snapshot and decodes its segments concurrently in worker
+       threads on restore
+
+    The pickle codec can run code when a snapshot is decoded, so it must
+    be chosen explicitly (codec="pickle") and only used for snapshots your
+    deployment wrote; a Snapshotter using msgpack refuses to restore a
+    pickle snapshot.
+
+    Raises:
+        ImportError: If the codec is msgpack and msgpack is not installed
+    """
+
+    def __init__(
+        self,
+        path: str,
+        interval: Optional[float] = 30.0,
+        codec: str = "msgpack",
+        fsync: bool = False,
+        workers: int = 4
+    ):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown snapshot codec: {codec!r} (expected one of: {', '.join(CODECS)})")
+        if codec == "msgpack":
+            require_msgpack()
+        self.path = path
+        self.interval = interval
+        self.codec = codec
+        self.fsync = fsync
+        self.workers = workers
+
+        # name -> (id of the source, its snapshot version, encoded state or None)
+        self._segments: Dict[str, Tuple[int, Any, Optional[EncodedState]]] = {}
+        self._restored: Dict[str, Any] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._worker: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+        self.snapshots = 0
+        self.skipped = 0
+        self.encoded_segments = 0
+        self.reused_segments = 0
+        self.errors = 0
+        self.last_bytes = 0
+        self.last_duration = 0.0
+        self.restored_segments = 0
+        self.restore_duration = 0.0
+
+    def _executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._worker is None:
+            self._worker = concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix="solta-snapshot")
+        return self._worker
+
+    async def load(self) -> Dict[str, Any]:
+        """
+        Read the snapshot file and decode its segments concurrently.
+
+        Decoded states are kept until taken with take(). A missing or
+        unreadable snapshot restores nothing.
+
+        Returns:
+            Decoded state by segment name
+        """
+        if not os.path.exists(self.path):
+            return {}
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        executor = self._executor()
+        try:
+            codec, segments = await loop.run_in_executor(executor, read_snapshot, self.path)
+        except (OSError, ValueError) as e:
+            print(f"Error reading snapshot {self.path}: {e}")
+            return {}
+        if codec == "pickle" and self.codec != "pickle":
+            print(f"Not restoring {self.path}: it uses the pickle codec, which needs snapshot_codec=\"pickle\"")
+            return {}
+
+        names = list(segments)
+        decoded = await asyncio.gather(
+            *(loop.run_in_executor(executor, decode_state, segments[name], codec) for name in names),
+            return_exceptions=True
+        )
+        for name, state in zip(names, decoded):
+            if isinstance(state, BaseException):
+                print(f"Error decoding snapshot segment '{name}': {state}")
+                continue
+            self._restored[name] = state
+        self.restored_segments = len(self._restored)
+        self.restore_duration = time.perf_counter() - started
+        return dict(self._restored)
+
+    def take(self, name: str) -> Any:
+        """Restored state of a segment (once), or None."""
+        return self._restored.pop(name, None)
+
+    def take_prefix(self, prefix: str) -> Dict[str, Any]:
+        """Restored states of the segments named prefix + suffix, by suffix (once)."""
+        names = [name for name in self._restored if name.startswith(prefix)]
+        return {name[len(prefix):]: self._restored.pop(name) for name in names}
+
+    def _encode(
+        self,
+        states: Dict[str, Any],
+        previous: Dict[str, Optional[EncodedState]]
+    ) -> Dict[str, Any]:
+        """Encode states in a worker thread; small unchanged states keep their old encoding."""
+        encoded: Dict[str, Any] = {}
+        for name, state in states.items():
+            try:
+                result = encode_state(state, self.codec)
+            except Exception as e:
+                encoded[name] = e
+                continue
+            old = previous.get(name)
+            if old is not None and not old.buffers and not result.buffers and old.body == result.body:
+                result = old
+            encoded[name] = result
+        return encoded
+
+    async def save(self, sources: Dict[str, Any]) -> bool:
+        """
+        Snapshot the given agents and tools (segment name -> source).
+
+        Returns:
+            Whether a new snapshot file was written
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            segments: Dict[str, Tuple[int, Any, Optional[EncodedState]]] = {}
+            states: Dict[str, Any] = {}
+            for name, source in sources.items():
+                previous = self._segments.get(name)
+                try:
+                    version = source.snapshot_version()
+                    if version is not None and previous is not None and previous[:2] == (id(source), version):
+                        segments[name] = previous
+                        self.reused_segments += 1
+                        continue
+                    state = source.snapshot()
+                except Exception as e:
+                    print(f"Error taking snapshot of {name}: {e}")
+                    self.errors += 1
+                    if previous is not None:
+                        segments[name] = (0, None, previous[2])
+                    continue
+                segments[name] = (id(source), version, None)
+                if state is not None:
+                    states[name] = state
+
+            if states:
+                encoded = await loop.run_in_executor(
+                    self._executor(),
+                    self._encode,
+                    states,
+                    {name: entry[2] for name, entry in self._segments.items()}
+                )
+                for name, result in encoded.items():
+                    if isinstance(result, Exception):
+                        print(f"Error encoding snapshot of {name}: {result}")
+                        self.errors += 1
+                        # Keep the last good encoding, and try again next time
+                        previous = self._segments.get(name)
+                        segments[name] = (0, None, previous[2] if previous is not None else None)
+                        continue
+                    segments[name] = segments[name][:2] + (result,)
+                    self.encoded_segments += 1
+
+            changed = set(segments) != set(self._segments) or any(
+                entry[2] is not self._segments[name][2] for name, entry in segments.items()
+            )
+            self._segments = segments
+            if not changed:
+                self.skipped += 1
+                return False
+
+            encoded_segments = {name: entry[2] for name, entry in segments.items() if entry[2] is not None}
+            self.last_bytes = await loop.run_in_executor(
+                self._executor(), write_snapshot, self.path, encoded_segments, self.codec, self.fsync
+            )
+            self.snapshots += 1
+            self.last_duration = time.perf_counter() - started
+            return True
+
+    def start(self, sources: Callable[[], Dict[str, Any]]) -> None:
+        """Snapshot the sources returned by `sources` every `interval` seconds."""
+        if self.interval is None or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(sources))
+
+    async def _run(self, sources: Callable[[], Dict[str, Any]]) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save(sources())
+            except Exception as e:
+                print(f"Error writing snapshot {self.path}: {e}")
+                self.errors += 1
+
+    async def stop(self, sources: Optional[Dict[str, Any]] = None) -> None:
+        """Stop the periodic snapshots, optionally taking a final one."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if sources is not None:
+            try:
+                await self.save(sources)
+            except Exception as e:
+                print(f"Error writing snapshot {self.path}: {e}")
+                self.errors += 1
+        if self._worker is not None:
+            self._worker.shutdown(wait=True)
+            self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot counters, sizes and timings."""
+        return {
+            "path": self.path,
+            "codec": self.codec,
+            "snapshots": self.snapshots,
+            "skipped": self.skipped,
+            "segments": sum(1 for entry in self._segments.values() if entry[2] is not None),
+            "encoded_segments": self.encoded_segments,
+            "reused_segments": self.reused_segments,
+            "errors": self.errors,
+            "last_bytes": self.last_bytes,
+            "last_duration": self.last_duration,
+            "restored_segments": self.restored_segments,
+            "restore_duration": self.restore_duration,
+        }
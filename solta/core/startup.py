@@ -0,0 +1,206 @@
+"""
+Agent startup helpers for Solta framework
+"""
+import asyncio
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Type
+
+from .agent import Agent
+from .dependencies import find_cycle
+
+
+class _PendingSnapshot:
+    """Restored tool state held for a lazy agent that has not been built."""
+
+    def __init__(self, state: Dict[str, Any]):
+        self.state = state
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self.state
+
+    def snapshot_version(self) -> Any:
+        return 0
+
+
+class LazyAgent(Agent):
+    """
+    Stand-in for an agent that is only constructed on its first message.
+
+    The router sees the LazyAgent like any other agent; the real agent is
+    instantiated and initialized (after its dependencies) the first time a
+    message is routed to it, so rarely used agents cost nothing at startup.
+    """
+
+    def __init__(
+        self,
+        agent_cls: Type[Agent],
+        dependencies: Optional[List[Agent]] = None,
+        prepare: Optional[Callable[[Agent], None]] = None
+    ):
+        super().__init__(name=agent_cls.__name__)
+        self.agent_cls = agent_cls
+        self.dependencies = dependencies or []
+        self.prepare = prepare
+        self._agent: Optional[Agent] = None
+        self._pending_state: Optional[Dict[str, Any]] = None
+        self._pending_snapshot: Optional[Dict[str, Any]] = None
+        self._pending_tools: Dict[str, _PendingSnapshot] = {}
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def is_resolved(self) -> bool:
+        """Whether the real agent has been constructed."""
+        return self._agent is not None
+
+    async def resolve(self) -> Agent:
+        """Construct and initialize the real agent if needed."""
+        if self._agent is not None:
+            return self._agent
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._agent is None:
+                for dependency in self.dependencies:
+                    if isinstance(dependency, LazyAgent):
+                        await dependency.resolve()
+                agent = self.agent_cls()
+                if self.prepare is not None:
+                    self.prepare(agent)
+                if self._pending_snapshot is not None:
+                    agent.restore(self._pending_snapshot)
+                    self._pending_snapshot = None
+                for name, pending in self._pending_tools.items():
+                    agent.restore_tool(name, pending.state)
+                self._pending_tools = {}
+                if self._pending_state is not None:
+                    agent.import_state(self._pending_state)
+                    self._pending_state = None
+                await agent.initialize()
+                self.name = agent.name
+                self._agent = agent
+        return self._agent
+
+    async def on_ready(self) -> None:
+        """Lazy agents have nothing to prepare until first use."""
+        pass
+
+    async def on_message(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Resolve the real agent and forward the message to it."""
+        agent = await self.resolve()
+        return await agent.handle(message)
+    
+    def export_state(self) -> Optional[Dict[str, Any]]:
+        """Export the real agent's state (or state still waiting to be imported)."""
+        if self._agent is not None:
+            return self._agent.export_state()
+        return self._pending_state
+    
+    def import_state(self, state: Dict[str, Any]) -> None:
+        """Import state into the real agent, or keep it until it is built."""
+        if self._agent is not None:
+            self._agent.import_state(state)
+        else:
+            self._pending_state = state
+    
+    def release_state(self) -> None:
+        """Release the real agent's exported state (pending state has no owner here)."""
+        if self._agent is not None:
+            self._agent.release_state()
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Snapshot the real agent (or the restored state it has not taken yet)."""
+        if self._agent is not None:
+            return self._agent.snapshot()
+        return self._pending_snapshot
+    
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Restore the real agent, or keep the state until it is built."""
+        if self._agent is not None:
+            self._agent.restore(state)
+        else:
+            self._pending_snapshot = state
+    
+    def snapshot_version(self) -> Any:
+        """The real agent's version; state waiting for it does not change."""
+        if self._agent is not None:
+            version = self._agent.snapshot_version()
+            return None if version is None else ("resolved", version)
+        return "pending"
+    
+    def snapshot_tools(self) -> Dict[str, Any]:
+        """The real agent's tools, or the tool state it has not taken yet."""
+        if self._agent is not None:
+            return self._agent.snapshot_tools()
+        return dict(self._pending_tools)
+    
+    def restore_tool(self, name: str, state: Dict[str, Any]) -> None:
+        """Restore a tool of the real agent, or keep the state until it is built."""
+        if self._agent is not None:
+            self._agent.restore_tool(name, state)
+        else:
+            self._pending_tools[name] = _PendingSnapshot(state)
+    
+    async def cleanup(self) -> None:
+        """Cleanup the real agent if it was ever constructed."""
+        if self._agent is not None:
+            await self._agent.cleanup()
+            self._agent = None
+        await super().cleanup()
+
+
+async def initialize_agents(
+    agents: Dict[str, Agent],
+    dependencies: Dict[str, Iterable[str]],
+    available: Optional[Set[str]] = None
+) -> Dict[str, BaseException]:
+    """
+    Initialize agents concurrently while respecting their dependencies.
+
+    Every agent starts as soon as all of its dependencies are ready, so
+    independent agents overlap their on_ready hooks and startup time is the
+    longest dependency chain rather than the sum of all hooks.
+
+    Args:
+        agents: Agents to initialize, by name
+        dependencies: Names each agent depends on
+        available: Names of agents that are already running
+
+    Returns:
+        Errors of agents that failed (or whose dependencies failed), by name
+    """
+    available = available or set()
+    loop = asyncio.get_running_loop()
+    done: Dict[str, asyncio.Future] = {name: loop.create_future() for name in agents}
+    failures: Dict[str, BaseException] = {}
+
+    # Agents on a dependency cycle would wait on each other forever
+    cycle = find_cycle({name: dependencies.get(name, ()) for name in agents})
+    for name in cycle or ():
+        failures[name] = RuntimeError(f"Agent '{name}' is part of a dependency cycle")
+        if not done[name].done():
+            done[name].set_exception(failures[name])
+            done[name].exception()
+
+    async def start(name: str, agent: Agent) -> None:
+        if name in failures:
+            return
+        try:
+            for dependency in dependencies.get(name, ()):
+                if dependency in done:
+                    try:
+                        await asyncio.shield(done[dependency])
+                    except Exception:
+                        raise RuntimeError(f"Dependency '{dependency}' failed to initialize")
+                elif dependency not in available:
+                    raise RuntimeError(f"Missing dependency '{dependency}'")
+            await agent.initialize()
+        except Exception as e:
+            failures[name] = e
+            done[name].set_exception(e)
+            # The failure is reported through the return value
+            done[name].exception()
+        else:
+            done[name].set_result(None)
+
+    await asyncio.gather(*(start(name, agent) for name, agent in agents.items()))
+    return failures
+
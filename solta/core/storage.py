@@ -0,0 +1,868 @@
+"""
+Persistent key-value storage for Solta framework
+"""
+import asyncio
+import concurrent.futures
+import functools
+import json
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .cache import estimate_size
+from .eviction import EvictionTracker
+from .key_index import SortedKeyIndex, prefix_bounds
+
+# How long a write may stay in memory before it is committed:
+#   buffered  - put() returns at once, the write is committed by the next flush
+#   committed - put() returns once its batch is committed (lost on power failure
+#               only if the OS has not written it out yet)
+#   fsync     - like committed, and the backend syncs to disk on every commit
+DURABILITY_LEVELS = ("buffered", "committed", "fsync")
+
+_DELETED = object()
+_MISSING = object()
+
+
+class StorageBackend(ABC):
+    """
+    Base class for key-value storage backends.
+
+    Backend methods are blocking. KeyValueStore calls them from its own
+    worker thread when `blocking` is True, so the event loop never waits on
+    disk I/O. Backends keeping data only in memory set `persistent` to
+    False, so their contents are included in state snapshots.
+    """
+
+    blocking = True
+    persistent = True
+
+    def encode(self, value: Any) -> Any:
+        """
+        Convert a value to its stored form.
+
+        Called when the value is written, so unsupported values are
+        rejected by put() rather than by a later flush.
+        """
+        return value
+
+    def size_of(self, key: str, value: Any, encoded: Any) -> int:
+        """Approximate size of a stored entry in bytes."""
+        return len(key) + estimate_size(value)
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """Stored value of key; raises KeyError if absent."""
+        pass
+
+    @abstractmethod
+    def write_batch(self, puts: Dict[str, Tuple[Any, Optional[float]]], deletes: List[str]) -> None:
+        """Apply puts of (encoded value, expiry time) and deletes atomically."""
+        pass
+
+    @abstractmethod
+    def keys(self) -> List[str]:
+        """Every stored key."""
+        pass
+
+    @abstractmethod
+    def metadata(self) -> List[Tuple[str, int, Optional[float]]]:
+        """(key, size, expiry time) of every stored key."""
+        pass
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Every stored (key, value) pair."""
+        pass
+
+    def capture(self) -> Callable[[], Iterator[Tuple[str, Any]]]:
+        """
+        Capture the current items for a snapshot.
+
+        The returned function iterates over the captured items and may run
+        in another thread while the backend keeps changing. The default
+        reads every item up front.
+        """
+        items = list(self.items())
+        return lambda: iter(items)
+
+    def set_durability(self, level: str) -> None:
+        """Adjust to a durability level (see DURABILITY_LEVELS)."""
+        pass
+
+    def close(self) -> None:
+        """Release the backend's resources."""
+        pass
+
+
+class InMemoryBackend(StorageBackend):
+    """Backend keeping values in a dict; nothing survives a restart."""
+
+    blocking = False
+    persistent = False
+
+    def __init__(self):
+        # key -> (value, expiry time)
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+
+    def get(self, key: str) -> Any:
+        return self._data[key][0]
+
+    def write_batch(self, puts: Dict[str, Tuple[Any, Optional[float]]], deletes: List[str]) -> None:
+        self._data.update(puts)
+        for key in deletes:
+            self._data.pop(key, None)
+
+    def keys(self) -> List[str]:
+        return list(self._data)
+
+    def metadata(self) -> List[Tuple[str, int, Optional[float]]]:
+        return [
+            (key, self.size_of(key, value, value), expires_at)
+            for key, (value, expires_at) in self._data.items()
+        ]
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return iter([(key, value) for key, (value, _) in self._data.items()])
+
+    def capture(self) -> Callable[[], Iterator[Tuple[str, Any]]]:
+        data = self._data.copy()
+        return lambda: ((key, value) for key, (value, _) in data.items())
+
+    def close(self) -> None:
+        self._data.clear()
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Backend storing JSON values in an SQLite database.
+
+    This class:
+    1. Uses WAL journaling, so reads never wait for a commit in progress
+    2. Opens the database on first use and reads values on demand, so
+       startup does not depend on the size of the store
+    3. Commits each batch of writes in one transaction
+    """
+
+    def __init__(self, path: str, table: str = "memory"):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", table):
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.path = path
+        self.table = table
+        self._synchronous = "NORMAL"
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"PRAGMA synchronous={self._synchronous}")
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL) WITHOUT ROWID"
+            )
+            columns = {row[1] for row in connection.execute(f"PRAGMA table_info({self.table})")}
+            if "expires_at" not in columns:
+                connection.execute(f"ALTER TABLE {self.table} ADD COLUMN expires_at REAL")
+            self._connection = connection
+        return self._connection
+
+    def encode(self, value: Any) -> str:
+        try:
+            return json.dumps(value, separators=(",", ":"))
+        except (TypeError, ValueError) as e:
+            raise TypeError(f"Value cannot be stored: {e}")
+
+    def size_of(self, key: str, value: Any, encoded: str) -> int:
+        return len(key) + len(encoded)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._connect().execute(
+                f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def write_batch(self, puts: Dict[str, Any], deletes: List[str]) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN")
+            try:
+                if puts:
+                    connection.executemany(
+                        f"INSERT INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                        ((key, encoded, expires_at) for key, (encoded, expires_at) in puts.items())
+                    )
+                if deletes:
+                    connection.executemany(
+                        f"DELETE FROM {self.table} WHERE key = ?", ((key,) for key in deletes)
+                    )
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._connect().execute(f"SELECT key FROM {self.table}")]
+
+    def metadata(self) -> List[Tuple[str, int, Optional[float]]]:
+        with self._lock:
+            return self._connect().execute(
+                f"SELECT key, length(key) + length(value), expires_at FROM {self.table}"
+            ).fetchall()
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        with self._lock:
+            rows = self._connect().execute(f"SELECT key, value FROM {self.table}").fetchall()
+        return ((key, json.loads(value)) for key, value in rows)
+
+    def set_durability(self, level: str) -> None:
+        self._synchronous = "FULL" if level == "fsync" else "NORMAL"
+        with self._lock:
+            if self._connection is not None:
+                self._connection.execute(f"PRAGMA synchronous={self._synchronous}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class KeyValueStore:
+    """
+    Key-value store on top of a storage backend.
+
+    This class:
+    1. Serves reads from pending writes, then an LRU cache, then the backend
+    2. Groups writes into one backend transaction per flush (write-behind)
+    3. Returns from put() at once or after the commit, by durability level
+    4. Keeps backend I/O off the event loop in a single worker thread
+    5. Tracks keys (not values) in a sorted index once they are first
+       needed, for O(log n) counts and O(log n + page) listing
+    6. Optionally bounds the store by key count and/or approximate bytes,
+       evicting by LRU, LFU or TTL policy, and expires keys with a TTL,
+       lazily on access and by a periodic sweep on the event loop
+
+    Bounding or expiring keys needs each key's size and expiry time, so a
+    store with max_keys, max_bytes or ttl loads them (not the values) on
+    first use, and the first write from synchronous code blocks on that.
+    Stores without these settings ignore expiry times.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[StorageBackend] = None,
+        cache_size: int = 10000,
+        flush_interval: float = 0.05,
+        max_batch: int = 1000,
+        durability: str = "committed",
+        max_keys: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        eviction: str = "lru",
+        ttl: Optional[float] = None,
+        sweep_interval: float = 1.0,
+        sweep_batch: int = 1000
+    ):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(
+                f"Unknown durability level: {durability!r} "
+                f"(expected one of: {', '.join(DURABILITY_LEVELS)})"
+            )
+        self.backend = backend if backend is not None else InMemoryBackend()
+        self.backend.set_durability(durability)
+        self.cache_size = cache_size
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.durability = durability
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+
+        self._tracker: Optional[EvictionTracker] = None
+        if max_keys is not None or max_bytes is not None or ttl is not None or eviction == "ttl":
+            self._tracker = EvictionTracker(eviction, max_keys, max_bytes)
+        self._sweep_task: Optional[asyncio.Task] = None
+
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        # key -> (value, encoded, expires_at) or _DELETED, waiting for / being written
+        self._pending: Dict[str, Any] = {}
+        self._inflight: Dict[str, Any] = {}
+        self._waiters: List[asyncio.Future] = []
+        self._keys: Optional[SortedKeyIndex] = None
+        self._writes = 0
+
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._worker: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._close_task: Optional[asyncio.Task] = None
+
+        self.cache_hits = 0
+        self.backend_reads = 0
+        self.flushes = 0
+        self.flushed_writes = 0
+        self.flush_errors = 0
+
+    async def _call(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a backend method, in the worker thread if it blocks."""
+        if not self.backend.blocking:
+            return func(*args)
+        if self._worker is None:
+            self._worker = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="solta-storage")
+        return await asyncio.get_running_loop().run_in_executor(self._worker, functools.partial(func, *args))
+
+    def _lookup_written(self, key: str) -> Any:
+        """Value from pending or in-flight writes, _DELETED, or _MISSING."""
+        entry = self._pending.get(key, _MISSING)
+        if entry is _MISSING:
+            entry = self._inflight.get(key, _MISSING)
+        if entry is _MISSING or entry is _DELETED:
+            return entry
+        return entry[0]
+
+    def _expire_if_due(self, key: str) -> bool:
+        """Delete key if its TTL has run out; returns whether it did."""
+        if not self._tracker.is_expired(key):
+            return False
+        self._tracker.remove(key)
+        self._tracker.expirations += 1
+        self._drop(key)
+        return True
+
+    def _drop(self, key: str) -> None:
+        """Queue the deletion of a key that is no longer tracked."""
+        self._queue(key, _DELETED)
+        self._cache.pop(key, None)
+        if self._keys is not None:
+            self._keys.discard(key)
+        self._schedule(len(self._pending) >= self.max_batch)
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """Value of key, or default if it is not stored (or has expired)."""
+        if self._tracker is not None:
+            await self._ensure_keys()
+            if key not in self._keys or self._expire_if_due(key):
+                return default
+            self._tracker.touch(key)
+
+        value = self._lookup_written(key)
+        if value is _DELETED:
+            return default
+        if value is not _MISSING:
+            return value
+
+        value = self._cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return value
+
+        if self._keys is not None and key not in self._keys:
+            return default
+
+        writes = self._writes
+        self.backend_reads += 1
+        try:
+            value = await self._call(self.backend.get, key)
+        except KeyError:
+            return default
+        # A write while reading makes this value stale; don't cache it
+        if writes == self._writes:
+            self._remember(key, value)
+        return value
+
+    def _remember(self, key: str, value: Any) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Queue a write without waiting for it, whatever the durability level."""
+        encoded = self.backend.encode(value)
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+
+        tracker = self._tracker
+        if tracker is not None:
+            size = self.backend.size_of(key, value, encoded)
+            if tracker.max_bytes is not None and size > tracker.max_bytes:
+                raise ValueError(f"Value of '{key}' ({size} bytes) is larger than max_bytes ({tracker.max_bytes})")
+            self._ensure_keys_now()
+            tracker.put(key, size, expires_at)
+
+        self._queue(key, (value, encoded, expires_at))
+        self._remember(key, value)
+        if self._keys is not None:
+            self._keys.add(key)
+
+        if tracker is not None:
+            for victim in tracker.victims(keep=key):
+                self._drop(victim)
+            self._start_sweep()
+        self._schedule(len(self._pending) >= self.max_batch)
+
+    async def put(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value.
+
+        With "buffered" durability this returns once the write is queued
+        (or, when max_batch writes are pending, once they are committed);
+        otherwise it returns once the batch containing it is committed.
+
+        Args:
+            key: Key to store under
+            value: Value to store
+            ttl: Seconds until the key expires (default: the store's ttl)
+
+        Raises:
+            TypeError: If the backend cannot store the value
+            ValueError: If the value alone is larger than max_bytes
+        """
+        if self._tracker is not None:
+            await self._ensure_keys()
+        self.set(key, value, ttl)
+        await self._wait_commit()
+
+    async def delete(self, key: str) -> bool:
+        """
+        Delete a key.
+
+        Returns:
+            Whether the key was stored
+        """
+        existed = await self.contains(key)
+        if self._tracker is not None:
+            self._tracker.remove(key)
+        self._drop(key)
+        await self._wait_commit()
+        return existed
+
+    async def contains(self, key: str) -> bool:
+        """Whether key is stored (and has not expired)."""
+        if self._tracker is not None:
+            await self._ensure_keys()
+            return key in self._keys and not self._expire_if_due(key)
+        value = self._lookup_written(key)
+        if value is not _MISSING:
+            return value is not _DELETED
+        if key in self._cache:
+            return True
+        await self._ensure_keys()
+        return key in self._keys
+
+    def _queue(self, key: str, entry: Any) -> None:
+        self._pending[key] = entry
+        self._writes += 1
+
+    async def _wait_commit(self) -> None:
+        if not self._pending:
+            return
+        if self.durability == "buffered" and len(self._pending) < self.max_batch:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._schedule(True)
+        await waiter
+
+    def _schedule(self, now: bool) -> None:
+        """Start (or hurry) the flush task."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop: pending writes are written by the next flush() or close()
+            return
+        self._init_async()
+        if now:
+            self._wake.set()
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_soon())
+
+    def _init_async(self) -> None:
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+            self._wake = asyncio.Event()
+
+    async def _flush_soon(self) -> None:
+        if not self._wake.is_set():
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+        while self._pending:
+            self._wake.clear()
+            try:
+                await self._write_pending()
+            except Exception as e:
+                print(f"Error flushing storage: {str(e)}")
+                return
+
+    async def _write_pending(self) -> None:
+        """Commit the pending writes as one batch."""
+        self._init_async()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            waiters, self._waiters = self._waiters, []
+            self._inflight = batch
+            puts = {key: entry[1:] for key, entry in batch.items() if entry is not _DELETED}
+            deletes = [key for key, entry in batch.items() if entry is _DELETED]
+            try:
+                await self._call(self.backend.write_batch, puts, deletes)
+            except BaseException as e:
+                # Keep the batch for the next flush, unless overwritten since
+                self._pending = {**batch, **self._pending}
+                if isinstance(e, Exception):
+                    self.flush_errors += 1
+                    for waiter in waiters:
+                        if not waiter.done():
+                            waiter.set_exception(e)
+                else:
+                    self._waiters = waiters + self._waiters
+                raise
+            finally:
+                self._inflight = {}
+            self.flushes += 1
+            self.flushed_writes += len(batch)
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    async def flush(self) -> None:
+        """Commit every pending write."""
+        while self._pending:
+            await self._write_pending()
+
+    def _read_keys(self) -> List[Any]:
+        """Keys, or (key, size, expiry) rows when sizes and expiry are tracked."""
+        return self.backend.metadata() if self._tracker is not None else self.backend.keys()
+
+    def _load_keys(self, rows: List[Any]) -> None:
+        """Track keys read from the backend, updated by writes not yet committed."""
+        tracker = self._tracker
+        if tracker is None:
+            tracked = SortedKeyIndex(rows)
+        else:
+            tracked = SortedKeyIndex(row[0] for row in rows)
+            for key, size, expires_at in rows:
+                tracker.put(key, size, expires_at)
+        for overlay in (self._inflight, self._pending):
+            for key, entry in overlay.items():
+                if entry is _DELETED:
+                    tracked.discard(key)
+                    if tracker is not None:
+                        tracker.remove(key)
+                else:
+                    tracked.add(key)
+                    if tracker is not None:
+                        value, encoded, expires_at = entry
+                        tracker.put(key, self.backend.size_of(key, value, encoded), expires_at)
+        self._keys = tracked
+        if tracker is not None:
+            # The limits may have been lowered since the store was written
+            for victim in tracker.victims():
+                self._drop(victim)
+
+    async def _ensure_keys(self) -> None:
+        if self._keys is not None:
+            return
+        self._init_async()
+        # Hold off flushes, so no batch commits between reading and tracking
+        async with self._flush_lock:
+            if self._keys is None:
+                self._load_keys(await self._call(self._read_keys))
+        if self._tracker is not None:
+            self._start_sweep()
+
+    def _ensure_keys_now(self) -> None:
+        """Load the key set from synchronous code (blocks on the backend)."""
+        if self._keys is None:
+            self._load_keys(self._read_keys())
+
+    def _start_sweep(self) -> None:
+        if self._sweep_task is not None or not self._tracker.expiring_keys:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._sweep_task = loop.create_task(self._sweep())
+
+    async def _sweep(self) -> None:
+        """Delete expired keys periodically, a bounded batch at a time."""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            while True:
+                expired = self._tracker.expired(limit=self.sweep_batch)
+                for key in expired:
+                    self._drop(key)
+                if len(expired) < self.sweep_batch:
+                    break
+                # More to do; let other tasks run in between batches
+                await asyncio.sleep(0)
+
+    def _drop_expired(self) -> None:
+        """Delete every key whose TTL has run out, ahead of the next sweep."""
+        if self._tracker is None:
+            return
+        for key in self._tracker.expired():
+            self._drop(key)
+
+    def __len__(self) -> int:
+        """Number of stored keys (loads the key set on first use)."""
+        self._ensure_keys_now()
+        self._drop_expired()
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        self._ensure_keys_now()
+        return key in self._keys
+
+    async def keys(self) -> List[str]:
+        """Every stored key in sorted order, including pending writes."""
+        await self._ensure_keys()
+        self._drop_expired()
+        return list(self._keys)
+
+    async def scan(
+        self,
+        prefix: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """
+        Stored keys in sorted order, filtered by prefix and/or range.
+
+        Args:
+            prefix: Only keys starting with this
+            start: First key to include (inclusive)
+            end: Key to stop before (exclusive)
+            after: Only keys greater than this, e.g. the last key of the
+                   previous page
+            limit: Maximum number of keys
+        """
+        await self._ensure_keys()
+        self._drop_expired()
+        start, end = self._bounds(prefix, start, end)
+        keys = self._keys.irange(start, end, after)
+        if limit is None:
+            return list(keys)
+        return [key for key, _ in zip(keys, range(limit))]
+
+    async def count(
+        self,
+        prefix: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None
+    ) -> int:
+        """Number of stored keys matching a prefix and/or range."""
+        await self._ensure_keys()
+        self._drop_expired()
+        start, end = self._bounds(prefix, start, end)
+        return self._keys.count(start, end)
+
+    async def list_page(
+        self,
+        prefix: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        One page of matching keys for a "list" operation.
+
+        Returns:
+            Dictionary with the page's `keys`, the `count` of all matching
+            keys and the `next_cursor` to pass for the next page (None on
+            the last page)
+        """
+        keys = await self.scan(prefix, start, end, after=cursor, limit=None if limit is None else limit + 1)
+        next_cursor = None
+        if limit is not None and len(keys) > limit:
+            keys = keys[:limit]
+            next_cursor = keys[-1] if keys else None
+        return {
+            "keys": keys,
+            "count": await self.count(prefix, start, end),
+            "next_cursor": next_cursor
+        }
+
+    @staticmethod
+    def _bounds(
+        prefix: Optional[str],
+        start: Optional[str],
+        end: Optional[str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Combine a prefix with a [start, end) range."""
+        if prefix:
+            low, high = prefix_bounds(prefix)
+            start = low if start is None else max(start, low)
+            if high is not None:
+                end = high if end is None else min(end, high)
+        return start, end
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Every stored (key, value) pair, including pending writes."""
+        written = {**self._inflight, **self._pending}
+        tracker = self._tracker
+        now = time.time()
+        for key, value in self.backend.items():
+            if key not in written and (tracker is None or not tracker.is_expired(key, now)):
+                yield key, value
+        for key, entry in written.items():
+            if entry is not _DELETED and (tracker is None or not tracker.is_expired(key, now)):
+                yield key, entry[0]
+
+    @property
+    def version(self) -> int:
+        """Number of writes and deletions queued so far (changes with the contents)."""
+        return self._writes
+
+    def capture(self) -> Callable[[], Dict[str, List[Any]]]:
+        """
+        Capture the contents for a snapshot with a few dict copies.
+
+        The returned function lists the keys, values and expiry times (in
+        three parallel lists) from the copies; it may run in another thread
+        while the store keeps changing, so snapshots do the per-key work
+        off the event loop.
+        """
+        items = self.backend.capture()
+        written = {**self._inflight, **self._pending}
+        expiry = self._tracker.expiry_times() if self._tracker is not None else {}
+
+        def columns() -> Dict[str, List[Any]]:
+            now = time.time()
+            keys: List[str] = []
+            values: List[Any] = []
+            expiry_times: List[Optional[float]] = []
+            for key, value in items():
+                if key in written:
+                    continue
+                expires_at = expiry.get(key)
+                if expires_at is None or expires_at > now:
+                    keys.append(key)
+                    values.append(value)
+                    expiry_times.append(expires_at)
+            for key, entry in written.items():
+                if entry is _DELETED:
+                    continue
+                expires_at = expiry.get(key)
+                if expires_at is None or expires_at > now:
+                    keys.append(key)
+                    values.append(entry[0])
+                    expiry_times.append(expires_at)
+            return {"keys": keys, "values": values, "expires_at": expiry_times}
+
+        return columns
+
+    def restore(self, columns: Dict[str, List[Any]]) -> int:
+        """
+        Queue writes of the contents listed by capture(), skipping keys
+        that have expired since.
+
+        Returns:
+            Number of keys written
+        """
+        now = time.time()
+        encode = self.backend.encode
+        tracker = self._tracker
+        if tracker is not None:
+            self._ensure_keys_now()
+        written: List[str] = []
+        # One pass that queues every write, rather than set() per key
+        for key, value, expires_at in zip(columns["keys"], columns["values"], columns["expires_at"]):
+            if expires_at is not None and expires_at <= now:
+                continue
+            encoded = encode(value)
+            if tracker is not None:
+                size = self.backend.size_of(key, value, encoded)
+                if tracker.max_bytes is not None and size > tracker.max_bytes:
+                    print(f"Skipping restored key '{key}': {size} bytes is larger than max_bytes")
+                    continue
+                tracker.put(key, size, expires_at)
+            self._pending[key] = (value, encoded, expires_at)
+            written.append(key)
+        self._writes += len(written)
+
+        pending = self._pending
+        for key in written[-self.cache_size:] if self.cache_size > 0 else ():
+            self._remember(key, pending[key][0])
+        if self._keys is not None:
+            for key in written:
+                self._keys.add(key)
+        if tracker is not None:
+            for victim in tracker.victims():
+                self._drop(victim)
+            self._start_sweep()
+        if written:
+            self._schedule(len(self._pending) >= self.max_batch)
+        return len(written)
+
+    def close_soon(self) -> None:
+        """
+        Close the store without waiting: in the background when an event
+        loop is running, otherwise right away.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self.close())
+            return
+        if self._close_task is None:
+            self._close_task = loop.create_task(self.close())
+
+    async def close(self) -> None:
+        """Commit pending writes and release the backend."""
+        if self._sweep_task is not None:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+        if self._flush_task is not None and not self._flush_task.done():
+            self._wake.set()
+            await self._flush_task
+        await self.flush()
+        await self._call(self.backend.close)
+        if self._worker is not None:
+            self._worker.shutdown(wait=False)
+            self._worker = None
+        self._cache.clear()
+        self._keys = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache, write-behind, and (for bounded stores) eviction counters."""
+        stats = self._tracker.stats() if self._tracker is not None else {
+            "policy": None,
+            "keys": len(self._keys) if self._keys is not None else None,
+            "bytes": None,
+        }
+        return {
+            **stats,
+            "cache_size": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "backend_reads": self.backend_reads,
+            "pending_writes": len(self._pending),
+            "flushes": self.flushes,
+            "flushed_writes": self.flushed_writes,
+            "flush_errors": self.flush_errors,
+            "durability": self.durability,
+        }
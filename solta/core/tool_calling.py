@@ -0,0 +1,294 @@
+"""
+LLM tool calling for Solta framework
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .cache import make_key
+from .tools import BaseTool
+
+
+class ToolCall:
+    """
+    One tool call requested by the model.
+
+    The arguments are kept as the model sent them (raw_arguments), so the
+    call is echoed back unchanged even when they could not be parsed.
+    """
+
+    __slots__ = ("id", "name", "arguments", "error", "raw_arguments")
+
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        arguments: Dict[str, Any],
+        error: Optional[str] = None,
+        raw_arguments: Any = None
+    ):
+        self.id = id
+        self.name = name
+        self.arguments = arguments
+        self.error = error
+        self.raw_arguments = raw_arguments
+
+    @classmethod
+    def from_dict(cls, call: Dict[str, Any], index: int = 0) -> 'ToolCall':
+        """Parse a call in function-calling format; arguments may be a JSON string."""
+        function = call.get("function", {})
+        raw_arguments = function.get("arguments")
+        arguments = raw_arguments or {}
+        error = None
+        if isinstance(arguments, str):
+            try:
+                arguments = json.loads(arguments)
+            except json.JSONDecodeError as e:
+                arguments, error = {}, f"Invalid JSON arguments: {e.msg}"
+        if not isinstance(arguments, dict):
+            arguments, error = {}, "Arguments must be an object"
+        return cls(call.get("id") or f"call_{index}", function.get("name", ""), arguments, error, raw_arguments)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The call in function-calling format, as sent back in the conversation."""
+        arguments = self.arguments if self.raw_arguments is None else self.raw_arguments
+        return {
+            "id": self.id,
+            "type": "function",
+            "function": {"name": self.name, "arguments": arguments}
+        }
+
+    def __repr__(self) -> str:
+        return f"ToolCall({self.name}, {self.arguments!r})"
+
+
+class ToolCallResult:
+    """Outcome of one tool call."""
+
+    __slots__ = ("call", "result", "error", "latency", "cached")
+
+    def __init__(
+        self,
+        call: ToolCall,
+        result: Any = None,
+        error: Optional[str] = None,
+        latency: float = 0.0,
+        cached: bool = False
+    ):
+        self.call = call
+        self.result = result
+        self.error = error
+        self.latency = latency
+        self.cached = cached
+
+    @property
+    def ok(self) -> bool:
+        """Whether the call succeeded."""
+        return self.error is None
+
+    def to_message(self) -> Dict[str, Any]:
+        """Chat message reporting the result (or error) to the model."""
+        if self.error is not None:
+            content = f"Error: {self.error}"
+        elif isinstance(self.result, str):
+            content = self.result
+        else:
+            content = json.dumps(self.result, default=str)
+        return {"role": "tool", "tool_call_id": self.call.id, "name": self.call.name, "content": content}
+
+    def __repr__(self) -> str:
+        status = "ok" if self.ok else f"error={self.error!r}"
+        return f"ToolCallResult({self.call.name}, {status}, latency={self.latency:.6f})"
+
+
+class StepCache:
+    """
+    Results of completed tool calls, keyed by step, tool and arguments.
+
+    Passing the same cache to a retried conversation (or retrying failed
+    calls within a step) returns the results of calls that already
+    completed instead of running them again. Failed calls are not cached.
+    """
+
+    def __init__(self):
+        self._results: Dict[bytes, Any] = {}
+        self.hits = 0
+
+    @staticmethod
+    def key(step: int, call: ToolCall) -> Optional[bytes]:
+        """Cache key of a call, or None if its arguments cannot be keyed."""
+        try:
+            return make_key((step, call.name), call.arguments)
+        except TypeError:
+            return None
+
+    def get(self, key: bytes) -> Any:
+        return self._results[key]
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._results
+
+    def put(self, key: bytes, result: Any) -> None:
+        self._results[key] = result
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        self._results.clear()
+
+
+def parse_tool_calls(response: Dict[str, Any]) -> List[ToolCall]:
+    """
+    Tool calls requested in a chat response.
+
+    Args:
+        response: Chat completion (see AIProvider.chat) or a single message
+    """
+    message = response
+    if "choices" in response:
+        choices = response["choices"]
+        message = choices[0].get("message", {}) if choices else {}
+    return [ToolCall.from_dict(call, index) for index, call in enumerate(message.get("tool_calls") or [])]
+
+
+async def run_tool_calls(
+    tools: Dict[str, BaseTool],
+    calls: List[ToolCall],
+    step: int = 0,
+    timeout: Optional[float] = None,
+    retries: int = 0,
+    cache: Optional[StepCache] = None
+) -> List[ToolCallResult]:
+    """
+    Run the tool calls of one step concurrently.
+
+    Every call gets its own timeout. Calls that time out or fail are tried
+    again up to `retries` times; calls with invalid arguments (ValueError,
+    TypeError) are not retried. Errors are returned as results so they can
+    be reported to the model.
+
+    Args:
+        tools: Available tools by name
+        calls: Calls requested by the model
+        step: Index of the step, part of the cache key
+        timeout: Seconds allowed per call
+        retries: Extra attempts for failed calls
+        cache: Results of calls already completed
+
+    Returns:
+        Results in call order
+    """
+    async def run_one(call: ToolCall) -> ToolCallResult:
+        if call.error is not None:
+            return ToolCallResult(call, error=call.error)
+        tool = tools.get(call.name)
+        if tool is None:
+            return ToolCallResult(call, error=f"Unknown tool '{call.name}'")
+
+        key = StepCache.key(step, call) if cache is not None else None
+        if key is not None and key in cache:
+            cache.hits += 1
+            return ToolCallResult(call, result=cache.get(key), cached=True)
+
+        started = time.perf_counter()
+        error = None
+        for _ in range(retries + 1):
+            try:
+                result = await asyncio.wait_for(tool.execute(**call.arguments), timeout)
+            except asyncio.TimeoutError:
+                error = f"Tool '{call.name}' timed out after {timeout}s"
+            except (ValueError, TypeError) as e:
+                error = str(e)
+                break
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if key is not None:
+                    cache.put(key, result)
+                return ToolCallResult(call, result=result, latency=time.perf_counter() - started)
+        return ToolCallResult(call, error=error, latency=time.perf_counter() - started)
+
+    if len(calls) == 1:
+        return [await run_one(calls[0])]
+    return list(await asyncio.gather(*(run_one(call) for call in calls)))
+
+
+async def run_tool_loop(
+    agent: Any,
+    messages: Union[str, List[Dict[str, Any]]],
+    tools: Optional[Iterable[str]] = None,
+    max_steps: int = 8,
+    tool_timeout: Optional[float] = 30.0,
+    retries: int = 0,
+    cache: Optional[StepCache] = None,
+    **params
+) -> Dict[str, Any]:
+    """
+    Let the model call the agent's tools until it gives a final answer.
+
+    Each step sends the conversation and tool schemas to the agent's AI
+    provider, runs every tool call of the response concurrently and adds
+    the results to the conversation.
+
+    Args:
+        agent: Agent whose provider and tools are used
+        messages: Conversation so far, or a single user prompt
+        tools: Names of the tools to offer (default: all registered tools)
+        max_steps: Maximum number of model responses
+        tool_timeout: Seconds allowed per tool call
+        retries: Extra attempts for failed tool calls
+        cache: Completed call results; pass the same cache when retrying
+        **params: Parameters for the AI provider
+
+    Returns:
+        Dictionary with the final `content`, the full `messages`, the
+        number of `steps`, every `tool_results` entry, the `finish_reason`
+        ("stop" or "max_steps") and summed `usage`
+    """
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    else:
+        messages = list(messages)
+    if cache is None:
+        cache = StepCache()
+
+    offered = agent.tools if tools is None else {name: agent.tools[name] for name in tools}
+    schemas = [tool.to_function_schema() for tool in offered.values()]
+
+    results: List[ToolCallResult] = []
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    content = ""
+    for step in range(max_steps):
+        response = await agent.ai_provider.chat(messages, tools=schemas or None, **params)
+        for name in usage:
+            usage[name] += response.get("usage", {}).get(name, 0)
+
+        calls = parse_tool_calls(response)
+        content = response["choices"][0]["message"].get("content", "") if response.get("choices") else ""
+        if not calls:
+            messages.append({"role": "assistant", "content": content})
+            return {
+                "content": content,
+                "messages": messages,
+                "steps": step + 1,
+                "tool_results": results,
+                "finish_reason": "stop",
+                "usage": usage
+            }
+
+        messages.append({"role": "assistant", "content": content, "tool_calls": [call.to_dict() for call in calls]})
+        step_results = await run_tool_calls(offered, calls, step, tool_timeout, retries, cache)
+        results.extend(step_results)
+        messages.extend(result.to_message() for result in step_results)
+
+    return {
+        "content": content,
+        "messages": messages,
+        "steps": max_steps,
+        "tool_results": results,
+        "finish_reason": "max_steps",
+        "usage": usage
+    }
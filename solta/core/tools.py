@@ -1,8 +1,14 @@
 """
 Base Tool system for Solta framework
 """
-from typing import Any, Callable, Dict, Optional
-from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+from abc import ABC
+from functools import wraps
+import asyncio
+
+from .cache import cache_stats
+from .executors import EXECUTION_MODES, ToolExecutors, get_executors
+from .schema import json_schema, validator_for
 
 class BaseTool(ABC):
     """
@@ -13,17 +19,123 @@ class BaseTool(ABC):
     - Data processing
     - External service integration
     - Custom command handling
+    
+    Tools that block or burn CPU implement a synchronous `run(**kwargs)`
+    instead of `execute` and choose where it runs with `execution_mode`:
+    "inline" (on the event loop), "thread" (shared thread pool) or
+    "process" (shared process pool; the tool, arguments and result must be
+    picklable, and changes the tool makes to itself stay in the worker).
+    `max_concurrency` bounds how many calls run at once. Async tools can
+    offload individual blocking steps with `await self.offload(func, ...)`.
+    
+    `parameters` declares the keyword arguments of execute, either as a
+    JSON Schema dict or as a pydantic model. It is compiled once per class,
+    checked automatically before every execute call and exported for LLM
+    tool calling by to_function_schema().
+    
+    Example:
+        class HashTool(BaseTool):
+            execution_mode = "process"
+            max_concurrency = 4
+            
+            def run(self, data: bytes) -> str:
+                return hashlib.scrypt(data, salt=b"solta", n=2**14, r=8, p=1).hex()
     """
     
+    execution_mode: str = "inline"
+    max_concurrency: Optional[int] = None
+    parameters: Any = None
+    
     def __init__(self, name: Optional[str] = None, description: str = ""):
         self.name = name or self.__class__.__name__
         self.description = description
         self._agent = None
+        self._executors: Optional[ToolExecutors] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+    
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        if cls.execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode for {cls.__name__}: {cls.execution_mode}")
+        if cls.execute is BaseTool.execute and not hasattr(cls, 'run') and not _is_abstract(cls):
+            raise TypeError(f"Tool {cls.__name__} must implement execute() or run()")
+        
+        # Validate parameters before async execute overrides
+        execute = cls.__dict__.get('execute')
+        if execute is not None and asyncio.iscoroutinefunction(execute) \
+                and not getattr(execute, '_wrapped_execute', False):
+            cls.execute = _wrap_execute(execute)
         
-    @abstractmethod
     async def execute(self, **kwargs) -> Any:
-        """Execute the tool's main functionality."""
-        pass
+        """
+        Execute the tool's main functionality.
+        
+        The default runs `run(**kwargs)` according to the tool's
+        execution_mode; async tools override this method instead.
+        """
+        return await self.offload(self.run, **self.validate_arguments(kwargs))
+    
+    async def execute_batch(
+        self,
+        items: List[Dict[str, Any]],
+        concurrency: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Execute the tool once per parameter set.
+        
+        The default runs execute() for every item concurrently (at most
+        `concurrency` at a time). Tools that can process many items at once
+        override this with a vectorized implementation.
+        
+        Args:
+            items: Keyword arguments of each call
+            concurrency: Maximum number of concurrent execute() calls
+            
+        Returns:
+            Results in item order; the entry of a failed item is its exception
+        """
+        if concurrency is None:
+            return await asyncio.gather(*(self.execute(**item) for item in items), return_exceptions=True)
+        
+        slots = asyncio.Semaphore(concurrency)
+        
+        async def execute_one(item: Dict[str, Any]) -> Any:
+            async with slots:
+                return await self.execute(**item)
+        
+        return await asyncio.gather(*(execute_one(item) for item in items), return_exceptions=True)
+    
+    @property
+    def has_run(self) -> bool:
+        """Whether the tool implements a synchronous run()."""
+        return hasattr(type(self), 'run')
+    
+    @property
+    def executors(self) -> ToolExecutors:
+        """Executors running this tool's offloaded work."""
+        return self._executors or get_executors()
+    
+    async def offload(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a synchronous function according to the tool's execution_mode
+        and within its max_concurrency.
+        """
+        return await self.executors.run(self, func, *args, **kwargs)
+    
+    def _concurrency_slots(self) -> Optional[asyncio.Semaphore]:
+        if self.max_concurrency is None:
+            return None
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # Process mode pickles the tool; the agent, executors and semaphore stay behind
+        state = self.__dict__.copy()
+        state['_agent'] = None
+        state['_executors'] = None
+        state['_slots'] = None
+        return state
     
     def bind_agent(self, agent: 'Agent') -> None:
         """Bind this tool to an agent."""
@@ -36,10 +148,102 @@ class BaseTool(ABC):
             raise RuntimeError("Tool not bound to any agent")
         return self._agent
     
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss statistics of this tool's @cached_tool methods."""
+        return cache_stats(self)
+    
+    def validate_arguments(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Check parameters against the tool's schema.
+        
+        Returns:
+            The parameters with schema defaults filled in
+            
+        Raises:
+            ValueError: On missing or out-of-range parameters
+            TypeError: On parameters of the wrong type
+        """
+        validator = validator_for(type(self))
+        if validator is None:
+            return params
+        return validator(params)
+    
     def validate_params(self, params: Dict[str, Any]) -> bool:
         """Validate parameters before execution."""
+        self.validate_arguments(params)
         return True
     
+    @classmethod
+    def parameters_schema(cls) -> Dict[str, Any]:
+        """JSON Schema of the tool's parameters."""
+        return json_schema(cls.parameters)
+    
+    def to_function_schema(self) -> Dict[str, Any]:
+        """Describe the tool in the function-calling format used by LLM APIs."""
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": self.parameters_schema(),
+            }
+        }
+    
+    def export_state(self) -> Optional[Dict[str, Any]]:
+        """Export state to carry over to a replacement tool (hot reload)."""
+        return None
+    
+    def import_state(self, state: Dict[str, Any]) -> None:
+        """Import state exported by a previous instance of the tool."""
+        pass
+    
+    def release_state(self) -> None:
+        """
+        Give up resources handed over by export_state(), once the
+        replacement has taken over (cleanup must then leave them open).
+        
+        Not called when the reload fails, so the tool keeps them.
+        """
+        pass
+    
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Capture state to persist across restarts, as data that shares no
+        mutable objects with the tool (see Agent.snapshot).
+        """
+        return None
+    
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Restore state captured by snapshot() in a previous run."""
+        pass
+    
+    def snapshot_version(self) -> Any:
+        """
+        Value that changes whenever snapshot() would return something new.
+        
+        None means unknown: tools overriding snapshot() without this are
+        captured in every periodic snapshot.
+        """
+        return 0 if type(self).snapshot is BaseTool.snapshot else None
+    
     async def cleanup(self) -> None:
         """Cleanup any resources used by the tool."""
         pass
+
+
+def _wrap_execute(execute: Callable[..., Any]) -> Callable[..., Any]:
+    """Validate keyword arguments against the tool's parameters."""
+    @wraps(execute)
+    async def wrapper(self: BaseTool, *args: Any, **kwargs: Any) -> Any:
+        validator = validator_for(type(self))
+        if validator is not None and not args:
+            kwargs = validator(kwargs)
+        return await execute(self, *args, **kwargs)
+    
+    wrapper._wrapped_execute = True
+    return wrapper
+
+
+def _is_abstract(cls: type) -> bool:
+    """Whether a class still declares abstract methods (checked before ABCMeta does)."""
+    return any(getattr(getattr(cls, name, None), '__isabstractmethod__', False) for name in dir(cls))
@@ -0,0 +1,50 @@
+"""
+File watching for Solta framework
+
+Kept apart from the loader so watchdog is only imported when live reload is
+actually used.
+"""
+import asyncio
+import time
+
+from watchdog.events import FileSystemEventHandler
+
+
+class AgentWatcher(FileSystemEventHandler):
+    """
+    Watches for changes in agent files and triggers reloads.
+    
+    Events arrive on the watchdog thread and are only handed over to the
+    client's event loop; debouncing and reloading happen there.
+    """
+    
+    def __init__(self, loader: 'AgentLoader', loop: asyncio.AbstractEventLoop):
+        self.loader = loader
+        self._loop = loop
+    
+    def _forward(self, path: str, directory: bool = False) -> None:
+        if not (directory or path.endswith('.py')) or self._loop.is_closed():
+            return
+        try:
+            self._loop.call_soon_threadsafe(self.loader.schedule_reload, path, time.perf_counter())
+        except RuntimeError:
+            # Loop closed while the event was in flight
+            pass
+    
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._forward(event.src_path)
+    
+    def on_created(self, event):
+        if not event.is_directory:
+            self._forward(event.src_path)
+    
+    def on_deleted(self, event):
+        # A deleted directory takes the agents loaded from it along
+        self._forward(event.src_path, event.is_directory)
+    
+    def on_moved(self, event):
+        # The source is gone as far as the loader is concerned
+        self._forward(event.src_path, event.is_directory)
+        if not event.is_directory:
+            self._forward(event.dest_path)
@@ -1,8 +1,16 @@
 """
 Example tools for the basic Solta agent
 """
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, Field
 from solta.core.tools import BaseTool
+from solta.core.decorators import cached_tool
+from solta.core.storage import KeyValueStore, StorageBackend
+
+class SearchParameters(BaseModel):
+    """Parameters of SearchTool."""
+    query: str = Field(description="Text to search for")
+
 
 class SearchTool(BaseTool):
     """
@@ -10,11 +18,13 @@ class SearchTool(BaseTool):
     
     This demonstrates:
     1. How to create custom tools
-    2. Parameter validation
+    2. Parameter validation with a pydantic model
     3. Tool execution logic
     4. Error handling
     """
     
+    parameters = SearchParameters
+    
     def __init__(self):
         super().__init__(
             name="search",
@@ -22,22 +32,18 @@ class SearchTool(BaseTool):
         )
         self.search_history = []
         
-    def validate_params(self, params: Dict[str, Any]) -> bool:
-        """Validate search parameters."""
-        if "query" not in params:
-            raise ValueError("Search query is required")
-        if not isinstance(params["query"], str):
-            raise TypeError("Query must be a string")
-        return True
-    
     async def execute(self, **kwargs) -> Dict[str, Any]:
-        """Execute the search operation."""
-        self.validate_params(kwargs)
+        """Execute the search operation (parameters are validated by the model)."""
         query = kwargs["query"]
         
         # Store in history
         self.search_history.append(query)
         
+        return await self.search(query)
+    
+    @cached_tool(maxsize=256, ttl=300)
+    async def search(self, query: str) -> Dict[str, Any]:
+        """Run a search; repeated queries are answered from the cache."""
         # This is where you'd implement actual search logic
         # For now, we'll return a mock result
         return {
@@ -53,6 +59,26 @@ class SearchTool(BaseTool):
             }
         }
     
+    def export_state(self) -> Dict[str, Any]:
+        """Carry the search history over a reload."""
+        return {"search_history": list(self.search_history)}
+    
+    def import_state(self, state: Dict[str, Any]) -> None:
+        """Restore the search history."""
+        self.search_history = list(state.get("search_history", []))
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Persist the search history across restarts."""
+        return {"search_history": list(self.search_history)}
+    
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Restore the search history."""
+        self.search_history = list(state.get("search_history", []))
+    
+    def snapshot_version(self) -> Any:
+        """The history only grows, so its length marks changes."""
+        return len(self.search_history)
+    
     async def cleanup(self) -> None:
         """Clean up search history."""
         self.search_history.clear()
@@ -66,14 +92,16 @@ class MemoryTool(BaseTool):
     1. State management in tools
     2. Complex tool functionality
     3. Integration with agent context
+    4. Pluggable persistent storage (see solta.core.storage)
     """
     
-    def __init__(self):
+    def __init__(self, backend: Optional[StorageBackend] = None, **store_options):
         super().__init__(
             name="memory",
             description="Manages agent memory and context"
         )
-        self.memories = {}
+        self.memories = KeyValueStore(backend, **store_options)
+        self._owns_memories = True
         
     async def execute(self, **kwargs) -> Any:
         """Execute memory operations."""
@@ -84,7 +112,7 @@ class MemoryTool(BaseTool):
         if operation == "store":
             if key is None or value is None:
                 raise ValueError("Both key and value required for store operation")
-            self.memories[key] = value
+            await self.memories.put(key, value)
             return {"status": "stored", "key": key}
             
         elif operation == "get":
@@ -93,17 +121,61 @@ class MemoryTool(BaseTool):
             return {
                 "status": "retrieved",
                 "key": key,
-                "value": self.memories.get(key)
+                "value": await self.memories.get(key)
             }
             
         elif operation == "list":
+            page = await self.memories.list_page(
+                prefix=kwargs.get("prefix"),
+                start=kwargs.get("start"),
+                end=kwargs.get("end"),
+                cursor=kwargs.get("cursor"),
+                limit=kwargs.get("limit")
+            )
             return {
                 "status": "listed",
-                "memories": list(self.memories.keys())
+                "memories": page["keys"],
+                "count": page["count"],
+                "next_cursor": page["next_cursor"]
             }
             
         else:
             raise ValueError(f"Unknown operation: {operation}")
     
+    def export_state(self) -> Dict[str, Any]:
+        """Hand the memory store over to a reloaded tool."""
+        return {"store": self.memories}
+    
+    def import_state(self, state: Dict[str, Any]) -> None:
+        """Take over the memory store of a previous instance, closing this tool's own."""
+        if "store" in state and state["store"] is not self.memories:
+            # A backend passed to both instances stays open for the adopted store
+            if self._owns_memories and self.memories.backend is not state["store"].backend:
+                self.memories.close_soon()
+            self.memories = state["store"]
+            self._owns_memories = True
+    
+    def release_state(self) -> None:
+        """The reloaded tool took over the store; leave it open on cleanup."""
+        self._owns_memories = False
+    
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Memories of an in-memory store (persistent backends keep their own)."""
+        if self.memories.backend.persistent:
+            return None
+        return {"memories": self.memories.capture()}
+    
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Write back the memories of a snapshot."""
+        if "memories" in state:
+            self.memories.restore(state["memories"])
+    
+    def snapshot_version(self) -> Any:
+        """Changes with every write to an in-memory store."""
+        if self.memories.backend.persistent:
+            return 0
+        return (id(self.memories), self.memories.version)
+    
     async def cleanup(self):
-        self.memories.clear()
+        if self._owns_memories:
+            await self.memories.close()
@@ -29,6 +29,8 @@ class CalculatorAgent(Agent):
     async def on_message(self, message):
         if "calculate" in message:
             calc = message["calculate"]
+            if isinstance(calc, list):
+                return await self._calculate_many(calc)
             try:
                 result = await self.tools["calculator"].execute(**calc)
                 
@@ -51,6 +53,46 @@ class CalculatorAgent(Agent):
         
         return None
     
+    async def _calculate_many(self, calcs):
+        """Evaluate a list of calculations in one vectorized batch."""
+        results = await self.tools["calculator"].execute_batch(calcs)
+        
+        answers = []
+        for calc, result in zip(calcs, results):
+            if isinstance(result, Exception):
+                answers.append({"error": str(result)})
+            else:
+                self.calculation_history.append({
+                    "operation": calc,
+                    "result": result["result"]
+                })
+                answers.append({"result": result["result"]})
+        
+        return {
+            "type": "calculations",
+            "results": answers,
+            "history_size": len(self.calculation_history)
+        }
+    
+    def export_state(self):
+        """Carry the calculation history over a reload."""
+        state = super().export_state() or {}
+        state["calculation_history"] = list(self.calculation_history)
+        return state
+    
+    def import_state(self, state):
+        """Restore the calculation history."""
+        super().import_state(state)
+        self.calculation_history = list(state.get("calculation_history", []))
+    
+    def snapshot(self):
+        """Persist the calculation history across restarts."""
+        return {"calculation_history": list(self.calculation_history)}
+    
+    def restore(self, state):
+        """Restore the calculation history."""
+        self.calculation_history = list(state.get("calculation_history", []))
+    
     async def cleanup(self):
         """Cleanup agent resources."""
         self.calculation_history.clear()
@@ -0,0 +1,311 @@
+"""
+Arithmetic expression evaluation for the Calculator agent
+"""
+import ast
+import math
+import operator
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet
+
+# Guards against expressions that would take unbounded time or memory
+MAX_EXPRESSION_LENGTH = 1000
+MAX_DEPTH = 50
+MAX_RESULT_BITS = 100000
+MAX_VARIABLE_ITEMS = 100000
+
+CONSTANTS = {
+    "pi": math.pi,
+    "e": math.e,
+    "inf": math.inf,
+}
+
+Node = Callable[[Dict[str, Any]], Any]
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ValueError("List variables need NumPy: install it with `pip install solta[numpy]`") from None
+    return numpy
+
+
+def _is_array(value: Any) -> bool:
+    return getattr(value, "ndim", 0) > 0
+
+
+def _is_number(value: Any) -> bool:
+    return type(value) in (int, float)
+
+
+def _check_variable(name: str, value: Any) -> Any:
+    """
+    Validate a variable's value: a number or a flat list of numbers.
+
+    Lists (and NumPy arrays) are returned as NumPy arrays.
+
+    Raises:
+        ValueError: If the value is not numeric, or is too large
+    """
+    if type(value) is int:
+        if value.bit_length() > MAX_RESULT_BITS:
+            raise ValueError(f"Variable '{name}' is too large")
+        return value
+    if type(value) is float:
+        return value
+
+    if isinstance(value, (list, tuple)):
+        if len(value) > MAX_VARIABLE_ITEMS:
+            raise ValueError(f"Variable '{name}' has more than {MAX_VARIABLE_ITEMS} items")
+        if not all(_is_number(item) for item in value):
+            raise ValueError(f"Variable '{name}' must be a list of numbers")
+        value = _numpy().asarray(value)
+    elif not _is_array(value):
+        raise ValueError(f"Variable '{name}' must be a number or a list of numbers")
+
+    if value.ndim != 1 or value.size > MAX_VARIABLE_ITEMS:
+        raise ValueError(f"Variable '{name}' must be a flat list of at most {MAX_VARIABLE_ITEMS} numbers")
+    # Ints beyond 64 bits give an object array, which NumPy evaluates with Python ints
+    if value.dtype.kind not in "iuf":
+        raise ValueError(f"Variable '{name}' must be a list of numbers that fit in 64 bits")
+    return value
+
+
+def _check_result(value: Any) -> Any:
+    """Reject integer results beyond MAX_RESULT_BITS."""
+    if type(value) is int and value.bit_length() > MAX_RESULT_BITS:
+        raise ValueError("Result is too large")
+    return value
+
+
+def _bounded(function: Callable[[Any, Any], Any]) -> Callable[[Any, Any], Any]:
+    """Binary operator whose integer results are checked against MAX_RESULT_BITS."""
+    def call(a: Any, b: Any) -> Any:
+        return _check_result(function(a, b))
+    return call
+
+
+def _multiply(a: Any, b: Any) -> Any:
+    # Refuse before multiplying: the product has about the sum of the operands' bits
+    if type(a) is int and type(b) is int and a.bit_length() + b.bit_length() > MAX_RESULT_BITS + 1:
+        raise ValueError("Result is too large")
+    return _check_result(a * b)
+
+
+def _divide(a: Any, b: Any) -> Any:
+    """True division; dividing by zero gives inf, like the divide operation."""
+    if _is_array(a) or _is_array(b):
+        np = _numpy()
+        zero = np.asarray(b) == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(zero, np.inf, np.true_divide(a, np.where(zero, 1, b)))
+    return a / b if b != 0 else float("inf")
+
+
+def _power(a: Any, b: Any) -> Any:
+    if _is_array(a) or _is_array(b):
+        np = _numpy()
+        with np.errstate(over="ignore", invalid="ignore"):
+            return np.power(a, b)
+    if type(a) is int and type(b) is int and abs(a) > 1 and b > 0:
+        if b * math.log2(abs(a)) > MAX_RESULT_BITS:
+            raise ValueError("Result is too large")
+    result = a ** b
+    if isinstance(result, complex):
+        raise ValueError("Result is not a real number")
+    return _check_result(result)
+
+
+def _elementwise(scalar: Callable[..., Any], array_name: str) -> Callable[..., Any]:
+    """Function using math for scalars and NumPy for arrays."""
+    def call(*args: Any) -> Any:
+        if any(_is_array(arg) for arg in args):
+            return getattr(_numpy(), array_name)(*args)
+        return scalar(*args)
+    return call
+
+
+def _extreme(scalar: Callable[..., Any], array_name: str) -> Callable[..., Any]:
+    """min/max of scalars, element-wise for arrays."""
+    def call(*args: Any) -> Any:
+        if any(_is_array(arg) for arg in args):
+            function = getattr(_numpy(), array_name)
+            result = args[0]
+            for arg in args[1:]:
+                result = function(result, arg)
+            return result
+        return scalar(args)
+    return call
+
+
+# Name -> (function, minimum arguments, maximum arguments)
+FUNCTIONS: Dict[str, Any] = {
+    "abs": (abs, 1, 1),
+    "sqrt": (_elementwise(math.sqrt, "sqrt"), 1, 1),
+    "exp": (_elementwise(math.exp, "exp"), 1, 1),
+    "log": (_elementwise(math.log, "log"), 1, 1),
+    "log10": (_elementwise(math.log10, "log10"), 1, 1),
+    "sin": (_elementwise(math.sin, "sin"), 1, 1),
+    "cos": (_elementwise(math.cos, "cos"), 1, 1),
+    "tan": (_elementwise(math.tan, "tan"), 1, 1),
+    "floor": (_elementwise(math.floor, "floor"), 1, 1),
+    "ceil": (_elementwise(math.ceil, "ceil"), 1, 1),
+    "round": (_elementwise(round, "round"), 1, 1),
+    "min": (_extreme(min, "minimum"), 2, None),
+    "max": (_extreme(max, "maximum"), 2, None),
+}
+
+BINARY_OPERATORS = {
+    ast.Add: _bounded(operator.add),
+    ast.Sub: _bounded(operator.sub),
+    ast.Mult: _multiply,
+    ast.Div: _divide,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _power,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+class CompiledExpression:
+    """
+    An arithmetic expression compiled into nested closures.
+
+    Variables may be bound to numbers or to flat NumPy arrays (lists are
+    converted), in which case the expression is evaluated element-wise over
+    the whole array in one call. Any other value (strings, bools, nested
+    lists, dicts) is rejected.
+    """
+
+    def __init__(self, source: str, evaluate: Node, variables: FrozenSet[str]):
+        self.source = source
+        self.variables = variables
+        self._evaluate = evaluate
+
+    def __call__(self, **variables: Any) -> Any:
+        missing = self.variables - variables.keys()
+        if missing:
+            raise ValueError(f"Missing variables: {', '.join(sorted(missing))}")
+        for name, value in variables.items():
+            variables[name] = _check_variable(name, value)
+        return self._evaluate(variables)
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.source!r})"
+
+
+@lru_cache(maxsize=512)
+def compile_expression(source: str) -> CompiledExpression:
+    """
+    Parse and compile an arithmetic expression (cached by source text).
+
+    Only numbers, variables, the constants pi/e/inf, + - * / // % **, unary
+    +/- and the functions in FUNCTIONS are allowed; anything else (names
+    of builtins, attributes, subscripts, comprehensions...) is rejected.
+
+    Raises:
+        ValueError: If the expression is invalid or uses unsupported syntax
+    """
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression: {e.msg}")
+
+    variables = set()
+    evaluate, _ = _compile(tree.body, variables, 0)
+    return CompiledExpression(source, evaluate, frozenset(variables))
+
+
+def evaluate(source: str, variables: Dict[str, Any] = None) -> Any:
+    """Compile (or fetch from the cache) and evaluate an expression."""
+    return compile_expression(source)(**(variables or {}))
+
+
+def _constant(value: Any) -> Node:
+    return lambda env: value
+
+
+def _compile(node: ast.AST, variables: set, depth: int) -> "tuple":
+    """
+    Compile a node into a closure.
+
+    Returns:
+        (closure, is_constant); constant subtrees are folded at compile time
+    """
+    if depth > MAX_DEPTH:
+        raise ValueError("Expression is nested too deeply")
+
+    if isinstance(node, ast.Constant):
+        if type(node.value) not in (int, float):
+            raise ValueError(f"Unsupported literal: {node.value!r}")
+        return _constant(node.value), True
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in CONSTANTS:
+            return _constant(CONSTANTS[name]), True
+        if name in FUNCTIONS:
+            raise ValueError(f"Function '{name}' must be called")
+        variables.add(name)
+
+        def load(env: Dict[str, Any]) -> Any:
+            return env[name]
+        return load, False
+
+    if isinstance(node, ast.BinOp):
+        function = BINARY_OPERATORS.get(type(node.op))
+        if function is None:
+            raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        left, left_constant = _compile(node.left, variables, depth + 1)
+        right, right_constant = _compile(node.right, variables, depth + 1)
+
+        def binary(env: Dict[str, Any]) -> Any:
+            return function(left(env), right(env))
+        return _fold(binary, left_constant and right_constant)
+
+    if isinstance(node, ast.UnaryOp):
+        function = UNARY_OPERATORS.get(type(node.op))
+        if function is None:
+            raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        operand, operand_constant = _compile(node.operand, variables, depth + 1)
+
+        def unary(env: Dict[str, Any]) -> Any:
+            return function(operand(env))
+        return _fold(unary, operand_constant)
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name):
+            raise ValueError("Only named functions can be called")
+        if node.func.id not in FUNCTIONS:
+            raise ValueError(f"Unsupported function: {node.func.id}")
+        if node.keywords:
+            raise ValueError("Keyword arguments are not supported")
+        name = node.func.id
+        function, min_args, max_args = FUNCTIONS[name]
+        if len(node.args) < min_args or (max_args is not None and len(node.args) > max_args):
+            raise ValueError(f"Wrong number of arguments for {name}()")
+        compiled = [_compile(arg, variables, depth + 1) for arg in node.args]
+        args = [closure for closure, _ in compiled]
+
+        def call(env: Dict[str, Any]) -> Any:
+            return function(*[arg(env) for arg in args])
+        return _fold(call, all(constant for _, constant in compiled))
+
+    raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+
+
+def _fold(closure: Node, constant: bool) -> "tuple":
+    """Evaluate constant subtrees once; errors are left to evaluation time."""
+    if not constant:
+        return closure, False
+    try:
+        value = closure({})
+    except Exception:
+        return closure, False
+    return _constant(value), True
@@ -1,19 +1,78 @@
 """
 Tools for the Calculator agent
 """
-from typing import Dict, Any
+import math
+from typing import Dict, Any, List, Optional, Tuple
 from solta.core.tools import BaseTool
+from .expressions import compile_expression
+
+# Largest operand magnitude for which int64 arithmetic matches Python ints
+# (and, for divide, for which the float64 conversion is exact)
+INT_LIMITS = {
+    'add': 2 ** 62,
+    'subtract': 2 ** 62,
+    'multiply': 2 ** 31,
+    'divide': 2 ** 53,
+}
+
+# Ints mixed with floats are converted exactly below this magnitude
+FLOAT_INT_LIMIT = 2 ** 53
+
+NUMBER_TYPES = (int, float)
 
 class CalculatorTool(BaseTool):
     """
     Tool for performing mathematical calculations.
     
     This tool demonstrates:
-    1. Parameter validation
+    1. Schema-based parameter validation
     2. Error handling
     3. Result formatting
+    
+    Besides the binary operations, "evaluate" computes a whole expression
+    such as "(a + b) * sqrt(c) / 2" in one call. Variables may be numbers
+    or lists of numbers, which are evaluated element-wise.
     """
     
+    parameters = {
+        "type": "object",
+        "properties": {
+            "operation": {
+                "type": "string",
+                "enum": ["add", "subtract", "multiply", "divide", "power", "evaluate"],
+                "description": "Operation to apply to a and b, or evaluate an expression"
+            },
+            "a": {"type": "number", "description": "First operand"},
+            "b": {"type": "number", "description": "Second operand"},
+            "expression": {
+                "type": "string",
+                "maxLength": 1000,
+                "description": "Arithmetic expression (evaluate)"
+            },
+            "variables": {
+                "type": "object",
+                "additionalProperties": {
+                    "oneOf": [
+                        {"type": "number"},
+                        {"type": "array", "items": {"type": "number"}}
+                    ]
+                },
+                "description": "Values of the expression's variables: numbers or lists of numbers (evaluate)"
+            }
+        },
+        "required": ["operation"],
+        "allOf": [
+            {
+                "if": {"properties": {"operation": {"enum": ["add", "subtract", "multiply", "divide", "power"]}}},
+                "then": {"required": ["a", "b"]}
+            },
+            {
+                "if": {"properties": {"operation": {"const": "evaluate"}}},
+                "then": {"required": ["expression"]}
+            }
+        ]
+    }
+    
     def __init__(self):
         super().__init__(
             name="calculator",
@@ -27,30 +86,36 @@ class CalculatorTool(BaseTool):
             'power': lambda a, b: a ** b,
         }
     
-    def validate_params(self, params: Dict[str, Any]) -> bool:
-        """Validate calculation parameters."""
-        if "operation" not in params:
-            raise ValueError("Operation is required")
-            
-        if params["operation"] not in self.operations:
-            raise ValueError(f"Unknown operation: {params['operation']}")
-            
-        if "a" not in params or "b" not in params:
-            raise ValueError("Both 'a' and 'b' parameters are required")
-            
-        if not all(isinstance(params[x], (int, float)) for x in ['a', 'b']):
-            raise TypeError("Parameters 'a' and 'b' must be numbers")
-            
-        return True
-    
     async def execute(self, **kwargs) -> Dict[str, Any]:
-        """Execute the calculation."""
-        self.validate_params(kwargs)
-        
-        operation = kwargs["operation"]
-        a = kwargs["a"]
-        b = kwargs["b"]
+        """Execute the calculation (parameters are validated against the schema)."""
+        return self._execute_params(kwargs)
+    
+    def _execute_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if params["operation"] == "evaluate":
+            return self._evaluate(params["expression"], params.get("variables") or {})
+        return self._calculate(params["operation"], params["a"], params["b"])
+    
+    def _evaluate(self, expression: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        # Parsing errors and unsupported syntax are reported as ValueError
+        compiled = compile_expression(expression)
+        try:
+            result = compiled(**variables)
+        except (ZeroDivisionError, FloatingPointError):
+            raise ValueError("Division by zero")
+        except ValueError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"Calculation error: {str(e)}")
         
+        if hasattr(result, "tolist"):
+            result = result.tolist()
+        return {
+            "operation": "evaluate",
+            "expression": expression,
+            "result": result
+        }
+    
+    def _calculate(self, operation: str, a: Any, b: Any) -> Dict[str, Any]:
         try:
             result = self.operations[operation](a, b)
             
@@ -66,6 +131,111 @@ class CalculatorTool(BaseTool):
         except Exception as e:
             raise RuntimeError(f"Calculation error: {str(e)}")
     
+    async def execute_batch(
+        self,
+        items: List[Dict[str, Any]],
+        concurrency: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Execute many calculations at once.
+        
+        Items are grouped by operation and operand kind (int or float) and
+        each group is evaluated on NumPy arrays. Results match execute()
+        exactly: ints stay ints, division by zero gives inf, and operands
+        that int64/float64 cannot represent exactly, int powers that would
+        overflow and float powers fall back to Python arithmetic. Without NumPy this is the
+        default concurrent loop.
+        
+        Returns:
+            Result dicts in item order; the entry of a failed item is its exception
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            return await super().execute_batch(items, concurrency)
+        
+        results: List[Any] = [None] * len(items)
+        # (operation, is_int) -> (indices, a values, b values)
+        groups: Dict[Tuple[str, bool], Tuple[List[int], List[Any], List[Any]]] = {}
+        operations = self.operations
+        vectorizable = self._vectorizable
+        
+        for index, item in enumerate(items):
+            operation = item.get("operation")
+            a = item.get("a")
+            b = item.get("b")
+            type_a = type(a)
+            type_b = type(b)
+            if not (operation in operations and type_a in NUMBER_TYPES and type_b in NUMBER_TYPES):
+                # Anything unusual goes through the schema and the scalar path
+                try:
+                    results[index] = self._execute_params(self.validate_arguments(item))
+                except Exception as e:
+                    results[index] = e
+                continue
+            
+            is_int = type_a is int and type_b is int
+            if vectorizable(operation, a, b, is_int):
+                key = (operation, is_int)
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = ([], [], [])
+                group[0].append(index)
+                group[1].append(a)
+                group[2].append(b)
+            else:
+                try:
+                    results[index] = self._calculate(operation, a, b)
+                except Exception as e:
+                    results[index] = e
+        
+        for (operation, is_int), (indices, a_values, b_values) in groups.items():
+            dtype = np.int64 if is_int else np.float64
+            a = np.array(a_values, dtype=dtype)
+            b = np.array(b_values, dtype=dtype)
+            
+            if operation == 'add':
+                values = a + b
+            elif operation == 'subtract':
+                values = a - b
+            elif operation == 'multiply':
+                values = a * b
+            elif operation == 'divide':
+                zero = b == 0
+                values = np.where(zero, np.inf, np.true_divide(a, np.where(zero, 1, b)))
+            else:
+                values = np.power(a, b)
+            
+            for index, a_value, b_value, value in zip(indices, a_values, b_values, values.tolist()):
+                results[index] = {
+                    "operation": operation,
+                    "a": a_value,
+                    "b": b_value,
+                    "result": value
+                }
+        
+        return results
+    
+    @staticmethod
+    def _vectorizable(operation: str, a: Any, b: Any, is_int: bool) -> bool:
+        """Whether NumPy gives exactly the Python result for these operands."""
+        if is_int:
+            if operation == 'power':
+                # Negative exponents give floats and large results overflow int64
+                if b < 0:
+                    return False
+                return abs(a) <= 1 or b * math.log2(abs(a)) < 62
+            limit = INT_LIMITS[operation]
+            return -limit < a < limit and -limit < b < limit
+        
+        if operation == 'power':
+            # NumPy's float pow may differ from the C library's in the last bit
+            return False
+        for value in (a, b):
+            if type(value) is int and not -FLOAT_INT_LIMIT <= value <= FLOAT_INT_LIMIT:
+                return False
+        return True
+    
     async def cleanup(self) -> None:
         """Clean up tool resources."""
         # Nothing to clean up for this tool
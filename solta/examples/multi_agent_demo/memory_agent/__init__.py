@@ -2,6 +2,6 @@
 Memory agent package initialization
 """
 from .agent import MemoryAgent
-from .tools import MemoryStoreTool
+from .tools import MemoryStoreTool, VectorMemoryTool
 
-__all__ = ['MemoryAgent', 'MemoryStoreTool']
+__all__ = ['MemoryAgent', 'MemoryStoreTool', 'VectorMemoryTool']
@@ -3,7 +3,9 @@ Memory agent implementation
 """
 from typing import Dict, Any, Optional
 from solta.core import Agent, setup_agent
-from .tools import MemoryStoreTool
+from solta.core.storage import SQLiteBackend
+from .tools import MemoryStoreTool, VectorMemoryTool
+from .vectors import numpy_available
 
 class MemoryAgent(Agent):
     """
@@ -17,9 +19,20 @@ class MemoryAgent(Agent):
     
     required_tools = ['memory_store']
     
-    def __init__(self):
+    def __init__(
+        self,
+        storage_path: Optional[str] = None,
+        durability: str = "committed",
+        vector_path: Optional[str] = None,
+        **store_options
+    ):
         super().__init__(name="Memory")
-        self.register_tool(MemoryStoreTool())
+        # Memories are kept in an SQLite database when a path is given
+        backend = SQLiteBackend(storage_path) if storage_path else None
+        self.register_tool(MemoryStoreTool(backend, durability=durability, **store_options))
+        # Vector memory needs NumPy; without a vector_path it is only offered when installed
+        if vector_path or numpy_available():
+            self.register_tool(VectorMemoryTool(vector_path))
         self.conversation_history = []
         self.max_history = 100
     
@@ -40,10 +53,12 @@ class MemoryAgent(Agent):
             operation = mem_op.get("operation")
             
             if operation == "store":
+                ttl = {"ttl": mem_op["ttl"]} if mem_op.get("ttl") is not None else {}
                 result = await self.tools["memory_store"].execute(
                     operation="store",
                     key=mem_op.get("key"),
-                    value=mem_op.get("value")
+                    value=mem_op.get("value"),
+                    **ttl
                 )
                 return {
                     "type": "memory_store",
@@ -63,14 +78,43 @@ class MemoryAgent(Agent):
                 }
                 
             elif operation == "list":
+                page_options = {
+                    name: mem_op[name]
+                    for name in ("prefix", "start", "end", "limit", "cursor")
+                    if mem_op.get(name) is not None
+                }
                 result = await self.tools["memory_store"].execute(
-                    operation="list"
+                    operation="list",
+                    **page_options
                 )
                 return {
                     "type": "memory_list",
-                    "keys": result.get("keys", [])
+                    "keys": result.get("keys", []),
+                    "count": result.get("count"),
+                    "next_cursor": result.get("next_cursor")
+                }
+                
+            elif operation == "stats":
+                result = await self.tools["memory_store"].execute(
+                    operation="stats"
+                )
+                return {
+                    "type": "memory_stats",
+                    "stats": result.get("stats")
                 }
         
+        # Handle vector memory operations
+        if "vector_memory" in message:
+            if "vector_memory" not in self.tools:
+                return {
+                    "type": "vector_memory_error",
+                    "error": "Vector memory needs NumPy: install it with `pip install solta[numpy]`"
+                }
+            return {
+                "type": "vector_memory",
+                **await self.tools["vector_memory"].execute(**message["vector_memory"])
+            }
+        
         # Provide context for other messages
         return {
             "type": "context",
@@ -78,6 +122,25 @@ class MemoryAgent(Agent):
             "last_message": self.conversation_history[-1] if self.conversation_history else None
         }
     
+    def export_state(self) -> Optional[Dict[str, Any]]:
+        """Carry memories and conversation history over a reload."""
+        state = super().export_state() or {}
+        state["conversation_history"] = list(self.conversation_history)
+        return state
+    
+    def import_state(self, state: Dict[str, Any]) -> None:
+        """Restore memories and conversation history."""
+        super().import_state(state)
+        self.conversation_history = list(state.get("conversation_history", []))[-self.max_history:]
+    
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Persist the conversation history (the tools snapshot the memories)."""
+        return {"conversation_history": list(self.conversation_history)}
+    
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Restore the conversation history."""
+        self.conversation_history = list(state.get("conversation_history", []))[-self.max_history:]
+    
     async def cleanup(self):
         """Cleanup agent resources."""
         self.conversation_history.clear()
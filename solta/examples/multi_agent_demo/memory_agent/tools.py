@@ -1,8 +1,14 @@
 """
 Tools for the Memory agent
 """
-from typing import Dict, Any, Optional, List
+import asyncio
+import os
+from typing import Dict, Any, Callable, Optional, List
 from solta.core.tools import BaseTool
+from solta.core.storage import KeyValueStore, StorageBackend
+from .vectors import VectorStore, numpy_available
+
+_NOT_FOUND = object()
 
 class MemoryStoreTool(BaseTool):
     """
@@ -10,46 +16,62 @@ class MemoryStoreTool(BaseTool):
     
     This tool demonstrates:
     1. State persistence
-    2. Data validation
+    2. Schema-based data validation
     3. Error handling
+    
+    Memories live in a KeyValueStore; pass a backend (e.g. SQLiteBackend)
+    to keep them across restarts. Extra keyword arguments configure the
+    store (cache_size, flush_interval, max_batch, durability, and the
+    max_keys, max_bytes, eviction and ttl bounds).
     """
     
-    def __init__(self):
+    parameters = {
+        "type": "object",
+        "properties": {
+            "operation": {
+                "type": "string",
+                "enum": ["store", "retrieve", "list", "stats"],
+                "description": "Memory operation to perform"
+            },
+            "key": {"type": "string", "description": "Memory key (store/retrieve)"},
+            "value": {"description": "Value to store (store)"},
+            "ttl": {"type": "number", "minimum": 0, "description": "Seconds until the memory expires (store)"},
+            "prefix": {"type": "string", "description": "Only list keys starting with this (list)"},
+            "start": {"type": "string", "description": "First key to list, inclusive (list)"},
+            "end": {"type": "string", "description": "Key to stop listing before (list)"},
+            "limit": {"type": "integer", "minimum": 1, "description": "Maximum keys per page (list)"},
+            "cursor": {"type": "string", "description": "next_cursor of the previous page (list)"}
+        },
+        "required": ["operation"],
+        "allOf": [
+            {
+                "if": {"properties": {"operation": {"enum": ["store", "retrieve"]}}},
+                "then": {"required": ["key"]}
+            },
+            {
+                "if": {"properties": {"operation": {"const": "store"}}},
+                "then": {"required": ["value"]}
+            }
+        ]
+    }
+    
+    def __init__(self, backend: Optional[StorageBackend] = None, **store_options):
         super().__init__(
             name="memory_store",
             description="Manages persistent memory storage"
         )
-        self.storage: Dict[str, Any] = {}
-    
-    def validate_params(self, params: Dict[str, Any]) -> bool:
-        """Validate memory operation parameters."""
-        operation = params.get("operation")
-        if not operation:
-            raise ValueError("Operation is required")
-            
-        if operation not in ["store", "retrieve", "list"]:
-            raise ValueError(f"Unknown operation: {operation}")
-            
-        if operation in ["store", "retrieve"]:
-            if "key" not in params:
-                raise ValueError("Key is required for store/retrieve operations")
-                
-        if operation == "store" and "value" not in params:
-            raise ValueError("Value is required for store operation")
-            
-        return True
+        self.storage = KeyValueStore(backend, **store_options)
+        self._owns_storage = True
     
     async def execute(self, **kwargs) -> Dict[str, Any]:
-        """Execute memory operations."""
-        self.validate_params(kwargs)
-        
+        """Execute memory operations (parameters are validated against the schema)."""
         operation = kwargs["operation"]
         
         try:
             if operation == "store":
                 key = kwargs["key"]
                 value = kwargs["value"]
-                self.storage[key] = value
+                await self.storage.put(key, value, ttl=kwargs.get("ttl"))
                 return {
                     "operation": "store",
                     "status": "success",
@@ -58,7 +80,8 @@ class MemoryStoreTool(BaseTool):
                 
             elif operation == "retrieve":
                 key = kwargs["key"]
-                if key not in self.storage:
+                value = await self.storage.get(key, _NOT_FOUND)
+                if value is _NOT_FOUND:
                     return {
                         "operation": "retrieve",
                         "status": "not_found",
@@ -69,28 +92,256 @@ class MemoryStoreTool(BaseTool):
                     "operation": "retrieve",
                     "status": "success",
                     "key": key,
-                    "value": self.storage[key]
+                    "value": value
                 }
                 
             elif operation == "list":
+                page = await self.storage.list_page(
+                    prefix=kwargs.get("prefix"),
+                    start=kwargs.get("start"),
+                    end=kwargs.get("end"),
+                    cursor=kwargs.get("cursor"),
+                    limit=kwargs.get("limit")
+                )
                 return {
                     "operation": "list",
                     "status": "success",
-                    "keys": list(self.storage.keys())
+                    **page
+                }
+                
+            elif operation == "stats":
+                return {
+                    "operation": "stats",
+                    "status": "success",
+                    "stats": await self.storage_stats()
                 }
                 
         except Exception as e:
             raise RuntimeError(f"Memory operation error: {str(e)}")
     
+    def export_state(self) -> Optional[Dict[str, Any]]:
+        """Hand the store (with its pending writes) over to a reloaded tool."""
+        return {"store": self.storage}
+    
+    def import_state(self, state: Dict[str, Any]) -> None:
+        """Take over the store of a previous instance, closing this tool's own."""
+        if "store" in state and state["store"] is not self.storage:
+            # A backend passed to both instances stays open for the adopted store
+            if self._owns_storage and self.storage.backend is not state["store"].backend:
+                self.storage.close_soon()
+            self.storage = state["store"]
+            self._owns_storage = True
+    
+    def release_state(self) -> None:
+        """The reloaded tool took over the store; leave it open on cleanup."""
+        self._owns_storage = False
+    
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Memories of an in-memory store (persistent backends keep their own)."""
+        if self.storage.backend.persistent:
+            return None
+        # Entries are listed from copies in the snapshot's worker thread
+        return {"memories": self.storage.capture()}
+    
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Write back the memories of a snapshot, with their remaining TTLs."""
+        if "memories" in state:
+            self.storage.restore(state["memories"])
+    
+    def snapshot_version(self) -> Any:
+        """Changes with every write to an in-memory store."""
+        if self.storage.backend.persistent:
+            return 0
+        return (id(self.storage), self.storage.version)
+    
     async def cleanup(self) -> None:
-        """Clean up tool resources."""
-        self.storage.clear()
+        """Commit pending writes and close the store."""
+        if self._owns_storage:
+            await self.storage.close()
         await super().cleanup()
     
     def get_storage_size(self) -> int:
-        """Get the current size of the storage."""
+        """
+        Get the current size of the storage.
+        
+        Served from the store's key index once it is loaded (by
+        storage_stats() or a list operation); before that, the key set is
+        read synchronously.
+        """
         return len(self.storage)
     
+    async def storage_stats(self) -> Dict[str, Any]:
+        """Memory-usage, eviction and cache metrics of the storage."""
+        # count() loads the key index off the event loop, unlike len()
+        await self.storage.count()
+        return self.storage.stats()
+    
     def has_key(self, key: str) -> bool:
         """Check if a key exists in storage."""
         return key in self.storage
+
+
+class VectorMemoryTool(BaseTool):
+    """
+    Tool for similarity search over embedded memories.
+    
+    This tool demonstrates:
+    1. Vectorized similarity search with NumPy (imported on first use)
+    2. An approximate (IVF) index for large collections
+    3. Memory-mapped persistence, so large memories open instantly
+    4. Offloading CPU-heavy queries from the event loop
+    
+    Items are added with a vector, or with text when the tool has an
+    embedder (a sync or async callable returning a vector). Queries return
+    the k most similar items by cosine similarity.
+    """
+    
+    execution_mode = "thread"
+    
+    parameters = {
+        "type": "object",
+        "properties": {
+            "operation": {
+                "type": "string",
+                "enum": ["add", "delete", "query", "stats"],
+                "description": "Vector memory operation to perform"
+            },
+            "key": {"type": "string", "description": "Item key (add/delete)"},
+            "vector": {"type": "array", "items": {"type": "number"}, "minItems": 1, "description": "Embedding (add/query)"},
+            "text": {"type": "string", "description": "Text to embed when no vector is given (add/query)"},
+            "metadata": {"description": "Data returned with the item (add)"},
+            "k": {"type": "integer", "minimum": 1, "default": 5, "description": "Number of results (query)"},
+            "exact": {"type": "boolean", "default": False, "description": "Score every item, bypassing the index (query)"}
+        },
+        "required": ["operation"],
+        "allOf": [
+            {
+                "if": {"properties": {"operation": {"enum": ["add", "delete"]}}},
+                "then": {"required": ["key"]}
+            }
+        ]
+    }
+    
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        embedder: Optional[Callable[[str], Any]] = None,
+        **store_options
+    ):
+        super().__init__(
+            name="vector_memory",
+            description="Stores embedded memories and finds the most similar ones"
+        )
+        self.path = path
+        self.embedder = embedder
+        self._store_options = store_options
+        self._store: Optional[VectorStore] = None
+        self._owns_store = True
+        if path and not numpy_available():
+            # Fail when configured rather than on first use
+            raise ImportError("Vector memory needs NumPy: install it with `pip install solta[numpy]`")
+    
+    @property
+    def store(self) -> VectorStore:
+        """The vector store, opened (memory-mapped) or created on first use."""
+        if self._store is None:
+            if self.path and os.path.exists(os.path.join(self.path, "meta.json")):
+                self._store = VectorStore.load(self.path, **self._store_options)
+            else:
+                self._store = VectorStore(**self._store_options)
+        return self._store
+    
+    async def _vector_of(self, kwargs: Dict[str, Any]) -> Any:
+        if kwargs.get("vector") is not None:
+            return kwargs["vector"]
+        if kwargs.get("text") is None:
+            raise ValueError("Either vector or text is required")
+        if self.embedder is None:
+            raise ValueError("Text requires the tool to have an embedder")
+        vector = self.embedder(kwargs["text"])
+        if asyncio.iscoroutine(vector) or isinstance(vector, asyncio.Future):
+            vector = await vector
+        return vector
+    
+    async def execute(self, **kwargs) -> Dict[str, Any]:
+        """Execute vector memory operations (parameters are validated against the schema)."""
+        operation = kwargs["operation"]
+        
+        if operation == "add":
+            key = kwargs["key"]
+            payload = {"text": kwargs.get("text"), "metadata": kwargs.get("metadata")}
+            self.store.add(key, await self._vector_of(kwargs), payload)
+            return {"operation": "add", "status": "success", "key": key}
+        
+        elif operation == "delete":
+            key = kwargs["key"]
+            deleted = self.store.delete(key)
+            return {"operation": "delete", "status": "success" if deleted else "not_found", "key": key}
+        
+        elif operation == "query":
+            vector = await self._vector_of(kwargs)
+            matches = await self.offload(self.store.query, vector, kwargs["k"], kwargs["exact"])
+            return {
+                "operation": "query",
+                "status": "success",
+                "results": [
+                    {"key": key, "score": score, **(payload or {})}
+                    for key, score, payload in matches
+                ]
+            }
+        
+        elif operation == "stats":
+            return {"operation": "stats", "status": "success", "stats": self.store.stats()}
+    
+    def save(self) -> None:
+        """Write the store to its path."""
+        if self.path and self._store is not None:
+            self._store.save(self.path)
+    
+    def export_state(self) -> Optional[Dict[str, Any]]:
+        """Hand the vector store over to a reloaded tool."""
+        if self._store is None:
+            return None
+        return {"vector_store": self._store}
+    
+    def import_state(self, state: Dict[str, Any]) -> None:
+        """
+        Take over the vector store of a previous instance (this tool's own
+        store, if it opened one, is dropped unsaved: it has no changes).
+        """
+        if "vector_store" in state:
+            self._store = state["vector_store"]
+            self._owns_store = True
+    
+    def release_state(self) -> None:
+        """The reloaded tool took over the store; don't save or drop it on cleanup."""
+        if self._store is not None:
+            self._owns_store = False
+    
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        The vectors of a store without a path (stores with a path are
+        saved there on cleanup).
+        """
+        if self.path or self._store is None:
+            return None
+        return {"vectors": self._store.snapshot()}
+    
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Rebuild the store from a snapshot, using its vectors in place."""
+        if not self.path and "vectors" in state:
+            self._store = VectorStore.from_snapshot(state["vectors"], **self._store_options)
+    
+    def snapshot_version(self) -> Any:
+        """Changes with every add or delete."""
+        if self.path or self._store is None:
+            return 0
+        return (id(self._store), self._store.version)
+    
+    async def cleanup(self) -> None:
+        """Save the store (when it has a path) and release it."""
+        if self._owns_store and self._store is not None:
+            if self.path:
+                await self.offload(self._store.save, self.path)
+            self._store = None
+        await super().cleanup()
@@ -0,0 +1,476 @@
+"""
+Vector similarity search for the Memory agent
+"""
+import json
+import math
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Rows scored per matrix product when assigning rows to IVF lists
+ASSIGN_CHUNK = 65536
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Vector memory needs NumPy: install it with `pip install solta[numpy]`") from None
+    return numpy
+
+
+def numpy_available() -> bool:
+    """Whether NumPy, which VectorStore needs, is installed."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _normalize(vector: Any, dim: Optional[int]) -> Any:
+    """Vector(s) as float32 with unit length; raises ValueError on bad input."""
+    np = _numpy()
+    array = np.asarray(vector, dtype=np.float32)
+    if array.ndim not in (1, 2) or array.shape[-1] == 0:
+        raise ValueError("Vectors must be non-empty lists of numbers")
+    if dim is not None and array.shape[-1] != dim:
+        raise ValueError(f"Vector has {array.shape[-1]} dimensions, expected {dim}")
+    norms = np.linalg.norm(array, axis=-1, keepdims=True)
+    if not np.all(np.isfinite(norms)) or np.any(norms == 0):
+        raise ValueError("Vectors must be finite and non-zero")
+    return array / norms
+
+
+def _top_k(scores: Any, k: int) -> Any:
+    """Indices of the k highest scores, best first."""
+    np = _numpy()
+    if k < len(scores):
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) index over the rows of a vector matrix.
+
+    Rows are assigned to the nearest of `nlist` centroids found by
+    spherical k-means. A query scores the centroids and then only the rows
+    in the `nprobe` nearest lists, trading a little recall for scanning a
+    small fraction of the matrix.
+    """
+
+    def __init__(self, centroids: Any, lists: List[List[int]]):
+        self.centroids = centroids
+        self.lists = lists
+        self._arrays: Dict[int, Any] = {}
+
+    @classmethod
+    def train(
+        cls,
+        matrix: Any,
+        rows: Any,
+        nlist: int,
+        iterations: int = 10,
+        seed: int = 0
+    ) -> 'IVFIndex':
+        """
+        Cluster the given rows of matrix and assign each row to a list.
+
+        k-means runs on a sample of at most 64 rows per list; assigning
+        the rows then takes one matrix product per chunk of rows.
+        """
+        np = _numpy()
+        rng = np.random.default_rng(seed)
+        nlist = max(1, min(nlist, len(rows)))
+        sample = rows if len(rows) <= nlist * 64 else rng.choice(rows, nlist * 64, replace=False)
+        points = np.asarray(matrix[np.sort(sample)])
+
+        centroids = points[rng.choice(len(points), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assigned = np.argmax(points @ centroids.T, axis=1)
+            # Sum the points of every list: sort by list, then reduce each run
+            order = np.argsort(assigned, kind="stable")
+            counts = np.bincount(assigned, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            filled = counts > 0
+            sums[filled] = np.add.reduceat(points[order], np.cumsum(counts)[filled] - counts[filled])
+            if not filled.all():
+                # Reseed empty lists with random points
+                sums[~filled] = points[rng.choice(len(points), int((~filled).sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+
+        lists: List[List[int]] = [[] for _ in range(nlist)]
+        for start in range(0, len(rows), ASSIGN_CHUNK):
+            chunk = rows[start:start + ASSIGN_CHUNK]
+            assigned = np.argmax(np.asarray(matrix[chunk]) @ centroids.T, axis=1)
+            order = np.argsort(assigned, kind="stable")
+            bounds = np.searchsorted(assigned[order], np.arange(nlist + 1))
+            for list_id in range(nlist):
+                members = chunk[order[bounds[list_id]:bounds[list_id + 1]]]
+                lists[list_id].extend(members.tolist())
+        return cls(centroids, lists)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.lists)
+
+    def add(self, row: int, vector: Any) -> None:
+        """Assign a new row to its nearest list."""
+        list_id = int(_numpy().argmax(self.centroids @ vector))
+        self.lists[list_id].append(row)
+        self._arrays.pop(list_id, None)
+
+    def candidates(self, query: Any, nprobe: int) -> Any:
+        """Rows in the nprobe lists nearest to the query."""
+        np = _numpy()
+        probes = _top_k(self.centroids @ query, min(nprobe, self.nlist))
+        arrays = []
+        for list_id in probes.tolist():
+            array = self._arrays.get(list_id)
+            if array is None:
+                array = np.asarray(self.lists[list_id], dtype=np.int64)
+                self._arrays[list_id] = array
+            arrays.append(array)
+        return np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+
+    def assignments(self, size: int) -> Any:
+        """List id of every row (-1 for rows in no list), for saving."""
+        np = _numpy()
+        assigned = np.full(size, -1, dtype=np.int32)
+        for list_id, rows in enumerate(self.lists):
+            assigned[rows] = list_id
+        return assigned
+
+    @classmethod
+    def from_assignments(cls, centroids: Any, assigned: Any) -> 'IVFIndex':
+        np = _numpy()
+        order = np.argsort(assigned, kind="stable")
+        bounds = np.searchsorted(assigned[order], np.arange(len(centroids) + 1))
+        lists = [order[bounds[i]:bounds[i + 1]].tolist() for i in range(len(centroids))]
+        return cls(centroids, lists)
+
+
+class VectorStore:
+    """
+    Keyed vectors in one contiguous float32 matrix.
+
+    This class:
+    1. Keeps unit-length vectors as matrix rows, so cosine similarity of a
+       query with every item is a single matrix-vector product
+    2. Appends rows in place, growing the matrix geometrically, and marks
+       deleted rows dead (compacting once a quarter of the rows are dead)
+    3. Builds an IVF index once the store holds `index_threshold` items,
+       and rebuilds it whenever the store has doubled since
+    4. Saves to a directory of .npy files that load memory-mapped, so a
+       large store opens without reading its vectors
+    5. Snapshots without copying its vectors: rows below the current size
+       are never written in place (deletes only clear a flag, growth and
+       compaction build a new matrix), so a view of them stays valid while
+       another thread encodes it
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        index_threshold: Optional[int] = 50000,
+        nlist: Optional[int] = None,
+        nprobe: int = 8
+    ):
+        self.dim = dim
+        self.index_threshold = index_threshold
+        self.nlist = nlist
+        self.nprobe = nprobe
+
+        self._matrix: Any = None
+        self._alive: Any = None
+        self._size = 0
+        self._keys: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._payloads: Dict[str, Any] = {}
+        self._writable = True
+        self._index: Optional[IVFIndex] = None
+        self._indexed_size = 0
+        self._version = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def _reserve(self, rows: int) -> None:
+        """Make room for `rows` more rows (copying a memory-mapped matrix)."""
+        np = _numpy()
+        needed = self._size + rows
+        capacity = 0 if self._matrix is None else len(self._matrix)
+        if self._writable and needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity if self._writable else needed, 1024)
+        matrix = np.empty((capacity, self.dim), dtype=np.float32)
+        alive = np.zeros(capacity, dtype=bool)
+        if self._size:
+            matrix[:self._size] = self._matrix[:self._size]
+            alive[:self._size] = self._alive[:self._size]
+        self._matrix, self._alive = matrix, alive
+        self._writable = True
+
+    def add(self, key: str, vector: Sequence[float], payload: Any = None) -> None:
+        """Add or replace an item."""
+        self.add_many([key], [vector], [payload])
+
+    def add_many(
+        self,
+        keys: Sequence[str],
+        vectors: Any,
+        payloads: Optional[Sequence[Any]] = None
+    ) -> None:
+        """Add or replace many items with one normalization and copy."""
+        if len(keys) != len(vectors) or (payloads is not None and len(payloads) != len(keys)):
+            raise ValueError("keys, vectors and payloads must have the same length")
+        if not len(keys):
+            return
+        if len(set(keys)) != len(keys):
+            raise ValueError("Keys must be unique")
+        normalized = _normalize(vectors, self.dim)
+        if self.dim is None:
+            self.dim = normalized.shape[1]
+        self._version += 1
+
+        for key in keys:
+            if key in self._rows:
+                self.delete(key, compact=False)
+        self._reserve(len(keys))
+
+        start = self._size
+        self._matrix[start:start + len(keys)] = normalized
+        self._alive[start:start + len(keys)] = True
+        self._size += len(keys)
+        for offset, key in enumerate(keys):
+            self._keys.append(key)
+            self._rows[key] = start + offset
+            if payloads is not None:
+                self._payloads[key] = payloads[offset]
+
+        if self._index is not None and len(self) < 2 * self._indexed_size:
+            for offset in range(len(keys)):
+                self._index.add(start + offset, normalized[offset])
+        elif self.index_threshold is not None and len(self) >= self.index_threshold:
+            self.build_index()
+
+    def delete(self, key: str, compact: bool = True) -> bool:
+        """Delete an item; returns whether it existed."""
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+        self._version += 1
+        if not self._writable:
+            self._reserve(0)
+        self._alive[row] = False
+        self._keys[row] = None
+        self._payloads.pop(key, None)
+        if compact and self._size >= 1024 and len(self) < 0.75 * self._size:
+            self.compact()
+        return True
+
+    def get(self, key: str) -> Optional[Tuple[List[float], Any]]:
+        """Stored (unit-length) vector and payload of an item."""
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        return self._matrix[row].tolist(), self._payloads.get(key)
+
+    def compact(self) -> None:
+        """Drop dead rows, renumbering the rest (and rebuilding the index)."""
+        np = _numpy()
+        live = np.flatnonzero(self._alive[:self._size])
+        self._matrix = np.ascontiguousarray(self._matrix[live])
+        self._alive = np.ones(len(live), dtype=bool)
+        self._writable = True
+        self._keys = [self._keys[row] for row in live.tolist()]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._size = len(live)
+        if self._index is not None:
+            self.build_index()
+
+    def build_index(self, nlist: Optional[int] = None) -> None:
+        """(Re)build the IVF index over the live rows."""
+        np = _numpy()
+        rows = np.flatnonzero(self._alive[:self._size])
+        if not len(rows):
+            self._index = None
+            return
+        nlist = nlist or self.nlist or min(4096, max(16, int(math.sqrt(len(rows)))))
+        self._index = IVFIndex.train(self._matrix, rows, nlist)
+        self._indexed_size = len(rows)
+
+    def query(
+        self,
+        vector: Sequence[float],
+        k: int = 5,
+        exact: bool = False,
+        nprobe: Optional[int] = None
+    ) -> List[Tuple[str, float, Any]]:
+        """
+        Items most similar to a vector.
+
+        Args:
+            vector: Query vector (any length scale)
+            k: Number of results
+            exact: Score every item even when an index exists
+            nprobe: IVF lists to search (default: the store's nprobe)
+
+        Returns:
+            (key, cosine similarity, payload) tuples, most similar first
+        """
+        np = _numpy()
+        if not self._rows or k <= 0:
+            return []
+        query = _normalize(vector, self.dim)
+        if query.ndim != 1:
+            raise ValueError("Query must be a single vector")
+
+        # Queries may run in a worker thread; work on one consistent view
+        matrix, alive, size, keys, index = self._matrix, self._alive, self._size, self._keys, self._index
+        if index is not None and not exact:
+            rows = index.candidates(query, nprobe or self.nprobe)
+            rows = rows[rows < size]
+            rows = rows[alive[rows]]
+            scores = np.asarray(matrix[rows]) @ query
+            best = _top_k(scores, k)
+            rows, scores = rows[best], scores[best]
+        else:
+            scores = np.asarray(matrix[:size]) @ query
+            scores[~alive[:size]] = -np.inf
+            rows = _top_k(scores, min(k, len(self._rows)))
+            rows = rows[np.isfinite(scores[rows])]
+            scores = scores[rows]
+
+        return [
+            (keys[row], float(score), self._payloads.get(keys[row]))
+            for row, score in zip(rows.tolist(), scores.tolist())
+        ]
+
+    def save(self, directory: str) -> None:
+        """
+        Save to a directory (replaced as a whole, so a crash mid-save
+        leaves the previous copy intact).
+        """
+        np = _numpy()
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        staging = f"{directory}.saving"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        size = self._size
+        dim = self.dim or 0
+        matrix = self._matrix[:size] if self._matrix is not None else np.empty((0, dim), dtype=np.float32)
+        alive = self._alive[:size] if self._alive is not None else np.empty(0, dtype=bool)
+        np.save(os.path.join(staging, "vectors.npy"), matrix)
+        np.save(os.path.join(staging, "alive.npy"), alive)
+        if self._index is not None:
+            np.save(os.path.join(staging, "centroids.npy"), self._index.centroids)
+            np.save(os.path.join(staging, "assignments.npy"), self._index.assignments(size))
+        with open(os.path.join(staging, "meta.json"), "w") as f:
+            json.dump({
+                "dim": self.dim,
+                "keys": self._keys,
+                "payloads": self._payloads,
+                "indexed_size": self._indexed_size,
+            }, f)
+
+        retired = f"{directory}.old"
+        shutil.rmtree(retired, ignore_errors=True)
+        if os.path.exists(directory):
+            os.replace(directory, retired)
+        os.replace(staging, directory)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory: str, **options: Any) -> 'VectorStore':
+        """
+        Open a saved store. Vectors stay memory-mapped until the first
+        change, so opening takes the same time whatever the store's size.
+        """
+        np = _numpy()
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        store = cls(dim=meta["dim"], **options)
+        store._matrix = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        store._alive = np.load(os.path.join(directory, "alive.npy"))
+        store._writable = False
+        store._size = len(meta["keys"])
+        store._keys = meta["keys"]
+        store._rows = {key: row for row, key in enumerate(store._keys) if key is not None}
+        store._payloads = meta["payloads"]
+        centroids_path = os.path.join(directory, "centroids.npy")
+        if os.path.exists(centroids_path):
+            store._index = IVFIndex.from_assignments(
+                np.load(centroids_path),
+                np.load(os.path.join(directory, "assignments.npy"))
+            )
+            store._indexed_size = meta["indexed_size"]
+        return store
+
+    @property
+    def version(self) -> int:
+        """Number of changes so far."""
+        return self._version
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State for a snapshot; the vectors are a zero-copy view."""
+        size = self._size
+        state = {
+            "dim": self.dim,
+            "keys": self._keys[:size],
+            "payloads": dict(self._payloads),
+            "alive": self._alive[:size].tobytes() if size else b"",
+            "vectors": memoryview(self._matrix[:size]) if size else b"",
+            "indexed_size": self._indexed_size,
+        }
+        if self._index is not None:
+            state["centroids"] = self._index.centroids.tobytes()
+            state["assignments"] = self._index.assignments(size).tobytes()
+        return state
+
+    @classmethod
+    def from_snapshot(cls, state: Dict[str, Any], **options: Any) -> 'VectorStore':
+        """
+        Rebuild a store from snapshot() state. The vectors are used in
+        place (read-only) until the first change, as with load().
+        """
+        np = _numpy()
+        store = cls(**{**options, "dim": state["dim"]})
+        size = len(state["keys"])
+        if size:
+            store._matrix = np.frombuffer(state["vectors"], dtype=np.float32).reshape(size, state["dim"])
+            store._alive = np.frombuffer(state["alive"], dtype=bool)
+            store._writable = False
+        store._size = size
+        store._keys = list(state["keys"])
+        store._rows = {key: row for row, key in enumerate(store._keys) if key is not None}
+        store._payloads = dict(state["payloads"])
+        if state.get("centroids") is not None:
+            store._index = IVFIndex.from_assignments(
+                np.frombuffer(state["centroids"], dtype=np.float32).reshape(-1, state["dim"]),
+                np.frombuffer(state["assignments"], dtype=np.int32)
+            )
+            store._indexed_size = state["indexed_size"]
+        return store
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and index statistics."""
+        return {
+            "items": len(self),
+            "rows": self._size,
+            "dim": self.dim,
+            "bytes": self._size * (self.dim or 0) * 4,
+            "memory_mapped": not self._writable and isinstance(self._matrix, _numpy().memmap),
+            "index": "ivf" if self._index is not None else None,
+            "nlist": self._index.nlist if self._index is not None else None,
+            "nprobe": self.nprobe,
+        }